@@ -0,0 +1,32 @@
+"""
+atualizar_resumo_folha.py - Refresh do resumo mensal da folha (ebisa_tab_folha_resumo)
+
+Recalcula apenas os meses marcados pelos triggers como alterados.
+Pode ser agendado (cron) após a carga da folha.
+
+Uso (na raiz do projeto):
+    python apoio/atualizar_resumo_folha.py                  # só meses alterados
+    python apoio/atualizar_resumo_folha.py 2025-01 2025-02  # força também esses meses
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.folha_resumo import atualizar_resumo_folha  # noqa: E402
+
+
+def main():
+    reprocessar = []
+    for arg in sys.argv[1:]:
+        ano, mes = arg.split("-")
+        reprocessar.append((int(ano), int(mes)))
+
+    resultado = atualizar_resumo_folha(reprocessar)
+    print(resultado["message"])
+    sys.exit(0 if resultado["success"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+bench_leitura_excel_plano.py - Compara a leitura do Excel do plano de contas
+
+Caminho antigo: pd.read_excel(..., dtype=str) com openpyxl (workbook inteiro)
+Caminho novo:   ler_excel_plano (calamine ou openpyxl read_only, só colunas do MAP_COLS)
+
+Uso (na raiz do projeto):
+    python apoio/bench_leitura_excel_plano.py [qtd_linhas] [repeticoes]
+"""
+
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+
+from utils.plano_contas_db import ler_excel_plano, _CALAMINE_DISPONIVEL  # noqa: E402
+
+
+def gerar_planilha(qtd_linhas: int) -> bytes:
+    """Gera um .xlsx sintético no layout da exportação do Sienge (com colunas extras)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Plano")
+    ws.append([
+        "Código Contábil", "Descrição", "Código Reduzido", "Grupo de conta",
+        "Tipo de Conta", "Usar no balanço patrimonial", "Permite Rateio",
+        "Redutora", "Data Cadastramento", "Conta referencial",
+        "Código do evento", "Ativa",
+        # colunas que o import descarta
+        "Observação", "Usuário Cadastro", "Natureza SPED", "Nível",
+    ])
+    for i in range(qtd_linhas):
+        ws.append([
+            f"1.1.{i % 90 + 10}.{i % 70 + 20}.{i:06d}", f"CONTA {i}", i + 1, i % 9 + 1,
+            "Analítica", "Sim", "Não", "Não", "01/01/2024", f"1.01.{i % 99:02d}",
+            "", "Sim", "observação qualquer", "usuario@ebisa", "01", 5,
+        ])
+    ws2 = wb.create_sheet("Outra aba")
+    for i in range(qtd_linhas // 2):
+        ws2.append([i, f"lixo {i}"])
+
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def cronometrar(func, conteudo: bytes, repeticoes: int):
+    tempos = []
+    df = None
+    for _ in range(repeticoes):
+        arquivo = BytesIO(conteudo)
+        arquivo.name = "plano.xlsx"
+        inicio = time.perf_counter()
+        df = func(arquivo)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), df
+
+
+def leitura_antiga(arquivo):
+    arquivo.seek(0)
+    return pd.read_excel(arquivo, sheet_name=0, dtype=str)
+
+
+def main():
+    qtd_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"Gerando planilha com {qtd_linhas} linhas...")
+    conteudo = gerar_planilha(qtd_linhas)
+    print(f"Tamanho do arquivo: {len(conteudo) / 1024 / 1024:.1f} MB")
+    print(f"calamine disponível: {_CALAMINE_DISPONIVEL}\n")
+
+    t_antigo, df_antigo = cronometrar(leitura_antiga, conteudo, repeticoes)
+    t_novo, df_novo = cronometrar(ler_excel_plano, conteudo, repeticoes)
+
+    print(f"pd.read_excel (openpyxl): {t_antigo:8.3f}s  {df_antigo.shape}")
+    print(f"ler_excel_plano:          {t_novo:8.3f}s  {df_novo.shape}")
+    print(f"Ganho: {t_antigo / t_novo:.1f}x")
+
+    if len(df_antigo) != len(df_novo):
+        print("⚠️ Quantidade de linhas divergente entre as leituras!")
+
+
+if __name__ == "__main__":
+    main()
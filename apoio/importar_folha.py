@@ -0,0 +1,38 @@
+"""
+importar_folha.py - Carga da folha de um mês a partir da exportação do RH
+
+Substitui todas as linhas do mês em ebisa_tab_folha e atualiza o resumo
+mensal e o cache (ver utils/folha_importacao.py).
+
+Uso (na raiz do projeto):
+    python apoio/importar_folha.py folha_2025_03.xlsx 2025-03
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.folha_importacao import importar_folha  # noqa: E402
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(2)
+
+    caminho, periodo = sys.argv[1], sys.argv[2]
+    ano, mes = periodo.split("-")
+
+    with open(caminho, "rb") as arquivo:
+        resultado = importar_folha(arquivo, int(ano), int(mes))
+
+    print(resultado["message"])
+    rejeitadas = resultado.get("rejeitadas")
+    if rejeitadas is not None and not rejeitadas.empty:
+        print(rejeitadas[["linha", "motivo"]].to_string(index=False))
+    sys.exit(0 if resultado["success"] else 1)
+
+
+if __name__ == "__main__":
+    main()
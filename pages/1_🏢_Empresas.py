@@ -1,9 +1,12 @@
 import streamlit as st
 from utils.auth import require_authentication, get_current_user
 from utils.plano_contas_db import listar_planos_empresa
+from utils.empresa_importacao import importar_empresas_lote
+from utils.empresa_busca import buscar_empresas_memoria, caixa_busca_empresas
 from utils.empresa_db import (
     listar_empresas,
-    buscar_empresas,
+    listar_labels_empresas,
+    invalidar_catalogo_empresas,
     cadastrar_empresa,
     buscar_empresa_por_cnpj
 )
@@ -48,6 +51,7 @@ with tab1:
         st.markdown("<div style='height: 1.8rem;'></div>",
                     unsafe_allow_html=True)
         if st.button("🔄 Atualizar", width="stretch"):
+            invalidar_catalogo_empresas()
             st.rerun()
 
     st.markdown("---")
@@ -188,6 +192,43 @@ with tab2:
                             else:
                                 st.error(mensagem)
 
+    st.markdown("---")
+
+    with st.expander("📦 Importar empresas do Sienge (em lote)"):
+        st.caption(
+            "Arquivo exportado do Sienge (Excel ou CSV) com as colunas Código, "
+            "Nome/Razão Social e CNPJ. Colunas Ativa, Controladora, Controlada, "
+            "Sede, Consórcio e SCP são opcionais. CNPJs já cadastrados são atualizados.")
+
+        arquivo_empresas = st.file_uploader(
+            "Selecione o arquivo",
+            type=["xlsx", "xls", "csv"],
+            key="upload_empresas_lote"
+        )
+
+        if st.button("📥 Importar empresas", type="primary",
+                     disabled=arquivo_empresas is None):
+            with st.spinner("Importando empresas..."):
+                resultado = importar_empresas_lote(arquivo_empresas)
+
+            if resultado["success"]:
+                st.success(resultado["message"])
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Inseridas", resultado["inseridas"])
+                col2.metric("Atualizadas", resultado["atualizadas"])
+                col3.metric("Rejeitadas", len(resultado["rejeitadas"]))
+
+                if not resultado["rejeitadas"].empty:
+                    st.warning("⚠️ Linhas rejeitadas:")
+                    st.dataframe(
+                        resultado["rejeitadas"][
+                            ["linha", "cod_empresa", "nome_empresa", "motivo"]],
+                        width="stretch",
+                        hide_index=True
+                    )
+            else:
+                st.error(resultado["message"])
+
 # Tab 3: Plano de Contas
 with tab3:
     st.subheader(":page_with_curl: Plano de Contas")
@@ -196,14 +237,7 @@ with tab3:
     with st.spinner("Carregando dados..."):
 
         # Buscar todas as empresas para o filtro
-        df_empresas = listar_empresas()
-        if not df_empresas.empty:
-            df_empresas = df_empresas.copy()
-            df_empresas["label"] = df_empresas["cod_empresa"].astype(
-                str) + " - " + df_empresas["Empresa"].astype(str)
-            empresas_lista = ["Todas"] + sorted(df_empresas["label"].tolist())
-        else:
-            empresas_lista = ["Todas"]
+        empresas_lista = ["Todas"] + listar_labels_empresas()
 
         # Buscar todos os balancetes para extrair anos únicos
         # df_todos = listar_balancetes()
@@ -272,37 +306,32 @@ with tab4:
         )
 
     with col2:
-        termo_busca = st.text_input(
-            "Digite o termo de busca:",
-            placeholder=f"Digite {tipo_busca.lower()}...",
-            key="termo_busca"
+        termo_busca = caixa_busca_empresas(
+            key="termo_busca",
+            placeholder=f"Digite {tipo_busca.lower()}..."
         )
 
-        if st.button("🔍 Buscar", width="stretch", type="primary"):
-            if not termo_busca:
-                st.error("⚠️ Digite um termo para buscar!")
-            else:
-                # Mapear tipo de busca
-                tipo_map = {
-                    "Razão Social": "razao_social",
-                    "CNPJ": "cnpj",
-                    "Abreviação": "abreviacao"
-                }
+    if termo_busca.strip():
+        # Mapear tipo de busca
+        tipo_map = {
+            "Razão Social": "razao_social",
+            "CNPJ": "cnpj",
+            "Abreviação": "abreviacao"
+        }
 
-                with st.spinner(f"🔎 Buscando por {tipo_busca}..."):
-                    df_resultado = buscar_empresas(
-                        termo_busca, tipo_map[tipo_busca])
+        df_resultado = buscar_empresas_memoria(
+            termo_busca, tipo_map[tipo_busca])
 
-                st.markdown("---")
+        st.markdown("---")
 
-                if not df_resultado.empty:
-                    st.success(
-                        f"✅ Encontradas **{len(df_resultado)}** empresa(s)")
+        if not df_resultado.empty:
+            st.success(
+                f"✅ Encontradas **{len(df_resultado)}** empresa(s)")
 
-                    st.dataframe(
-                        df_resultado,
-                        width="stretch",
-                        hide_index=True
-                    )
-                else:
-                    st.warning("⚠️ Nenhum resultado encontrado.")
+            st.dataframe(
+                df_resultado,
+                width="stretch",
+                hide_index=True
+            )
+        else:
+            st.warning("⚠️ Nenhum resultado encontrado.")
@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
 from utils.auth import require_authentication, get_current_user
-from utils.plano_contas_db import listar_planos_empresa
+from utils.plano_contas_db import (
+    listar_planos_empresa,
+    comparar_planos,
+    importar_plano_contas_lote
+)
 from utils.plano_contas_processor import run_processor
+from utils.empresa_busca import buscar_empresas_memoria, caixa_busca_empresas
 from utils.empresa_db import (
     listar_empresas,
-    buscar_empresas,
+    listar_labels_empresas,
     cadastrar_empresa,
     buscar_empresa_por_cnpj
 )
@@ -58,8 +63,8 @@ st.markdown(f"**Usuário:** {user['nome']}")
 st.markdown("---")
 
 # Abas
-tab1, tab2, tab3 = st.tabs(
-    ["📋 Lista de Planos", "➕ Upload de Plano", "🔍 Buscar"])
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["📋 Lista de Planos", "➕ Upload de Plano", "🔍 Buscar", "🔀 Comparar Planos"])
 
 # Tab 1: Lista de Planos
 with tab1:
@@ -69,14 +74,7 @@ with tab1:
     with st.spinner("Carregando empresas..."):
 
         # Buscar todas as empresas para o filtro
-        df_empresas = listar_empresas()
-        if not df_empresas.empty:
-            df_empresas = df_empresas.copy()
-            df_empresas["label"] = df_empresas["cod_empresa"].astype(
-                str) + " - " + df_empresas["Empresa"].astype(str)
-            empresas_lista = ["Todas"] + sorted(df_empresas["label"].tolist())
-        else:
-            empresas_lista = ["Todas"]
+        empresas_lista = ["Todas"] + listar_labels_empresas()
 
     # Filtros
     col1, col2, col3 = st.columns(3)
@@ -131,18 +129,12 @@ with tab2:
 
     # Carregar empresas
     with st.spinner("Carregando empresas..."):
-        df_emp_up = listar_empresas()
+        empresas_upload = listar_labels_empresas()
 
-    if df_emp_up.empty:
+    if not empresas_upload:
         st.warning("⚠ Nenhuma empresa cadastrada.")
         st.stop()
 
-    # Preparar labels
-    df_emp_up = df_emp_up.copy()
-    df_emp_up["label"] = df_emp_up["cod_empresa"].astype(
-        str) + " - " + df_emp_up["Empresa"].astype(str)
-    empresas_upload = sorted(df_emp_up["label"].tolist())
-
     col1, col2 = st.columns(2)
 
     with col1:
@@ -189,7 +181,9 @@ with tab2:
             )
         print(f"[RESPOSTA-VERIFICAR-VIGENCIA] - existe: {existe}\n")
 
-        if not existe.get("existe", False):
+        if existe.get("erro"):
+            st.error(f"❌ Erro ao verificar a vigência: {existe['erro']}")
+        elif not existe.get("existe", False):
             st.session_state["page"] = "processor"
             st.rerun()
         else:
@@ -199,6 +193,62 @@ with tab2:
             }
             confirmar_sobrescrita()
 
+    st.markdown("---")
+
+    # Aplicação em lote: um arquivo para várias empresas e anos
+    with st.expander("📦 Aplicar um plano a várias empresas / anos"):
+        with st.form("form_plano_lote", clear_on_submit=False):
+            empresas_lote = st.multiselect("Empresas", empresas_upload)
+            anos_lote = st.multiselect(
+                "Anos de Vigência", [2025, 2024, 2023], default=[2025])
+
+            c1, c2 = st.columns(2)
+            with c1:
+                nome_lote = st.text_input(
+                    "Nome do Plano", placeholder="Ex: Plano Contábil Grupo 2025", key="nome_plano_lote")
+            with c2:
+                descricao_lote = st.text_input(
+                    "Descrição", placeholder="Breve descrição", key="descricao_plano_lote")
+
+            arquivo_lote = st.file_uploader(
+                "Arquivo do Plano de Contas (CSV, XLSX, XLS)",
+                type=["csv", "xlsx", "xls"],
+                key="arquivo_plano_lote"
+            )
+
+            st.warning(
+                "⚠ As vigências ativas das empresas/anos selecionados serão inativadas.")
+            aplicar_lote = st.form_submit_button(
+                "📥 Aplicar em lote", type="primary")
+
+        if aplicar_lote:
+            if not empresas_lote or not anos_lote:
+                st.error("Selecione ao menos uma empresa e um ano.")
+            elif not nome_lote or not descricao_lote:
+                st.error("Informe nome e descrição do plano.")
+            elif arquivo_lote is None:
+                st.error("Selecione o arquivo do plano de contas.")
+            else:
+                alvos = [
+                    (int(label.split(" - ", 1)[0]), int(ano))
+                    for label in empresas_lote
+                    for ano in anos_lote
+                ]
+                with st.spinner(f"Aplicando plano a {len(alvos)} vigência(s)..."):
+                    resultado = importar_plano_contas_lote(
+                        alvos=alvos,
+                        uploaded_file=arquivo_lote,
+                        nome_plano=nome_lote,
+                        descricao_plano=descricao_lote
+                    )
+
+                if resultado.get("success"):
+                    st.success(
+                        f"✅ {resultado['message']} Contas gravadas: {resultado.get('rows', 'N/D')}.")
+                else:
+                    st.error(
+                        f"❌ Falha ao aplicar: {resultado.get('message', 'Erro desconhecido.')}")
+
 
 # Tab 3: Buscar
 with tab3:
@@ -214,37 +264,96 @@ with tab3:
         )
 
     with col2:
-        termo_busca = st.text_input(
-            "Digite o termo de busca:",
-            placeholder=f"Digite {tipo_busca.lower()}...",
-            key="termo_busca"
+        termo_busca = caixa_busca_empresas(
+            key="termo_busca",
+            placeholder=f"Digite {tipo_busca.lower()}..."
         )
 
-        if st.button("🔍 Buscar", width="stretch", type="primary"):
-            if not termo_busca:
-                st.error("⚠️ Digite um termo para buscar!")
-            else:
-                # Mapear tipo de busca
-                tipo_map = {
-                    "Razão Social": "razao_social",
-                    "CNPJ": "cnpj",
-                    "Abreviação": "abreviacao"
-                }
+    if termo_busca.strip():
+        # Mapear tipo de busca
+        tipo_map = {
+            "Razão Social": "razao_social",
+            "CNPJ": "cnpj",
+            "Abreviação": "abreviacao"
+        }
 
-                with st.spinner(f"🔎 Buscando por {tipo_busca}..."):
-                    df_resultado = buscar_empresas(
-                        termo_busca, tipo_map[tipo_busca])
+        df_resultado = buscar_empresas_memoria(
+            termo_busca, tipo_map[tipo_busca])
 
-                st.markdown("---")
+        st.markdown("---")
 
-                if not df_resultado.empty:
-                    st.success(
-                        f"✅ Encontradas **{len(df_resultado)}** empresa(s)")
+        if not df_resultado.empty:
+            st.success(
+                f"✅ Encontradas **{len(df_resultado)}** empresa(s)")
 
-                    st.dataframe(
-                        df_resultado,
-                        width="stretch",
-                        hide_index=True
-                    )
+            st.dataframe(
+                df_resultado,
+                width="stretch",
+                hide_index=True
+            )
+        else:
+            st.warning("⚠️ Nenhum resultado encontrado.")
+
+
+# Tab 4: Comparar Planos
+with tab4:
+    st.subheader("🔀 Comparar Planos de Contas")
+
+    # st.tabs executa o corpo de todas as abas a cada rerun: a lista de
+    # planos só é consultada com a comparação ligada
+    comparar_ligado = st.toggle("Carregar planos para comparação", key="cmp_carregar_planos")
+    df_todos_planos = listar_planos_empresa(empresa="Todas") if comparar_ligado else None
+
+    if df_todos_planos is None:
+        st.caption("Ligue a opção acima para escolher os planos a comparar.")
+    elif df_todos_planos.empty:
+        st.warning("⚠️ Nenhum plano de contas cadastrado.")
+    else:
+        # Um plano pode estar vinculado a várias vigências: uma opção por plano
+        df_opcoes = df_todos_planos.drop_duplicates("ID Plano").sort_values(
+            ["Nome Empresa", "Ano Vigência"], ascending=[True, False])
+        opcoes = {
+            f"{r['ID Plano']} - {r['Nome']} ({r['Nome Empresa']} / {r['Ano Vigência']})": int(r["ID Plano"])
+            for _, r in df_opcoes.iterrows()
+        }
+        labels = list(opcoes.keys())
+
+        col1, col2 = st.columns(2)
+        with col1:
+            plano_anterior = st.selectbox(
+                "Plano anterior", labels, index=min(1, len(labels) - 1), key="cmp_plano_anterior")
+        with col2:
+            plano_novo = st.selectbox(
+                "Plano novo", labels, index=0, key="cmp_plano_novo")
+
+        if st.button("🔀 Comparar", type="primary"):
+            if opcoes[plano_anterior] == opcoes[plano_novo]:
+                st.error("⚠️ Selecione dois planos diferentes.")
+            else:
+                with st.spinner("Comparando planos..."):
+                    diff = comparar_planos(
+                        opcoes[plano_anterior], opcoes[plano_novo])
+
+                if not diff["success"]:
+                    st.error(diff["message"])
                 else:
-                    st.warning("⚠️ Nenhum resultado encontrado.")
+                    st.caption(diff["message"])
+
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("➕ Adicionadas", len(diff["adicionadas"]))
+                    m2.metric("➖ Removidas", len(diff["removidas"]))
+                    m3.metric("✏️ Renomeadas", len(diff["renomeadas"]))
+                    m4.metric("🗂️ Reagrupadas", len(diff["reagrupadas"]))
+
+                    st.markdown("---")
+
+                    t_add, t_rem, t_ren, t_grp = st.tabs(
+                        ["Adicionadas", "Removidas", "Renomeadas", "Reagrupadas"])
+                    with t_add:
+                        st.dataframe(diff["adicionadas"], width="stretch", hide_index=True)
+                    with t_rem:
+                        st.dataframe(diff["removidas"], width="stretch", hide_index=True)
+                    with t_ren:
+                        st.dataframe(diff["renomeadas"], width="stretch", hide_index=True)
+                    with t_grp:
+                        st.dataframe(diff["reagrupadas"], width="stretch", hide_index=True)
@@ -1,7 +1,7 @@
 import streamlit as st
 from utils.auth import require_authentication, get_current_user
 from utils.balancete_processor import run_processor
-from utils.empresa_db import listar_empresas
+from utils.empresa_db import listar_labels_empresas
 # from utils.balancete_db import importar_balancete_completo
 from utils.balancete_db import listar_balancetes
 
@@ -50,14 +50,7 @@ with tab1:
     with st.spinner("Carregando dados..."):
 
         # Buscar todas as empresas para o filtro
-        df_empresas = listar_empresas()
-        if not df_empresas.empty:
-            df_empresas = df_empresas.copy()
-            df_empresas["label"] = df_empresas["cod_empresa"].astype(
-                str) + " - " + df_empresas["Empresa"].astype(str)
-            empresas_lista = ["Todas"] + sorted(df_empresas["label"].tolist())
-        else:
-            empresas_lista = ["Todas"]
+        empresas_lista = ["Todas"] + listar_labels_empresas()
 
     # Filtros
     col1, col2, col3 = st.columns(3)
@@ -120,19 +113,11 @@ with tab2:
 
     # Buscar empresas do banco
     with st.spinner("Carregando empresas..."):
-        df_empresas = listar_empresas()
+        empresas_lista = listar_labels_empresas()
 
-    if df_empresas.empty:
+    if not empresas_lista:
         st.warning("⚠️ Nenhuma empresa cadastrada. Cadastre empresas primeiro.")
     else:
-        if not df_empresas.empty:
-            df_empresas = df_empresas.copy()
-            df_empresas["label"] = df_empresas["cod_empresa"].astype(
-                str) + " - " + df_empresas["Empresa"].astype(str)
-            empresas_lista = sorted(df_empresas["label"].tolist())
-        else:
-            empresas_lista = [""]
-
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
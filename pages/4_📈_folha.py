@@ -1,47 +1,75 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import database  # Importa o seu módulo de conexão
+from utils.folha_db import (
+    listar_periodos_folha,
+    pagina_folha,
+    contar_folha
+)
+from utils.folha_cubo import obter_cubo_folha
+from utils.folha_graficos import payload_graficos
+from utils import folha_agregacao as agg
+from utils.folha_resumo import atualizar_resumo_folha
+from utils.folha_importacao import importar_folha
+from utils.notificacoes import iniciar_listener
 
 # Configuração da Página
 st.set_page_config(page_title="Dashboard RH", layout="wide")
 
+# Invalidação do cache por notificações do banco (uma thread por processo)
+iniciar_listener()
+
 # --- FUNÇÕES DE CARREGAMENTO DE DADOS ---
+# Só o mês selecionado é carregado, em um cubo em memória (folha_cubo):
+# KPIs, headcount distinto e gráficos (séries resumidas com NumPy) de cada
+# centro saem do cubo, sem nova consulta ao trocar o filtro. Resultados
+# ficam no cache "folha" (agg.CACHE_FOLHA), invalidado por período no
+# refresh; os cubos são limitados a agg.CUBOS_EM_MEMORIA por processo. O detalhamento é paginado no banco
+# (folha_db.pagina_folha).
 
-@st.cache_data(ttl=600) # Cache por 10 minutos
 def get_periodos_disponiveis():
     """Busca apenas os anos e meses distintos para o filtro"""
-    conn = database.conectar()
-    query = """
-    SELECT DISTINCT ano, mes 
-    FROM public.ebisa_tab_folha 
-    ORDER BY ano DESC, mes DESC
-    """
-    try:
-        df = pd.read_sql(query, conn)
-        return df
-    finally:
-        database.desconectar(conn)
-
-@st.cache_data(ttl=600)
-def get_dados_folha(ano, mes):
-    """Busca os dados completos apenas do período selecionado"""
-    conn = database.conectar()
-    query = """
-    SELECT * 
-    FROM public.ebisa_tab_folha 
-    WHERE ano = %s AND mes = %s
-    """
-    try:
-        # O pandas lida bem com a parametrização do psycopg2
-        df = pd.read_sql(query, conn, params=(int(ano), int(mes)))
-        return df
-    finally:
-        database.desconectar(conn)
+    return agg.CACHE_FOLHA.obter(("periodos", None, None, None), listar_periodos_folha)
+
+def get_centros_custo(ano, mes):
+    return obter_cubo_folha(ano, mes).centros_custo()
+
+def get_resumo_mes(ano, mes, centro_custo):
+    """KPIs e dados dos gráficos do painel mensal (séries já resumidas)"""
+    return {
+        "kpis": obter_cubo_folha(ano, mes).totais(None, centro_custo),
+        **payload_graficos(ano, mes, centro_custo),
+    }
+
+TAMANHO_PAGINA_DETALHE = 50
 
 # --- INTERFACE: SIDEBAR (FILTROS) ---
 st.sidebar.title("Filtros da Folha")
 
+# Carga da folha de um mês (substitui o mês inteiro; fica antes da checagem
+# de tabela vazia para permitir a primeira carga)
+with st.sidebar.expander("📥 Importar Folha do Mês"):
+    col_ano, col_mes = st.columns(2)
+    ano_carga = col_ano.number_input("Ano", min_value=2000, max_value=2100,
+                                     value=pd.Timestamp.today().year, step=1, key="folha_carga_ano")
+    mes_carga = col_mes.number_input("Mês", min_value=1, max_value=12,
+                                     value=pd.Timestamp.today().month, step=1, key="folha_carga_mes")
+    arquivo_folha = st.file_uploader("Arquivo da folha (XLSX, XLS, CSV)",
+                                     type=["xlsx", "xls", "csv"], key="folha_carga_arquivo")
+
+    if st.button("📥 Importar folha", type="primary", disabled=arquivo_folha is None):
+        with st.spinner("Importando folha..."):
+            resultado = importar_folha(arquivo_folha, int(ano_carga), int(mes_carga))
+
+        if resultado["success"]:
+            st.success(resultado["message"])
+        else:
+            st.error(resultado["message"])
+        rejeitadas = resultado.get("rejeitadas")
+        if rejeitadas is not None and not rejeitadas.empty:
+            st.warning("⚠️ Linhas rejeitadas:")
+            st.dataframe(rejeitadas[["linha", "motivo"]], hide_index=True)
+
 # 1. Carrega datas disponíveis
 df_datas = get_periodos_disponiveis()
 
@@ -59,56 +87,49 @@ mes_sel = st.sidebar.selectbox("Mês", lista_meses)
 
 # 3. Botão de Atualizar (Opcional, mas bom para UX)
 if st.sidebar.button("Atualizar Dados"):
-    st.cache_data.clear()
-
-# --- CARREGAMENTO DOS DADOS PRINCIPAIS ---
-df = get_dados_folha(ano_sel, mes_sel)
+    # Reflete no resumo mensal os meses alterados desde o último refresh;
+    # só as entradas de cache desses meses são descartadas
+    st.sidebar.caption(atualizar_resumo_folha()["message"])
 
-# Filtro Adicional de Centro de Custo (Feito no Pandas para ser rápido)
-centros_custo = ["Todos"] + list(df['nome_centro_custo_rh'].unique())
+# Filtro Adicional de Centro de Custo (aplicado nas consultas agregadas)
+centros_custo = ["Todos"] + get_centros_custo(int(ano_sel), int(mes_sel))
 cc_sel = st.sidebar.selectbox("Centro de Custo / Depto", centros_custo)
 
-if cc_sel != "Todos":
-    df = df[df['nome_centro_custo_rh'] == cc_sel]
+# --- CARREGAMENTO DOS DADOS PRINCIPAIS ---
+resumo = get_resumo_mes(int(ano_sel), int(mes_sel), cc_sel)
+kpis = resumo["kpis"]
 
 # --- DASHBOARD PRINCIPAL ---
 
 st.title(f"📊 Dashboard de Folha - {mes_sel}/{ano_sel}")
 st.markdown("---")
 
-if df.empty:
+if kpis["headcount"] == 0:
     st.warning("Nenhum dado encontrado para os filtros selecionados.")
 else:
     # --- 1. KPIs (INDICADORES) ---
     col1, col2, col3, col4 = st.columns(4)
-    
-    total_bruto = df['proventos_total'].sum()
-    total_liquido = df['liquido'].sum()
-    total_fgts = df['valor_fgts'].sum()
-    headcount = df['cod_funcionario'].nunique()
-    
-    col1.metric("💰 Custo Total (Bruto)", f"R$ {total_bruto:,.2f}")
-    col2.metric("💸 Total Líquido", f"R$ {total_liquido:,.2f}")
-    col3.metric("🏦 Total FGTS", f"R$ {total_fgts:,.2f}")
-    col4.metric("👥 Funcionários (Headcount)", headcount)
+
+    col1.metric("💰 Custo Total (Bruto)", f"R$ {kpis['proventos_total']:,.2f}")
+    col2.metric("💸 Total Líquido", f"R$ {kpis['liquido']:,.2f}")
+    col3.metric("🏦 Total FGTS", f"R$ {kpis['valor_fgts']:,.2f}")
+    col4.metric("👥 Funcionários (Headcount)", kpis["headcount"])
 
     st.markdown("---")
 
     # --- 2. GRÁFICOS ---
-    
+
     # Linha superior de gráficos
     c1, c2 = st.columns(2)
-    
+
     with c1:
         st.subheader("Top 10 Centros de Custo (Valor Bruto)")
-        # Agrupamento
-        df_cc = df.groupby('nome_centro_custo_rh')[['proventos_total']].sum().reset_index()
-        df_cc = df_cc.sort_values(by='proventos_total', ascending=True).tail(10) # Top 10
-        
+        df_cc = resumo["top_cc"]
+
         fig_bar = px.bar(
-            df_cc, 
-            x='proventos_total', 
-            y='nome_centro_custo_rh', 
+            df_cc,
+            x='proventos_total',
+            y='nome_centro_custo_rh',
             orientation='h',
             text_auto='.2s',
             color='proventos_total',
@@ -119,13 +140,12 @@ else:
 
     with c2:
         st.subheader("Distribuição por Vínculo")
-        df_vinculo = df['vinculo'].value_counts().reset_index()
-        df_vinculo.columns = ['vinculo', 'count']
-        
+        df_vinculo = resumo["vinculo"]
+
         fig_pie = px.pie(
-            df_vinculo, 
-            values='count', 
-            names='vinculo', 
+            df_vinculo,
+            values='count',
+            names='vinculo',
             hole=0.4,
             color_discrete_sequence=px.colors.qualitative.Pastel
         )
@@ -136,35 +156,70 @@ else:
 
     with c3:
         st.subheader("Faixa Salarial (Histograma)")
-        fig_hist = px.histogram(
-            df, 
-            x="salario", 
-            nbins=20, 
+        # assign: o DataFrame do cache é compartilhado entre sessões
+        df_faixas = resumo["faixas"].assign(
+            meio=lambda d: (d["inicio"] + d["fim"]) / 2)
+        fig_hist = px.bar(
+            df_faixas,
+            x="meio",
+            y="qtd",
             title="Distribuição dos Salários Base",
             color_discrete_sequence=['#3366CC']
         )
-        fig_hist.update_layout(xaxis_title="Salário Base", yaxis_title="Qtd Funcionários")
+        if not df_faixas.empty:
+            fig_hist.update_traces(width=float((df_faixas["fim"] - df_faixas["inicio"]).iloc[0]))
+        fig_hist.update_layout(xaxis_title="Salário Base", yaxis_title="Qtd Funcionários", bargap=0)
         st.plotly_chart(fig_hist, use_container_width=True)
 
     with c4:
         st.subheader("Maiores Salários Líquidos")
         # Tabela simples dos top 5
-        top_liquidos = df[['nome_funcionario', 'nome_cargo', 'liquido']].sort_values(by='liquido', ascending=False).head(5)
+        top_liquidos = resumo["top_liquidos"]
         st.dataframe(
-            top_liquidos.style.format({"liquido": "R$ {:,.2f}"}), 
+            top_liquidos.style.format({"liquido": "R$ {:,.2f}"}),
             use_container_width=True,
             hide_index=True
         )
 
     # --- 3. TABELA DETALHADA (EXPANDER) ---
     with st.expander("📂 Ver Dados Detalhados da Folha"):
-        colunas_visiveis = [
-            'cod_funcionario', 'nome_funcionario', 'nome_cargo', 
-            'departamento', 'salario', 'proventos_total', 
-            'descontos_total', 'liquido'
-        ]
-        st.dataframe(
-            df[colunas_visiveis],
-            use_container_width=True,
-            hide_index=True
-        )
\ No newline at end of file
+        # As linhas só são buscadas quando o usuário pede, uma página por vez
+        # (busca, ordenação e paginação por chave no banco)
+        if st.toggle("Carregar linhas da folha", key="folha_carregar_detalhe"):
+            colunas_visiveis = [
+                'cod_funcionario', 'nome_funcionario', 'nome_cargo',
+                'departamento', 'salario', 'proventos_total',
+                'descontos_total', 'liquido'
+            ]
+            d1, d2, d3 = st.columns([3, 2, 1])
+            busca = d1.text_input("Buscar (nome, cargo, departamento ou código)", key="folha_detalhe_busca")
+            ordenar_por = d2.selectbox("Ordenar por", colunas_visiveis, index=1, key="folha_detalhe_ordem")
+            decrescente = d3.checkbox("Decrescente", key="folha_detalhe_desc")
+
+            # Mudou filtro/busca/ordem: volta para a primeira página
+            consulta = (int(ano_sel), int(mes_sel), cc_sel, busca, ordenar_por, decrescente)
+            if st.session_state.get("folha_detalhe_consulta") != consulta:
+                st.session_state["folha_detalhe_consulta"] = consulta
+                st.session_state["folha_detalhe_cursores"] = [None]
+            cursores = st.session_state["folha_detalhe_cursores"]
+
+            pagina = pagina_folha(
+                int(ano_sel), int(mes_sel), cc_sel, busca, ordenar_por, decrescente,
+                apos=cursores[-1], tamanho=TAMANHO_PAGINA_DETALHE, colunas=colunas_visiveis
+            )
+            total = contar_folha(int(ano_sel), int(mes_sel), cc_sel, busca)
+
+            st.dataframe(
+                pagina["linhas"],
+                use_container_width=True,
+                hide_index=True
+            )
+
+            n1, n2, n3 = st.columns([1, 4, 1])
+            n1.button("◀ Anterior", disabled=len(cursores) == 1,
+                      on_click=cursores.pop, key="folha_detalhe_anterior")
+            n2.caption(f"Página {len(cursores)} de {max(1, -(-total // TAMANHO_PAGINA_DETALHE))} "
+                       f"({total} linha(s))")
+            n3.button("Próxima ▶", disabled=pagina["proximo"] is None,
+                      on_click=cursores.append, args=(pagina["proximo"],),
+                      key="folha_detalhe_proxima")
@@ -1,51 +1,44 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import database  # Seu módulo de conexão
+from utils.folha_db import listar_anos_folha
+from utils import folha_agregacao as agg
+from utils import folha_tendencia as ft
+from utils.notificacoes import iniciar_listener
 
 # Configuração da Página
 st.set_page_config(page_title="Dashboard Anual RH", layout="wide")
 
+# Invalidação do cache por notificações do banco (uma thread por processo)
+iniciar_listener()
+
 # --- FUNÇÕES DE CARREGAMENTO ---
+# O ano inteiro chega agregado por mês do resumo (ebisa_tab_folha_resumo,
+# até 12 linhas; níveis 0/1/2 = total, centro de custo, cargo/vínculo); o
+# filtro de Centro de Custo é aplicado na própria consulta e nenhuma linha
+# bruta da folha é carregada. Mesmo cache da página mensal
+# (agg.CACHE_FOLHA): chaves com mes=None valem para o ano inteiro e são
+# invalidadas quando qualquer mês do ano é recalculado.
 
-@st.cache_data(ttl=600)
 def get_anos_disponiveis():
     """Busca apenas os anos distintos para o filtro inicial"""
-    conn = database.conectar()
-    query = "SELECT DISTINCT ano FROM public.ebisa_tab_folha ORDER BY ano DESC"
-    try:
-        df = pd.read_sql(query, conn)
-        return df['ano'].tolist()
-    finally:
-        database.desconectar(conn)
-
-@st.cache_data(ttl=600)
-def get_dados_anuais(ano):
-    """
-    Busca TODOS os dados do ano selecionado.
-    Trazemos o ano todo para permitir filtros rápidos de Centro de Custo via Pandas
-    sem recarregar o banco a cada clique.
-    """
-    conn = database.conectar()
-    query = """
-    SELECT 
-        mes, 
-        nome_centro_custo_rh, 
-        cod_funcionario, 
-        nome_cargo,
-        proventos_total, 
-        liquido, 
-        valor_fgts,
-        descontos_total
-    FROM public.ebisa_tab_folha 
-    WHERE ano = %s
-    ORDER BY mes ASC
-    """
-    try:
-        df = pd.read_sql(query, conn, params=(int(ano),))
-        return df
-    finally:
-        database.desconectar(conn)
+    return agg.CACHE_FOLHA.obter(("anos", None, None, None), listar_anos_folha)
+
+def get_centros_custo(ano):
+    return agg.CACHE_FOLHA.obter(
+        ("centros_custo", ano, None, None),
+        lambda: agg.listar_centros_custo(ano)
+    )
+
+def get_resumo_anual(ano, centro_custo):
+    """Evolução mensal e top 5 cargos do ano"""
+    return agg.CACHE_FOLHA.obter(
+        ("resumo_anual", ano, None, centro_custo),
+        lambda: {
+            "evolucao": agg.evolucao_mensal(ano, centro_custo),
+            "top_cargos": agg.top_cargos(ano, None, centro_custo, limite=5),
+        }
+    )
 
 # --- SIDEBAR: FILTROS ---
 st.sidebar.title("📊 Filtros Gerenciais")
@@ -58,19 +51,20 @@ if not anos:
 
 ano_sel = st.sidebar.selectbox("Selecione o Ano", anos)
 
-# 2. Carrega dados do Ano
-df_ano = get_dados_anuais(ano_sel)
-
-# 3. Seleção de Centro de Custo
-lista_cc = ["Todos"] + sorted(df_ano['nome_centro_custo_rh'].unique().tolist())
+# 2. Seleção de Centro de Custo
+lista_cc = ["Todos"] + get_centros_custo(int(ano_sel))
 cc_sel = st.sidebar.selectbox("Centro de Custo", lista_cc)
 
-# --- FILTRAGEM DOS DADOS ---
+# 3. Anos da tendência plurianual (carregados de forma incremental)
+anos_tendencia = st.sidebar.multiselect("Anos (tendência plurianual)", anos, default=anos[:5])
+
+# 4. Carrega agregados do Ano
+resumo = get_resumo_anual(int(ano_sel), cc_sel)
+df_evolucao = resumo["evolucao"]
+
 if cc_sel != "Todos":
-    df_filtrado = df_ano[df_ano['nome_centro_custo_rh'] == cc_sel]
     titulo_dash = f"Análise Anual Ebisa: {cc_sel} ({ano_sel})"
 else:
-    df_filtrado = df_ano
     titulo_dash = f"Análise Anual Ebisa: Visão Geral da Empresa ({ano_sel})"
 
 # --- DASHBOARD ---
@@ -78,18 +72,17 @@ else:
 st.title(titulo_dash)
 st.markdown("---")
 
-if df_filtrado.empty:
+if df_evolucao.empty:
     st.warning("Sem dados para esta seleção.")
 else:
     # --- 1. KPIs ACUMULADOS ---
-    # Cálculos
-    total_bruto_anual = df_filtrado['proventos_total'].sum()
-    total_liquido_anual = df_filtrado['liquido'].sum()
-    total_fgts_anual = df_filtrado['valor_fgts'].sum()
+    # Cálculos (sobre as até 12 linhas mensais lidas do resumo)
+    total_bruto_anual = df_evolucao['proventos_total'].sum()
+    total_liquido_anual = df_evolucao['liquido'].sum()
+    total_fgts_anual = df_evolucao['valor_fgts'].sum()
     
     # Para headcount anual, a soma não faz sentido. Usamos a MÉDIA MENSAL de funcionários.
-    headcount_por_mes = df_filtrado.groupby('mes')['cod_funcionario'].nunique()
-    media_headcount = int(headcount_por_mes.mean())
+    media_headcount = int(df_evolucao['qtd_funcionarios'].mean())
     
     # Layout dos KPIs
     k1, k2, k3, k4 = st.columns(4)
@@ -103,9 +96,6 @@ else:
     # --- 2. EVOLUÇÃO MENSAL (GRÁFICOS DE LINHA/ÁREA) ---
     st.subheader(f"📈 Evolução Financeira Mensal - {ano_sel}")
     
-    # Agrupando por mês
-    df_evolucao = df_filtrado.groupby('mes')[['proventos_total', 'liquido', 'valor_fgts']].sum().reset_index()
-    
     # Gráfico de Área (Bruto vs Líquido)
     fig_evolucao = px.area(
         df_evolucao, 
@@ -123,8 +113,7 @@ else:
     with c1:
         st.subheader("👥 Evolução do Headcount (Funcionários)")
         # Gráfico de Linha para Headcount
-        df_hc = df_filtrado.groupby('mes')['cod_funcionario'].nunique().reset_index()
-        df_hc.columns = ['mes', 'qtd_funcionarios']
+        df_hc = df_evolucao[['mes', 'qtd_funcionarios']]
         
         fig_hc = px.line(
             df_hc, 
@@ -140,8 +129,7 @@ else:
     with c2:
         st.subheader("💼 Top 5 Cargos (Custo Anual)")
         # Quais cargos custaram mais no ano acumulado?
-        df_cargos = df_filtrado.groupby('nome_cargo')['proventos_total'].sum().reset_index()
-        df_cargos = df_cargos.sort_values(by='proventos_total', ascending=True).tail(5)
+        df_cargos = resumo["top_cargos"]
         
         fig_cargos = px.bar(
             df_cargos,
@@ -159,12 +147,7 @@ else:
     st.subheader("📅 Resumo Mensal (Tabela)")
     
     # Criando uma tabela pivotada para fácil leitura
-    pivot_table = df_filtrado.groupby('mes').agg({
-        'proventos_total': 'sum',
-        'liquido': 'sum',
-        'valor_fgts': 'sum',
-        'cod_funcionario': 'nunique'
-    }).reset_index()
+    pivot_table = df_evolucao[['mes', 'proventos_total', 'liquido', 'valor_fgts', 'qtd_funcionarios']].copy()
     
     pivot_table.columns = ['Mês', 'Total Bruto', 'Total Líquido', 'Total FGTS', 'Qtd Funcionários']
     
@@ -177,4 +160,77 @@ else:
         }),
         use_container_width=True,
         hide_index=True
-    )
\ No newline at end of file
+    )
+
+# --- 5. TENDÊNCIA PLURIANUAL ---
+st.markdown("---")
+st.subheader("📈 Tendência Plurianual")
+
+if not anos_tendencia:
+    st.info("Selecione ao menos um ano na barra lateral para ver a tendência.")
+else:
+    anos_exibidos = sorted(int(a) for a in anos_tendencia)
+    # O ano anterior ao primeiro selecionado entra só como base das variações e janelas de 12 meses
+    anos_carga = anos_exibidos + ([anos_exibidos[0] - 1] if anos_exibidos[0] - 1 in anos else [])
+    serie = ft.carregar_serie_anos(anos_carga, cc_sel)
+
+    df_mensal = ft.indicadores_mensais(serie)
+    df_mensal = df_mensal[df_mensal["ano"].isin(anos_exibidos)]
+    df_anual = ft.resumo_anual_tendencia(serie)
+    df_anual = df_anual[df_anual["ano"].isin(anos_exibidos)]
+
+    if df_mensal["proventos_total"].notna().sum() == 0:
+        st.warning("Sem dados para os anos selecionados.")
+    else:
+        t1, t2 = st.columns(2)
+
+        with t1:
+            st.markdown("**💰 Custo Mensal x Acumulado 12 Meses**")
+            fig_custo = px.line(
+                df_mensal,
+                x='periodo',
+                y=['proventos_total', 'custo_12m'],
+                labels={'value': 'Valor (R$)', 'periodo': 'Mês', 'variable': 'Série'},
+                color_discrete_map={'proventos_total': '#1f77b4', 'custo_12m': '#d62728'}
+            )
+            st.plotly_chart(fig_custo, use_container_width=True)
+
+        with t2:
+            st.markdown("**👥 Headcount Mensal x Média 12 Meses**")
+            fig_hc_tend = px.line(
+                df_mensal,
+                x='periodo',
+                y=['qtd_funcionarios', 'headcount_12m'],
+                labels={'value': 'Funcionários', 'periodo': 'Mês', 'variable': 'Série'},
+                color_discrete_map={'qtd_funcionarios': '#ff7f0e', 'headcount_12m': '#2ca02c'}
+            )
+            st.plotly_chart(fig_hc_tend, use_container_width=True)
+
+        st.markdown("**📊 Variação do Custo sobre o Mesmo Mês do Ano Anterior**")
+        fig_yoy = px.bar(
+            df_mensal.dropna(subset=['var_custo_aa']),
+            x='periodo',
+            y='var_custo_aa',
+            labels={'var_custo_aa': 'Variação', 'periodo': 'Mês'},
+            color_discrete_sequence=['#1f4e78']
+        )
+        fig_yoy.update_layout(yaxis_tickformat='.1%')
+        st.plotly_chart(fig_yoy, use_container_width=True)
+
+        tabela_anual = df_anual.copy()
+        tabela_anual.columns = ['Ano', 'Meses', 'Total Bruto', 'Total Líquido', 'Total FGTS',
+                                'Headcount Médio', 'Var. Bruto a.a.', 'Var. Headcount a.a.']
+        st.dataframe(
+            tabela_anual.style.format({
+                'Total Bruto': 'R$ {:,.2f}',
+                'Total Líquido': 'R$ {:,.2f}',
+                'Total FGTS': 'R$ {:,.2f}',
+                'Headcount Médio': '{:.0f}',
+                'Var. Bruto a.a.': '{:+.1%}',
+                'Var. Headcount a.a.': '{:+.1%}'
+            }, na_rep='-'),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Variações anuais comparam apenas os meses presentes nos dois anos; "
+                   "janelas de 12 meses ficam vazias quando falta algum mês.")
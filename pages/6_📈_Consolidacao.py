@@ -0,0 +1,101 @@
+import streamlit as st
+from utils.auth import require_authentication, get_current_user
+from utils.consolidacao import listar_grupos, consolidar_grupo, invalidar_consolidacao
+from utils.notificacoes import iniciar_listener
+
+# Configuração da página
+st.set_page_config(
+    page_title="Consolidação - Audit Ebisa",
+    page_icon="📈",
+    layout="wide"
+)
+
+# Invalidação do cache por notificações do banco (uma thread por processo)
+iniciar_listener()
+
+# Verificar autenticação
+require_authentication()
+
+# Obter usuário atual
+user = get_current_user()
+
+# Header
+st.title("📈 Consolidação de Grupos")
+st.markdown(f"**Usuário:** {user['nome']}")
+st.markdown("---")
+
+df_grupos = listar_grupos()
+
+if df_grupos.empty:
+    st.warning("⚠️ Nenhum grupo cadastrado (tabelas ebisa_cont_grupo / ebisa_cont_grupo_empresa).")
+    st.stop()
+
+# Filtros
+col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+
+with col1:
+    grupos = dict(zip(
+        df_grupos["nome"] + " (" + df_grupos["qtd_empresas"].astype(str) + " empresas)",
+        df_grupos["id"]
+    ))
+    grupo_label = st.selectbox("Grupo", list(grupos.keys()))
+
+with col2:
+    ano = st.selectbox("Ano", [2025, 2024, 2023, 2022])
+
+with col3:
+    mes = st.selectbox("Mês", list(range(1, 13)), format_func=lambda m: f"{m:02d}")
+
+with col4:
+    st.markdown("<div style='height: 1.8rem;'></div>", unsafe_allow_html=True)
+    if st.button("🔄 Recalcular", width="stretch"):
+        invalidar_consolidacao(grupos[grupo_label], ano, mes)
+
+st.markdown("---")
+
+with st.spinner("Consolidando balancetes..."):
+    resultado = consolidar_grupo(grupos[grupo_label], ano, mes)
+
+if not resultado["success"]:
+    st.warning(resultado["message"])
+    st.stop()
+
+st.success(resultado["message"])
+
+if resultado["empresas_sem_balancete"]:
+    st.warning(
+        "⚠️ Empresas sem balancete no período: "
+        + ", ".join(resultado["empresas_sem_balancete"]))
+
+df = resultado["consolidado"]
+
+col1, col2 = st.columns([2, 3])
+with col1:
+    somente_consolidado = st.checkbox("Exibir apenas totais (ocultar empresas)", value=True)
+with col2:
+    filtro_conta = st.text_input("Filtrar conta (prefixo)", placeholder="Ex: 1.1")
+
+if filtro_conta:
+    df = df[df["cod_conta"].str.startswith(filtro_conta.strip())]
+
+if somente_consolidado:
+    df = df[["cod_conta", "nome_conta", "total", "eliminacao", "consolidado"]]
+
+st.dataframe(
+    df,
+    width="stretch",
+    hide_index=True,
+    column_config={
+        "cod_conta": st.column_config.TextColumn("Conta"),
+        "nome_conta": st.column_config.TextColumn("Descrição"),
+        "total": st.column_config.NumberColumn("Soma das empresas", format="%.2f"),
+        "eliminacao": st.column_config.NumberColumn("Eliminações", format="%.2f"),
+        "consolidado": st.column_config.NumberColumn("Consolidado", format="%.2f"),
+    }
+)
+
+st.markdown("### ✂️ Eliminações intercompany")
+if resultado["eliminacoes"].empty:
+    st.info("ℹ️ Nenhuma regra de eliminação configurada para o grupo.")
+else:
+    st.dataframe(resultado["eliminacoes"], width="stretch", hide_index=True)
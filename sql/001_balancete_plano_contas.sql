@@ -0,0 +1,10 @@
+-- Plano de contas vigente usado na importação do balancete
+-- (preenchido por utils.balancete_db.inserir_balancete via vigencia_resolver)
+ALTER TABLE public.ebisa_cont_balancete
+    ADD COLUMN IF NOT EXISTS plano_contas_id INTEGER NULL
+    REFERENCES public.ebisa_cont_plano_contas (id);
+
+-- Consulta única do vigencia_resolver (empresa + ano -> vigência ativa)
+CREATE INDEX IF NOT EXISTS idx_plano_contas_vigencia_empresa_ano_ativo
+    ON public.ebisa_cont_plano_contas_vigencia (empresa_id, ano_vigencia)
+    WHERE fl_ativo = TRUE;
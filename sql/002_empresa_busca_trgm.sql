@@ -0,0 +1,23 @@
+-- Busca de empresas com índices trigram (utils.empresa_db.buscar_empresas)
+-- LIKE '%termo%' e o operador de similaridade (%) usam o índice GIN.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() não é IMMUTABLE; o wrapper permite usá-lo em índice de expressão
+CREATE OR REPLACE FUNCTION public.f_unaccent_lower(texto TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$;
+
+CREATE OR REPLACE FUNCTION public.f_somente_digitos(texto TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT regexp_replace(texto, '\D', '', 'g') $$;
+
+CREATE INDEX IF NOT EXISTS idx_empresa_sienge_nome_trgm
+    ON public.ebisa_empresa_sienge
+    USING gin (public.f_unaccent_lower(nome_empresa) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_empresa_sienge_cnpj_trgm
+    ON public.ebisa_empresa_sienge
+    USING gin (public.f_somente_digitos(cnpj_empresa) gin_trgm_ops);
@@ -0,0 +1,7 @@
+-- CNPJ único em ebisa_empresa_sienge, independente da máscara gravada
+-- (alvo do ON CONFLICT de utils.empresa_importacao.importar_empresas_lote).
+-- Requer public.f_somente_digitos (sql/002). Antes de criar, conferir duplicidades:
+--   SELECT public.f_somente_digitos(cnpj_empresa), count(*)
+--   FROM public.ebisa_empresa_sienge GROUP BY 1 HAVING count(*) > 1;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_empresa_sienge_cnpj_digitos
+    ON public.ebisa_empresa_sienge (public.f_somente_digitos(cnpj_empresa));
@@ -0,0 +1,37 @@
+-- Grupos econômicos para consolidação de balancetes (utils.consolidacao)
+CREATE TABLE IF NOT EXISTS public.ebisa_cont_grupo (
+    id              SERIAL PRIMARY KEY,
+    nome            TEXT NOT NULL UNIQUE,
+    descricao       TEXT NULL,
+    empresa_controladora_id INTEGER NULL
+        REFERENCES public.ebisa_empresa_sienge (cod_empresa),
+    fl_ativo        BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+-- Empresas (controladora e controladas) que compõem cada grupo
+CREATE TABLE IF NOT EXISTS public.ebisa_cont_grupo_empresa (
+    grupo_id        INTEGER NOT NULL REFERENCES public.ebisa_cont_grupo (id) ON DELETE CASCADE,
+    empresa_id      INTEGER NOT NULL REFERENCES public.ebisa_empresa_sienge (cod_empresa),
+    PRIMARY KEY (grupo_id, empresa_id)
+);
+
+-- Regras de eliminação intercompany: as contas (prefixos de cod_conta) de
+-- 'contas' e 'contrapartidas' são eliminadas na consolidação e a diferença
+-- entre os dois lados é apresentada para conferência.
+CREATE TABLE IF NOT EXISTS public.ebisa_cont_grupo_regra_eliminacao (
+    id              SERIAL PRIMARY KEY,
+    grupo_id        INTEGER NULL REFERENCES public.ebisa_cont_grupo (id) ON DELETE CASCADE,
+    descricao       TEXT NOT NULL,
+    contas          TEXT[] NOT NULL,
+    contrapartidas  TEXT[] NOT NULL DEFAULT '{}',
+    fl_ativo        BOOLEAN NOT NULL DEFAULT TRUE
+);
+COMMENT ON COLUMN public.ebisa_cont_grupo_regra_eliminacao.grupo_id
+    IS 'NULL = regra aplicada a todos os grupos';
+
+-- Carga dos balancetes do grupo em uma única consulta (empresa = ANY, ano, mes)
+CREATE INDEX IF NOT EXISTS idx_cont_balancete_ano_mes_empresa
+    ON public.ebisa_cont_balancete (ano, mes, empresa_id);
+
+CREATE INDEX IF NOT EXISTS idx_cont_balancete_itens_balancete
+    ON public.ebisa_cont_balancete_itens (balancete_id);
@@ -0,0 +1,98 @@
+-- Resumo mensal da folha (utils.folha_resumo / utils.folha_agregacao)
+--
+-- Uma linha por (ano, mes, nível, centro de custo, cargo, vínculo):
+--   nivel 0 = mês inteiro            (centro de custo / cargo / vínculo NULL)
+--   nivel 1 = mês x centro de custo  (cargo / vínculo NULL)
+--   nivel 2 = mês x centro de custo x cargo x vínculo
+-- O headcount (funcionários distintos) é exato em cada nível; não somar
+-- headcount entre linhas de um nível mais detalhado.
+CREATE TABLE IF NOT EXISTS public.ebisa_tab_folha_resumo (
+    ano                  INTEGER  NOT NULL,
+    mes                  INTEGER  NOT NULL,
+    nivel                SMALLINT NOT NULL,
+    nome_centro_custo_rh TEXT     NULL,
+    nome_cargo           TEXT     NULL,
+    vinculo              TEXT     NULL,
+    qtd_linhas           INTEGER  NOT NULL,
+    headcount            INTEGER  NOT NULL,
+    salario              NUMERIC  NOT NULL DEFAULT 0,
+    proventos_total      NUMERIC  NOT NULL DEFAULT 0,
+    descontos_total      NUMERIC  NOT NULL DEFAULT 0,
+    liquido              NUMERIC  NOT NULL DEFAULT 0,
+    valor_fgts           NUMERIC  NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_tab_folha_resumo_periodo
+    ON public.ebisa_tab_folha_resumo (ano, nivel, mes);
+
+-- Meses cuja folha mudou desde o último refresh
+CREATE TABLE IF NOT EXISTS public.ebisa_tab_folha_meses_alterados (
+    ano          INTEGER NOT NULL,
+    mes          INTEGER NOT NULL,
+    alterado_em  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (ano, mes)
+);
+
+-- Consultas por período na tabela bruta (refresh e detalhamento)
+CREATE INDEX IF NOT EXISTS idx_tab_folha_ano_mes
+    ON public.ebisa_tab_folha (ano, mes);
+
+-- Marca os meses alterados (triggers por comando, com tabelas de transição)
+CREATE OR REPLACE FUNCTION public.f_folha_marcar_meses_alterados()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.ebisa_tab_folha_meses_alterados (ano, mes)
+        SELECT DISTINCT ano, mes FROM novas
+        ON CONFLICT (ano, mes) DO UPDATE SET alterado_em = now();
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO public.ebisa_tab_folha_meses_alterados (ano, mes)
+        SELECT DISTINCT ano, mes FROM antigas
+        ON CONFLICT (ano, mes) DO UPDATE SET alterado_em = now();
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_folha_meses_alterados_ins ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_meses_alterados_ins
+    AFTER INSERT ON public.ebisa_tab_folha
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_folha_marcar_meses_alterados();
+
+DROP TRIGGER IF EXISTS trg_folha_meses_alterados_upd ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_meses_alterados_upd
+    AFTER UPDATE ON public.ebisa_tab_folha
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_folha_marcar_meses_alterados();
+
+DROP TRIGGER IF EXISTS trg_folha_meses_alterados_del ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_meses_alterados_del
+    AFTER DELETE ON public.ebisa_tab_folha
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_folha_marcar_meses_alterados();
+
+-- TRUNCATE da folha: o resumo inteiro deixa de valer
+CREATE OR REPLACE FUNCTION public.f_folha_resumo_truncate()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    TRUNCATE public.ebisa_tab_folha_resumo;
+    DELETE FROM public.ebisa_tab_folha_meses_alterados;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_folha_resumo_truncate ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_resumo_truncate
+    AFTER TRUNCATE ON public.ebisa_tab_folha
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_folha_resumo_truncate();
+
+-- Carga inicial: todos os meses existentes entram na fila do primeiro refresh
+INSERT INTO public.ebisa_tab_folha_meses_alterados (ano, mes)
+SELECT DISTINCT ano, mes FROM public.ebisa_tab_folha
+ON CONFLICT (ano, mes) DO NOTHING;
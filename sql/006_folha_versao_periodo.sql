@@ -0,0 +1,64 @@
+-- Versão de cada (ano, mes) da folha: incrementada a cada alteração.
+-- Carimbo usado para validar os extratos em disco (utils.folha_extrato).
+CREATE TABLE IF NOT EXISTS public.ebisa_tab_folha_versao (
+    ano          INTEGER NOT NULL,
+    mes          INTEGER NOT NULL,
+    versao       BIGINT  NOT NULL DEFAULT 1,
+    alterado_em  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (ano, mes)
+);
+
+-- Substitui a função de sql/005: além de enfileirar o mês para o resumo,
+-- incrementa a versão do período.
+CREATE OR REPLACE FUNCTION public.f_folha_marcar_meses_alterados()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    meses INTEGER[][];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT ARRAY[ano, mes]) INTO meses FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT ARRAY[ano, mes]) INTO meses FROM antigas;
+    ELSE
+        SELECT array_agg(DISTINCT ARRAY[ano, mes]) INTO meses
+        FROM (SELECT ano, mes FROM novas UNION SELECT ano, mes FROM antigas) t;
+    END IF;
+
+    IF meses IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO public.ebisa_tab_folha_meses_alterados (ano, mes)
+    SELECT meses[i][1], meses[i][2] FROM generate_subscripts(meses, 1) AS i
+    ON CONFLICT (ano, mes) DO UPDATE SET alterado_em = now();
+
+    INSERT INTO public.ebisa_tab_folha_versao (ano, mes)
+    SELECT meses[i][1], meses[i][2] FROM generate_subscripts(meses, 1) AS i
+    ON CONFLICT (ano, mes) DO UPDATE
+        SET versao = public.ebisa_tab_folha_versao.versao + 1,
+            alterado_em = now();
+
+    RETURN NULL;
+END
+$$;
+
+-- TRUNCATE: todos os períodos mudam de versão
+CREATE OR REPLACE FUNCTION public.f_folha_resumo_truncate()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    TRUNCATE public.ebisa_tab_folha_resumo;
+    DELETE FROM public.ebisa_tab_folha_meses_alterados;
+    UPDATE public.ebisa_tab_folha_versao
+       SET versao = versao + 1, alterado_em = now();
+    RETURN NULL;
+END
+$$;
+
+-- Carga inicial das versões
+INSERT INTO public.ebisa_tab_folha_versao (ano, mes)
+SELECT DISTINCT ano, mes FROM public.ebisa_tab_folha
+ON CONFLICT (ano, mes) DO NOTHING;
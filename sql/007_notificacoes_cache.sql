@@ -0,0 +1,191 @@
+-- Notificações de alteração para o cache da aplicação (utils.notificacoes)
+--
+-- Canal: ebisa_cache. Payload JSON:
+--   {"origem": "folha",      "ano": 2025, "mes": 3}
+--   {"origem": "balancete",  "ano": 2025, "mes": 3}
+--   {"origem": "dfc"}                      (sem período: a view agrega tudo)
+-- O NOTIFY só é entregue no COMMIT, portanto o listener nunca invalida o
+-- cache antes de os dados estarem visíveis. Notificações iguais na mesma
+-- transação são entregues uma única vez.
+
+-- Tabelas com colunas ano/mes (folha e cabeçalho do balancete).
+-- TG_ARGV[0] = origem
+CREATE OR REPLACE FUNCTION public.f_notificar_cache_periodos()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        FOR r IN SELECT DISTINCT ano, mes FROM novas LOOP
+            PERFORM pg_notify('ebisa_cache', json_build_object(
+                'origem', TG_ARGV[0], 'ano', r.ano, 'mes', r.mes)::text);
+        END LOOP;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        FOR r IN SELECT DISTINCT ano, mes FROM antigas LOOP
+            PERFORM pg_notify('ebisa_cache', json_build_object(
+                'origem', TG_ARGV[0], 'ano', r.ano, 'mes', r.mes)::text);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Itens do balancete: o período vem do cabeçalho
+CREATE OR REPLACE FUNCTION public.f_notificar_cache_balancete_itens()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    ids BIGINT[];
+    r RECORD;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT balancete_id) INTO ids FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT balancete_id) INTO ids FROM antigas;
+    ELSE
+        SELECT array_agg(DISTINCT balancete_id) INTO ids
+        FROM (SELECT balancete_id FROM novas UNION SELECT balancete_id FROM antigas) t;
+    END IF;
+
+    -- Itens apagados em cascata com o cabeçalho já não encontram o balancete;
+    -- nesse caso o trigger do cabeçalho é quem notifica
+    FOR r IN
+        SELECT DISTINCT b.ano, b.mes
+        FROM public.ebisa_cont_balancete b
+        WHERE b.id = ANY (ids)
+    LOOP
+        PERFORM pg_notify('ebisa_cache', json_build_object(
+            'origem', 'balancete', 'ano', r.ano, 'mes', r.mes)::text);
+    END LOOP;
+    RETURN NULL;
+END
+$$;
+
+-- Alteração sem período (TRUNCATE, tabelas de origem do DFC).
+-- TG_ARGV[0] = origem
+CREATE OR REPLACE FUNCTION public.f_notificar_cache_origem()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM pg_notify('ebisa_cache', json_build_object('origem', TG_ARGV[0])::text);
+    RETURN NULL;
+END
+$$;
+
+-- ---------------------------------------------------------------------
+-- Folha
+-- ---------------------------------------------------------------------
+DROP TRIGGER IF EXISTS trg_folha_notificar_ins ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_notificar_ins
+    AFTER INSERT ON public.ebisa_tab_folha
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_periodos('folha');
+
+DROP TRIGGER IF EXISTS trg_folha_notificar_upd ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_notificar_upd
+    AFTER UPDATE ON public.ebisa_tab_folha
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_periodos('folha');
+
+DROP TRIGGER IF EXISTS trg_folha_notificar_del ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_notificar_del
+    AFTER DELETE ON public.ebisa_tab_folha
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_periodos('folha');
+
+DROP TRIGGER IF EXISTS trg_folha_notificar_truncate ON public.ebisa_tab_folha;
+CREATE TRIGGER trg_folha_notificar_truncate
+    AFTER TRUNCATE ON public.ebisa_tab_folha
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_origem('folha');
+
+-- ---------------------------------------------------------------------
+-- Balancete (cabeçalho e itens)
+-- ---------------------------------------------------------------------
+DROP TRIGGER IF EXISTS trg_balancete_notificar_ins ON public.ebisa_cont_balancete;
+CREATE TRIGGER trg_balancete_notificar_ins
+    AFTER INSERT ON public.ebisa_cont_balancete
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_periodos('balancete');
+
+DROP TRIGGER IF EXISTS trg_balancete_notificar_upd ON public.ebisa_cont_balancete;
+CREATE TRIGGER trg_balancete_notificar_upd
+    AFTER UPDATE ON public.ebisa_cont_balancete
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_periodos('balancete');
+
+DROP TRIGGER IF EXISTS trg_balancete_notificar_del ON public.ebisa_cont_balancete;
+CREATE TRIGGER trg_balancete_notificar_del
+    AFTER DELETE ON public.ebisa_cont_balancete
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_periodos('balancete');
+
+DROP TRIGGER IF EXISTS trg_balancete_itens_notificar_ins ON public.ebisa_cont_balancete_itens;
+CREATE TRIGGER trg_balancete_itens_notificar_ins
+    AFTER INSERT ON public.ebisa_cont_balancete_itens
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_balancete_itens();
+
+DROP TRIGGER IF EXISTS trg_balancete_itens_notificar_upd ON public.ebisa_cont_balancete_itens;
+CREATE TRIGGER trg_balancete_itens_notificar_upd
+    AFTER UPDATE ON public.ebisa_cont_balancete_itens
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_balancete_itens();
+
+DROP TRIGGER IF EXISTS trg_balancete_itens_notificar_del ON public.ebisa_cont_balancete_itens;
+CREATE TRIGGER trg_balancete_itens_notificar_del
+    AFTER DELETE ON public.ebisa_cont_balancete_itens
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_balancete_itens();
+
+-- Grupos e regras de eliminação mudam a consolidação de todos os períodos
+DROP TRIGGER IF EXISTS trg_grupo_empresa_notificar ON public.ebisa_cont_grupo_empresa;
+CREATE TRIGGER trg_grupo_empresa_notificar
+    AFTER INSERT OR UPDATE OR DELETE ON public.ebisa_cont_grupo_empresa
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_origem('balancete');
+
+DROP TRIGGER IF EXISTS trg_grupo_regra_notificar ON public.ebisa_cont_grupo_regra_eliminacao;
+CREATE TRIGGER trg_grupo_regra_notificar
+    AFTER INSERT OR UPDATE OR DELETE ON public.ebisa_cont_grupo_regra_eliminacao
+    FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_origem('balancete');
+
+-- ---------------------------------------------------------------------
+-- DFC: triggers em todas as tabelas base de vw_fin_dfc_mensal_ppr
+-- (inclusive as de views aninhadas). Reexecutar se a view mudar.
+-- ---------------------------------------------------------------------
+DO $$
+DECLARE
+    t RECORD;
+BEGIN
+    FOR t IN
+        WITH RECURSIVE dependencias (schema_nome, objeto) AS (
+            SELECT table_schema::text, table_name::text
+            FROM information_schema.view_table_usage
+            WHERE view_schema = 'public' AND view_name = 'vw_fin_dfc_mensal_ppr'
+            UNION
+            SELECT u.table_schema::text, u.table_name::text
+            FROM information_schema.view_table_usage u
+            JOIN dependencias d
+              ON u.view_schema = d.schema_nome AND u.view_name = d.objeto
+        )
+        SELECT DISTINCT d.schema_nome, d.objeto
+        FROM dependencias d
+        JOIN information_schema.tables it
+          ON it.table_schema = d.schema_nome
+         AND it.table_name = d.objeto
+         AND it.table_type = 'BASE TABLE'
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_dfc_notificar ON %I.%I', t.schema_nome, t.objeto);
+        EXECUTE format(
+            'CREATE TRIGGER trg_dfc_notificar
+                 AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I.%I
+                 FOR EACH STATEMENT EXECUTE FUNCTION public.f_notificar_cache_origem(''dfc'')',
+            t.schema_nome, t.objeto);
+        RAISE NOTICE 'Notificação DFC instalada em %.%', t.schema_nome, t.objeto;
+    END LOOP;
+END
+$$;
@@ -0,0 +1,15 @@
+-- Paginação por chave (keyset) do detalhamento da folha (utils.folha_db.pagina_folha)
+--
+-- As páginas são ordenadas por (coluna escolhida, id); o id desempata linhas
+-- com o mesmo valor e é a segunda parte do cursor. Se a tabela já tiver a
+-- coluna id, o ADD COLUMN não faz nada.
+ALTER TABLE public.ebisa_tab_folha
+    ADD COLUMN IF NOT EXISTS id BIGINT GENERATED BY DEFAULT AS IDENTITY;
+
+-- Ordenação padrão (nome do funcionário) servida direto pelo índice
+CREATE INDEX IF NOT EXISTS idx_tab_folha_pag_nome
+    ON public.ebisa_tab_folha (ano, mes, (COALESCE(nome_funcionario, '')), id);
+
+-- Mesma ordenação dentro de um centro de custo
+CREATE INDEX IF NOT EXISTS idx_tab_folha_pag_cc_nome
+    ON public.ebisa_tab_folha (ano, mes, nome_centro_custo_rh, (COALESCE(nome_funcionario, '')), id);
@@ -4,6 +4,8 @@ balancete_db.py - Operações de banco de dados para balancetes
 
 from database import conectar, desconectar
 import pandas as pd
+from utils.balancete_validacao import validar_balancete
+from utils.consolidacao import invalidar_consolidacao
 
 
 def obter_empresa_id_por_razao_social(empresa):
@@ -121,7 +123,7 @@ def deletar_balancete_existente(empresa_id, mes, ano):
             desconectar(conn)
 
 
-def inserir_balancete(empresa_id, mes, ano, df_itens, user):
+def inserir_balancete(empresa_id, mes, ano, df_itens, user, plano_contas_id=None):
     """
     Insere novo balancete (cabeçalho + itens)
     OTIMIZAÇÃO: Grava somente linhas com movimento (valores diferentes de zero)
@@ -132,6 +134,7 @@ def inserir_balancete(empresa_id, mes, ano, df_itens, user):
         ano: ano (ex: 2025)
         df_itens: DataFrame com os itens do balancete
         user: email do usuário que está importando
+        plano_contas_id: plano vigente usado na validação (gravado no cabeçalho)
 
     Returns:
         tuple (sucesso: bool, mensagem: str, balancete_id: int ou None)
@@ -149,13 +152,14 @@ def inserir_balancete(empresa_id, mes, ano, df_itens, user):
 
         # 1. Inserir cabeçalho do balancete
         query_cabecalho = """
-            INSERT INTO public.ebisa_cont_balancete (empresa_id, mes, ano, user_importacao)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO public.ebisa_cont_balancete (empresa_id, mes, ano, user_importacao, plano_contas_id)
+            VALUES (%s, %s, %s, %s, %s)
             RETURNING id
         """
 
         print(f"🔍 [DEBUG] Executando insert do cabeçalho...")
-        cursor.execute(query_cabecalho, (empresa_id, mes, ano, user["email"]))
+        cursor.execute(query_cabecalho, (empresa_id, mes, ano,
+                       user["email"], plano_contas_id))
         balancete_id = cursor.fetchone()[0]
         print(f"🔍 [DEBUG] Cabeçalho inserido! balancete_id={balancete_id}")
 
@@ -235,12 +239,13 @@ def inserir_balancete(empresa_id, mes, ano, df_itens, user):
             print(f"🔍 [DEBUG] Conexão fechada")
 
 
-def importar_balancete(empresa, mes, ano, df_itens, user):
+def importar_balancete(empresa, mes, ano, df_itens, user, ignorar_divergencias=False):
     """
     Pipeline completo de importação:
     1. Buscar ID da empresa
-    2. Deletar balancete existente
-    3. Inserir novo balancete
+    2. Validar contas contra o plano de contas vigente (antes de gravar)
+    3. Deletar balancete existente
+    4. Inserir novo balancete
 
     Args:
         razao_social: razão social da empresa
@@ -248,6 +253,8 @@ def importar_balancete(empresa, mes, ano, df_itens, user):
         ano: ano (ex: 2025)
         df_itens: DataFrame com os itens do balancete
         user_email: email do usuário que está importando
+        ignorar_divergencias: importa mesmo com contas divergentes do plano
+            (sem plano vigente a importação segue, com plano_contas_id nulo)
 
     Returns:
         tuple (sucesso: bool, mensagem: str)
@@ -265,7 +272,15 @@ def importar_balancete(empresa, mes, ano, df_itens, user):
         print(f"❌ [DEBUG] Empresa não encontrada!")
         return (False, f"❌ Empresa '{empresa}' não encontrada no banco")
 
-    # 2. Deletar balancete existente
+    # 2. Validar contas contra o plano vigente
+    validacao = validar_balancete(empresa_id, ano, df_itens)
+    print(f"🔍 [DEBUG] Validação plano: {validacao['message']}")
+
+    # Erro na conferência bloqueia sempre; divergências só sem a opção de ignorar
+    if validacao["erro"] or (not validacao["success"] and not ignorar_divergencias):
+        return (False, validacao["message"])
+
+    # 3. Deletar balancete existente
     print(f"🔍 [DEBUG] Deletando balancete existente...")
     sucesso, msg_delete = deletar_balancete_existente(empresa_id, mes, ano)
     print(f"🔍 [DEBUG] Resultado delete: sucesso={sucesso}, msg={msg_delete}")
@@ -274,10 +289,11 @@ def importar_balancete(empresa, mes, ano, df_itens, user):
         print(f"❌ [DEBUG] Erro ao deletar!")
         return (False, msg_delete)
 
-    # 3. Inserir novo balancete
+    # 4. Inserir novo balancete
     print(f"🔍 [DEBUG] Chamando inserir_balancete...")
     sucesso, msg_insert, balancete_id = inserir_balancete(
-        empresa_id, mes, ano, df_itens, user)
+        empresa_id, mes, ano, df_itens, user,
+        plano_contas_id=validacao["plano_contas_id"])
     print(
         f"🔍 [DEBUG] Resultado insert: sucesso={sucesso}, balancete_id={balancete_id}")
 
@@ -285,8 +301,13 @@ def importar_balancete(empresa, mes, ano, df_itens, user):
         print(f"❌ [DEBUG] Erro ao inserir!")
         return (False, msg_insert)
 
+    # Consolidações do período deixam de refletir o banco
+    invalidar_consolidacao(ano=ano, mes=mes)
+
     # Mensagem consolidada
     mensagem_final = f"{msg_delete}\n{msg_insert}"
+    if validacao["sem_plano"]:
+        mensagem_final += f"\n{validacao['message']}"
     print(f"🔍 [DEBUG] importar_balancete_completo - Sucesso! Retornando...")
 
     return (True, mensagem_final)
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import csv
 from io import StringIO
-from utils.balancete_db import importar_balancete
+from utils.balancete_db import importar_balancete, obter_empresa_id_por_razao_social
+from utils.balancete_validacao import validar_balancete
 from utils.auth import require_authentication, get_current_user
 
 # Verificar autenticação
@@ -243,8 +244,30 @@ def run_processor():
         st.write(f"Preview do arquivo ({len(df_preview)} linhas):")
         st.dataframe(df_preview.head(1000))
 
+        # -------------------------------------------
+        # Validação contra o plano de contas vigente
+        # -------------------------------------------
+        empresa_id = obter_empresa_id_por_razao_social(empresa)
+        if empresa_id:
+            validacao = validar_balancete(empresa_id, int(ano), df_preview)
+            if validacao["erro"]:
+                st.error(validacao["message"])
+            elif validacao["sem_plano"]:
+                st.warning(validacao["message"])
+            elif validacao["success"]:
+                st.success(validacao["message"])
+            else:
+                st.warning(validacao["message"])
+                if not validacao["divergencias"].empty:
+                    st.dataframe(validacao["divergencias"], hide_index=True)
+
     st.markdown("---")
 
+    ignorar_divergencias = st.checkbox(
+        "Importar mesmo com divergências em relação ao plano de contas",
+        value=False
+    )
+
     col_imp, col_back = st.columns([1, 1])
     with col_imp:
         importar = st.button("📥 Importar Balancete", type="primary", disabled=(
@@ -273,7 +296,8 @@ def run_processor():
                     mes=int(mes),
                     ano=int(ano),
                     df_itens=df_preview,
-                    user=user
+                    user=user,
+                    ignorar_divergencias=ignorar_divergencias
                 )
 
             if sucesso:
@@ -0,0 +1,152 @@
+"""
+balancete_validacao.py - Validação das contas do balancete contra o plano de contas vigente
+
+Etapa executada antes de qualquer gravação no banco:
+1) Localiza a vigência ativa da empresa no ano (utils.vigencia_resolver)
+2) Obtém as contas do plano (índice em memória, cacheado por plano_contas_id)
+3) Cruza as contas do balancete com o plano em uma única passada vetorizada
+
+Funções disponíveis:
+- validar_contas_balancete(df_itens, df_plano)
+- validar_balancete(empresa_id, ano, df_itens)
+"""
+
+import pandas as pd
+from utils.plano_contas_arvore import obter_arvore_plano
+from utils.vigencia_resolver import resolver_vigencia
+
+
+PROBLEMAS = {
+    "conta_inexistente": "Conta não existe no plano vigente",
+    "conta_inativa": "Conta inativa no plano vigente",
+    "reduzido_divergente": "Código reduzido diverge do plano",
+}
+
+
+def validar_contas_balancete(df_itens: pd.DataFrame, df_plano: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cruza as contas do balancete com as contas do plano (hash join).
+
+    Args:
+        df_itens: DataFrame do balancete (cod_conta, cod_reduzido, nome_conta, ...)
+        df_plano: contas do plano indexadas por cod_conta (cod_reduzido, fl_ativa)
+
+    Returns:
+        DataFrame com uma linha por conta divergente:
+        cod_conta, nome_conta, cod_reduzido, cod_reduzido_plano, problema, qtd_linhas
+    """
+    colunas = ["cod_conta", "nome_conta", "cod_reduzido",
+               "cod_reduzido_plano", "problema", "qtd_linhas"]
+    if df_itens is None or df_itens.empty:
+        return pd.DataFrame(columns=colunas)
+
+    # Trabalhar sobre as combinações distintas (conta, reduzido): o balancete
+    # repete a mesma conta em cada centro de custo.
+    if "cod_reduzido" in df_itens.columns:
+        cod_reduzido = pd.to_numeric(
+            df_itens["cod_reduzido"], errors="coerce").astype("Int64")
+    else:
+        cod_reduzido = pd.Series(pd.NA, index=df_itens.index, dtype="Int64")
+
+    chaves = pd.DataFrame({
+        "cod_conta": df_itens["cod_conta"].astype(str).str.strip(),
+        "cod_reduzido": cod_reduzido,
+        "nome_conta": df_itens["nome_conta"] if "nome_conta" in df_itens.columns else None,
+    })
+    distintos = chaves.groupby(["cod_conta", "cod_reduzido"], dropna=False, sort=False).agg(
+        nome_conta=("nome_conta", "first"),
+        qtd_linhas=("cod_conta", "size"),
+    ).reset_index()
+
+    # Hash join: posição de cada conta no índice do plano (-1 = não existe)
+    pos = df_plano.index.get_indexer(distintos["cod_conta"])
+    existe = pos >= 0
+
+    reduzido_plano = pd.to_numeric(
+        df_plano["cod_reduzido"], errors="coerce").astype("Int64").array
+    ativa_plano = df_plano["fl_ativa"].astype("boolean").array
+
+    distintos["cod_reduzido_plano"] = reduzido_plano.take(pos, allow_fill=True)
+    inativa = existe & ~ativa_plano.take(pos, allow_fill=True).fillna(True).to_numpy(dtype=bool)
+
+    reduzido_divergente = (
+        distintos["cod_reduzido"].ne(distintos["cod_reduzido_plano"])
+        .fillna(False).to_numpy(dtype=bool)
+    )
+
+    partes = [
+        distintos[~existe].assign(problema="conta_inexistente"),
+        distintos[inativa].assign(problema="conta_inativa"),
+        distintos[reduzido_divergente].assign(problema="reduzido_divergente"),
+    ]
+    resultado = pd.concat(partes, ignore_index=True)
+    resultado["problema"] = resultado["problema"].map(PROBLEMAS)
+
+    return resultado[colunas].sort_values(["problema", "cod_conta"], ignore_index=True)
+
+
+def validar_balancete(empresa_id: int, ano: int, df_itens: pd.DataFrame) -> dict:
+    """
+    Valida o balancete da empresa contra o plano de contas vigente no ano.
+
+    Sem plano vigente não há o que conferir: o resultado é só um aviso
+    ('success' True, 'sem_plano' True) e o balancete é gravado sem plano.
+    Se a conferência não pôde ser feita (erro ao consultar a vigência ou ao
+    carregar o plano), 'erro' é True e a importação deve ser bloqueada.
+    Divergências de contas retornam 'success' False.
+
+    Returns:
+        dict com 'success' (bool), 'message' (str), 'sem_plano' (bool),
+        'erro' (bool), 'vigencia_id', 'plano_contas_id' e 'divergencias' (DataFrame)
+    """
+    vigencia = resolver_vigencia(ano, empresa_id=empresa_id)
+    if vigencia.get("erro"):
+        return {
+            "success": False,
+            "message": f"❌ Erro ao consultar a vigência do plano de contas: {vigencia['erro']}",
+            "sem_plano": False,
+            "erro": True,
+            "vigencia_id": None,
+            "plano_contas_id": None,
+            "divergencias": pd.DataFrame(),
+        }
+
+    vigencia_id = vigencia["vigencia_id"]
+    plano_contas_id = vigencia["plano_contas_id"]
+
+    if not plano_contas_id:
+        return {
+            "success": True,
+            "message": (f"⚠️ Nenhum plano de contas vigente para a empresa em {ano}: "
+                        "contas não conferidas."),
+            "sem_plano": True,
+            "erro": False,
+            "vigencia_id": None,
+            "plano_contas_id": None,
+            "divergencias": pd.DataFrame(),
+        }
+
+    arvore = obter_arvore_plano(plano_contas_id)
+    if arvore is None:
+        return {"success": False, "message": "❌ Erro ao carregar o plano de contas.",
+                "sem_plano": False, "erro": True, "vigencia_id": vigencia_id, "plano_contas_id": plano_contas_id,
+                "divergencias": pd.DataFrame()}
+
+    divergencias = validar_contas_balancete(df_itens, arvore.tabela)
+
+    if divergencias.empty:
+        mensagem = f"✅ Todas as contas conferem com o plano vigente (ID {plano_contas_id})."
+    else:
+        contagem = divergencias["problema"].value_counts()
+        mensagem = "⚠️ Divergências com o plano vigente: " + ", ".join(
+            f"{problema}: {qtd}" for problema, qtd in contagem.items())
+
+    return {
+        "success": divergencias.empty,
+        "message": mensagem,
+        "sem_plano": False,
+        "erro": False,
+        "vigencia_id": vigencia_id,
+        "plano_contas_id": plano_contas_id,
+        "divergencias": divergencias,
+    }
@@ -0,0 +1,222 @@
+"""
+cache.py - Cache em memória por namespace, com invalidação seletiva
+
+Compartilhado entre as sessões do processo (como os caches de catálogo,
+árvores e consolidação), mas com invalidação seletiva no lugar de
+st.cache_data.clear():
+
+- cada conjunto de dados tem um namespace ("folha", "dfc", "consolidacao"...)
+  com campos nomeados; a chave é uma tupla na ordem desses campos
+- invalidar("folha", ano=2025, mes=3) descarta só as chaves daquele período.
+  Campo None na chave significa "todos os valores" (ex.: mes=None é o ano
+  inteiro), então ele também é atingido por qualquer filtro nesse campo
+- um cálculo em andamento atingido por uma invalidação é marcado como
+  obsoleto e não grava o resultado. Nada é guardado por chave além do valor
+  e do cálculo em andamento, então a memória não cresce com as chaves já
+  invalidadas
+- limites={consulta: n} mantém no máximo n chaves daquela consulta (primeiro
+  campo da chave); ao passar do limite, sai a usada há mais tempo. Serve
+  para valores grandes, como os cubos da folha
+- cálculos simultâneos da mesma chave são agrupados: uma thread consulta o
+  banco e as demais aguardam e recebem o mesmo resultado (sem "estouro"
+  de consultas após um refresh)
+
+O ttl é só a rede de segurança: enquanto o listener de notificações do
+banco (utils.notificacoes) estiver conectado, os namespaces que ele cobre
+são marcados com invalidação externa e as entradas não expiram por tempo.
+
+Os valores são compartilhados entre sessões: não alterar sem .copy().
+
+Funções disponíveis:
+- namespace(nome, campos, ttl=None, limites=None)
+- invalidar(nome, **filtros)
+- definir_invalidacao_externa(nomes, ativa)
+- Namespace.obter(chave, calcular, guardar=None)
+- Namespace.obter_varios(chaves, calcular, guardar=None)
+- Namespace.invalidar(**filtros)
+"""
+
+import threading
+import time
+
+
+class _Calculo:
+    """Cálculo em andamento de uma chave (aguardado pelas demais threads)."""
+
+    def __init__(self):
+        self.obsoleto = False    # invalidado durante o cálculo
+        self.evento = threading.Event()
+        self.valor = None
+        self.erro = None
+
+
+class Namespace:
+    def __init__(self, nome: str, campos: tuple, ttl: float | None = None,
+                 limites: dict | None = None):
+        self.nome = nome
+        self.campos = tuple(campos)
+        self.ttl = ttl
+        self.limites = dict(limites or {})
+        self._itens = {}         # chave -> (valor, instante), do uso mais antigo ao mais recente
+        self._em_andamento = {}  # chave -> _Calculo
+        self._lock = threading.Lock()
+
+    def _normalizar(self, chave) -> tuple:
+        chave = tuple(chave) if isinstance(chave, (tuple, list)) else (chave,)
+        if len(chave) != len(self.campos):
+            raise ValueError(
+                f"Chave do cache '{self.nome}' deve ter os campos {self.campos}: {chave}")
+        return chave
+
+    def _atinge(self, chave: tuple, filtros: dict) -> bool:
+        for campo, valor in filtros.items():
+            atual = chave[self.campos.index(campo)]
+            if atual is not None and valor is not None and atual != valor:
+                return False
+        return True
+
+    def _valido(self, item) -> bool:
+        if self.ttl is None or self.nome in _INVALIDACAO_EXTERNA:
+            return True
+        return time.monotonic() - item[1] < self.ttl
+
+    def _aplicar_limite(self, consulta):
+        """Descarta as chaves da consulta usadas há mais tempo além do limite (com o lock)."""
+        limite = self.limites.get(consulta)
+        if limite is None:
+            return
+        chaves = [c for c in self._itens if c[0] == consulta]
+        for chave in chaves[:max(len(chaves) - limite, 0)]:
+            del self._itens[chave]
+
+    def obter(self, chave, calcular, guardar=None):
+        """
+        Retorna o valor da chave, calculando com calcular() se necessário.
+
+        Args:
+            chave: tupla na ordem de self.campos
+            calcular: função sem argumentos que produz o valor
+            guardar: função opcional valor -> bool; False = não manter em cache
+                     (ex.: resultados de erro)
+        """
+        chave = self._normalizar(chave)
+        return self.obter_varios(
+            [chave], lambda faltantes: {chave: calcular()}, guardar)[chave]
+
+    def obter_varios(self, chaves, calcular, guardar=None) -> dict:
+        """
+        Retorna {chave: valor} para várias chaves, calculando de uma vez só as
+        que faltam: calcular(lista_de_chaves_faltantes) -> {chave: valor}.
+        Chaves ausentes no retorno de calcular() valem None.
+        """
+        chaves = [self._normalizar(c) for c in chaves]
+        resultado = {}
+        aguardar = {}
+        proprias = {}
+
+        with self._lock:
+            for chave in chaves:
+                item = self._itens.get(chave)
+                if item is not None and self._valido(item):
+                    resultado[chave] = item[0]
+                    if self.limites:
+                        # Reinsere no fim: a ordem do dict é a ordem de uso
+                        self._itens[chave] = self._itens.pop(chave)
+                elif chave in self._em_andamento:
+                    aguardar[chave] = self._em_andamento[chave]
+                elif chave not in proprias:
+                    calculo = _Calculo()
+                    self._em_andamento[chave] = calculo
+                    proprias[chave] = calculo
+
+        if proprias:
+            try:
+                valores = calcular(list(proprias))
+                for chave, calculo in proprias.items():
+                    calculo.valor = valores.get(chave)
+            except Exception as e:
+                for calculo in proprias.values():
+                    calculo.erro = e
+                raise
+            finally:
+                with self._lock:
+                    for chave, calculo in proprias.items():
+                        self._em_andamento.pop(chave, None)
+                        if (calculo.erro is None
+                                and not calculo.obsoleto
+                                and (guardar is None or guardar(calculo.valor))):
+                            self._itens.pop(chave, None)
+                            self._itens[chave] = (calculo.valor, time.monotonic())
+                            self._aplicar_limite(chave[0])
+                for calculo in proprias.values():
+                    calculo.evento.set()
+            resultado.update((chave, calculo.valor) for chave, calculo in proprias.items())
+
+        # Chaves calculadas por outra thread: aguarda e reaproveita o resultado
+        for chave, calculo in aguardar.items():
+            calculo.evento.wait()
+            if calculo.erro is not None:
+                raise calculo.erro
+            resultado[chave] = calculo.valor
+
+        return resultado
+
+    def invalidar(self, **filtros) -> int:
+        """
+        Descarta as chaves atingidas pelos filtros (sem filtros = namespace inteiro).
+        Retorna a quantidade de chaves invalidadas.
+        """
+        desconhecidos = [c for c in filtros if c not in self.campos]
+        if desconhecidos:
+            raise ValueError(
+                f"Campos desconhecidos no cache '{self.nome}': {', '.join(desconhecidos)}")
+
+        with self._lock:
+            chaves = set(self._itens) | set(self._em_andamento)
+            atingidas = [c for c in chaves if self._atinge(c, filtros)]
+            for chave in atingidas:
+                self._itens.pop(chave, None)
+                calculo = self._em_andamento.get(chave)
+                if calculo is not None:
+                    calculo.obsoleto = True
+            return len(atingidas)
+
+
+# ----------------------------------------------------------------------
+# Registro de namespaces do processo
+# ----------------------------------------------------------------------
+_NAMESPACES = {}
+_LOCK_NAMESPACES = threading.Lock()
+
+# Namespaces invalidados por notificação do banco (ttl ignorado)
+_INVALIDACAO_EXTERNA = set()
+
+
+def namespace(nome: str, campos, ttl: float | None = None,
+              limites: dict | None = None) -> Namespace:
+    """Retorna o namespace 'nome' (criado na primeira chamada)."""
+    ns = _NAMESPACES.get(nome)
+    if ns is not None:
+        return ns
+
+    with _LOCK_NAMESPACES:
+        ns = _NAMESPACES.get(nome)
+        if ns is None:
+            ns = Namespace(nome, campos, ttl, limites)
+            _NAMESPACES[nome] = ns
+        return ns
+
+
+def invalidar(nome: str, **filtros) -> int:
+    """Invalida chaves de um namespace pelo nome (0 se o namespace não existe)."""
+    ns = _NAMESPACES.get(nome)
+    return ns.invalidar(**filtros) if ns is not None else 0
+
+
+def definir_invalidacao_externa(nomes, ativa: bool):
+    """Liga/desliga a invalidação externa (sem expiração por ttl) dos namespaces."""
+    with _LOCK_NAMESPACES:
+        if ativa:
+            _INVALIDACAO_EXTERNA.update(nomes)
+        else:
+            _INVALIDACAO_EXTERNA.difference_update(nomes)
@@ -0,0 +1,320 @@
+"""
+consolidacao.py - Consolidação de balancetes de um grupo econômico
+
+1) Carrega, em uma única consulta, os itens dos balancetes de todas as empresas
+   do grupo no período (somados por conta — os centros de custo são agregados no banco)
+2) Alinha as empresas por cod_conta em uma matriz contas x empresas (NumPy)
+3) Aplica as regras de eliminação intercompany (ebisa_cont_grupo_regra_eliminacao)
+4) Guarda o resultado em cache por (grupo_id, ano, mes)
+
+As contas de uma regra de eliminação devem ser exclusivamente intercompany:
+o saldo consolidado delas é zerado e o valor eliminado é descontado também
+das contas sintéticas superiores presentes no balancete.
+
+Funções disponíveis:
+- listar_grupos()
+- carregar_regras_eliminacao(grupo_id)
+- montar_matriz_contas(df_itens, coluna_valor="saldo_atual")
+- aplicar_eliminacoes(matriz, regras)
+- consolidar_grupo(grupo_id, ano, mes)
+- invalidar_consolidacao(grupo_id=None, ano=None, mes=None)
+"""
+
+import numpy as np
+import pandas as pd
+from database import conectar, desconectar
+from utils import cache
+
+
+SEPARADOR = "."
+
+
+# ----------------------------------------------------------------------
+# Cadastro (grupos / empresas / regras)
+# ----------------------------------------------------------------------
+def listar_grupos() -> pd.DataFrame:
+    """Grupos ativos com a quantidade de empresas."""
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT g.id, g.nome, g.descricao, g.empresa_controladora_id,
+                   COUNT(ge.empresa_id) AS qtd_empresas
+            FROM public.ebisa_cont_grupo g
+            LEFT JOIN public.ebisa_cont_grupo_empresa ge ON ge.grupo_id = g.id
+            WHERE g.fl_ativo = TRUE
+            GROUP BY g.id
+            ORDER BY g.nome
+        """)
+        return pd.DataFrame(cursor.fetchall(), columns=[
+            "id", "nome", "descricao", "empresa_controladora_id", "qtd_empresas"
+        ])
+    except Exception as e:
+        print(f"❌ Erro ao listar grupos: {e}")
+        return pd.DataFrame()
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_regras_eliminacao(grupo_id: int) -> list:
+    """
+    Regras ativas do grupo (e as globais, com grupo_id NULL).
+
+    Returns:
+        lista de dicts {'descricao', 'contas', 'contrapartidas'}
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT descricao, contas, contrapartidas
+            FROM public.ebisa_cont_grupo_regra_eliminacao
+            WHERE fl_ativo = TRUE
+              AND (grupo_id = %s OR grupo_id IS NULL)
+            ORDER BY id
+            """,
+            (grupo_id,)
+        )
+        return [
+            {"descricao": d, "contas": list(c or []), "contrapartidas": list(cp or [])}
+            for d, c, cp in cursor.fetchall()
+        ]
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def _carregar_empresas_grupo(cursor, grupo_id: int) -> pd.DataFrame:
+    cursor.execute(
+        """
+        SELECT e.cod_empresa, e.nome_empresa
+        FROM public.ebisa_cont_grupo_empresa ge
+        JOIN public.ebisa_empresa_sienge e ON e.cod_empresa = ge.empresa_id
+        WHERE ge.grupo_id = %s
+        ORDER BY e.cod_empresa
+        """,
+        (grupo_id,)
+    )
+    return pd.DataFrame(cursor.fetchall(), columns=["empresa_id", "nome_empresa"])
+
+
+def _carregar_itens_grupo(cursor, empresas_ids: list, ano: int, mes: int) -> pd.DataFrame:
+    """Itens de todos os balancetes do grupo no período, somados por (empresa, conta)."""
+    cursor.execute(
+        """
+        SELECT b.empresa_id,
+               i.cod_conta,
+               MAX(i.nome_conta)     AS nome_conta,
+               SUM(i.saldo_anterior) AS saldo_anterior,
+               SUM(i.val_debito)     AS val_debito,
+               SUM(i.val_credito)    AS val_credito,
+               SUM(i.saldo_atual)    AS saldo_atual
+        FROM public.ebisa_cont_balancete b
+        JOIN public.ebisa_cont_balancete_itens i ON i.balancete_id = b.id
+        WHERE b.empresa_id = ANY(%s)
+          AND b.ano = %s
+          AND b.mes = %s
+        GROUP BY b.empresa_id, i.cod_conta
+        """,
+        (empresas_ids, ano, mes)
+    )
+    df = pd.DataFrame(cursor.fetchall(), columns=[
+        "empresa_id", "cod_conta", "nome_conta",
+        "saldo_anterior", "val_debito", "val_credito", "saldo_atual"
+    ])
+    for col in ("saldo_anterior", "val_debito", "val_credito", "saldo_atual"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0).astype("float64")
+    return df
+
+
+# ----------------------------------------------------------------------
+# Motor (funções puras sobre DataFrames)
+# ----------------------------------------------------------------------
+def montar_matriz_contas(df_itens: pd.DataFrame, coluna_valor: str = "saldo_atual",
+                         empresas_ids: list | None = None) -> pd.DataFrame:
+    """
+    Pivot vetorizado contas x empresas.
+
+    Args:
+        df_itens: uma linha por (empresa_id, cod_conta)
+        empresas_ids: ordem/colunas desejadas (empresas sem balancete ficam zeradas)
+
+    Returns:
+        DataFrame indexado por cod_conta (ordenado), uma coluna por empresa_id
+        e a coluna 'nome_conta'
+    """
+    codigos, pos_conta = np.unique(df_itens["cod_conta"].to_numpy(dtype=str), return_inverse=True)
+
+    if empresas_ids is None:
+        empresas_ids = sorted(df_itens["empresa_id"].unique().tolist())
+    colunas = pd.Index(empresas_ids)
+    pos_empresa = colunas.get_indexer(df_itens["empresa_id"])
+    dentro = pos_empresa >= 0
+
+    matriz = np.zeros((len(codigos), len(colunas)), dtype="float64")
+    np.add.at(matriz, (pos_conta[dentro], pos_empresa[dentro]),
+              df_itens[coluna_valor].to_numpy(dtype="float64")[dentro])
+
+    # Nome da conta: o da primeira empresa em que a conta aparece
+    nomes = np.empty(len(codigos), dtype=object)
+    nomes[pos_conta[::-1]] = df_itens["nome_conta"].to_numpy(dtype=object)[::-1]
+
+    resultado = pd.DataFrame(matriz, index=pd.Index(codigos, name="cod_conta"), columns=colunas)
+    resultado.insert(0, "nome_conta", nomes)
+    return resultado
+
+
+def _mascara_prefixos(codigos: pd.Index, prefixos: list) -> np.ndarray:
+    """Conta igual ao prefixo ou descendente dele ('1.1' casa '1.1.01', não '1.10')."""
+    prefixos = [str(p).strip() for p in prefixos if str(p).strip()]
+    if not prefixos:
+        return np.zeros(len(codigos), dtype=bool)
+    serie = codigos.to_series()
+    return (serie.isin(prefixos)
+            | serie.str.startswith(tuple(p + SEPARADOR for p in prefixos))).to_numpy()
+
+
+def _ancestrais(cod_conta: str) -> list:
+    partes = cod_conta.split(SEPARADOR)
+    return [SEPARADOR.join(partes[:i]) for i in range(len(partes) - 1, 0, -1)]
+
+
+def aplicar_eliminacoes(matriz: pd.DataFrame, regras: list):
+    """
+    Aplica as regras de eliminação sobre a matriz contas x empresas.
+
+    Returns:
+        tuple (eliminacao: Series por cod_conta, resumo: DataFrame por regra)
+    """
+    codigos = matriz.index
+    valores = matriz.drop(columns="nome_conta").to_numpy()
+    total = valores.sum(axis=1)
+
+    eliminado = np.zeros(len(codigos), dtype=bool)
+    resumo = []
+
+    for regra in regras:
+        lados = {}
+        for lado in ("contas", "contrapartidas"):
+            mascara = _mascara_prefixos(codigos, regra.get(lado, [])) & ~eliminado
+            eliminado |= mascara
+            # Valor do lado = soma das contas de topo (sem ancestral na própria regra)
+            conjunto = set(codigos[mascara])
+            topo = [i for i in np.flatnonzero(mascara)
+                    if not any(a in conjunto for a in _ancestrais(codigos[i]))]
+            lados[lado] = topo
+
+        resumo.append({
+            "Regra": regra.get("descricao", ""),
+            "Contas": float(total[lados["contas"]].sum()),
+            "Contrapartidas": float(total[lados["contrapartidas"]].sum()),
+        })
+
+    eliminacao = np.where(eliminado, -total, 0.0)
+
+    # Propagar para as sintéticas superiores o que foi eliminado nas contas de topo
+    posicao = {cod: i for i, cod in enumerate(codigos)}
+    conjunto_eliminado = set(codigos[eliminado])
+    for i in np.flatnonzero(eliminado):
+        ancestrais = _ancestrais(codigos[i])
+        if any(a in conjunto_eliminado for a in ancestrais):
+            continue
+        for anc in ancestrais:
+            j = posicao.get(anc)
+            if j is not None:
+                eliminacao[j] -= total[i]
+
+    resumo = pd.DataFrame(resumo, columns=["Regra", "Contas", "Contrapartidas"])
+    resumo["Diferença"] = resumo["Contas"] - resumo["Contrapartidas"]
+
+    return pd.Series(eliminacao, index=codigos, name="eliminacao"), resumo
+
+
+# ----------------------------------------------------------------------
+# Cache por (grupo_id, ano, mes)
+# ----------------------------------------------------------------------
+_CACHE_CONSOLIDACAO = cache.namespace("consolidacao", ("grupo_id", "ano", "mes"))
+
+
+def consolidar_grupo(grupo_id: int, ano: int, mes: int) -> dict:
+    """
+    Consolida os balancetes do grupo no período (resultado cacheado).
+
+    Returns:
+        dict com 'success', 'message', 'consolidado' (DataFrame: cod_conta,
+        nome_conta, uma coluna por empresa, total, eliminacao, consolidado),
+        'eliminacoes' (resumo por regra) e 'empresas_sem_balancete' (lista)
+    """
+    grupo_id, ano, mes = int(grupo_id), int(ano), int(mes)
+    return _CACHE_CONSOLIDACAO.obter(
+        (grupo_id, ano, mes),
+        lambda: _consolidar(grupo_id, ano, mes),
+        guardar=lambda r: r["success"]  # falhas não entram no cache
+    )
+
+
+def _consolidar(grupo_id: int, ano: int, mes: int) -> dict:
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        empresas = _carregar_empresas_grupo(cursor, grupo_id)
+        if empresas.empty:
+            return {"success": False, "message": "⚠️ Grupo sem empresas cadastradas."}
+
+        ids = empresas["empresa_id"].astype(int).tolist()
+        df_itens = _carregar_itens_grupo(cursor, ids, int(ano), int(mes))
+    except Exception as e:
+        print(f"❌ Erro ao carregar balancetes do grupo {grupo_id}: {e}")
+        return {"success": False, "message": f"❌ Erro ao carregar balancetes: {e}"}
+    finally:
+        if conn:
+            desconectar(conn)
+
+    if df_itens.empty:
+        return {"success": False,
+                "message": f"⚠️ Nenhum balancete do grupo em {int(mes):02d}/{ano}."}
+
+    try:
+        regras = carregar_regras_eliminacao(grupo_id)
+    except Exception as e:
+        print(f"❌ Erro ao carregar regras de eliminação: {e}")
+        return {"success": False, "message": f"❌ Erro ao carregar regras de eliminação: {e}"}
+
+    matriz = montar_matriz_contas(df_itens, "saldo_atual", ids)
+    eliminacao, resumo = aplicar_eliminacoes(matriz, regras)
+
+    com_balancete = set(df_itens["empresa_id"].unique().tolist())
+    sem_balancete = empresas.loc[~empresas["empresa_id"].isin(com_balancete), "nome_empresa"].tolist()
+
+    nomes_empresas = {e: f"{e} - {n}" for e, n in zip(empresas["empresa_id"], empresas["nome_empresa"])}
+    consolidado = matriz.rename(columns=nomes_empresas)
+    consolidado["total"] = matriz[ids].sum(axis=1)
+    consolidado["eliminacao"] = eliminacao
+    consolidado["consolidado"] = consolidado["total"] + consolidado["eliminacao"]
+    consolidado = consolidado.reset_index()
+
+    return {
+        "success": True,
+        "message": (
+            f"✅ {len(com_balancete)} de {len(ids)} empresa(s) consolidadas em "
+            f"{int(mes):02d}/{ano} ({len(consolidado)} contas, {len(regras)} regra(s) de eliminação)."
+        ),
+        "consolidado": consolidado,
+        "eliminacoes": resumo,
+        "empresas_sem_balancete": sem_balancete,
+    }
+
+
+def invalidar_consolidacao(grupo_id=None, ano=None, mes=None):
+    """Descarta consolidações em cache (filtros None = qualquer valor)."""
+    _CACHE_CONSOLIDACAO.invalidar(
+        grupo_id=None if grupo_id is None else int(grupo_id),
+        ano=None if ano is None else int(ano),
+        mes=None if mes is None else int(mes),
+    )
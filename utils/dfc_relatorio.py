@@ -0,0 +1,207 @@
+"""
+dfc_relatorio.py - Montagem do relatório de DFC gerencial (pages/7_📈_dfc.py)
+
+As linhas analíticas do DFC somam todas as contas do plano financeiro que
+começam com o código da linha (ex.: "1.01.01" recebe 1.01.01.001,
+1.01.01.002, ...). Esse rollup por prefixo é feito no banco (consulta da
+página, com os códigos de ESTRUTURA_COMPILADA.analiticas): só os valores
+por linha analítica e ano chegam ao Python.
+
+As linhas calculadas (subtotal, grupo, resultado, resultado_final) são
+compiladas uma vez, na importação do módulo: as fórmulas formam um grafo de
+dependências, percorrido em ordem topológica para expandir cada linha em
+coeficientes das analíticas. O resultado é uma matriz linhas x analíticas
+(poucas dezenas de colunas, densa), e todas as linhas de todos os anos saem
+de um único produto de matrizes. Referências inexistentes, ciclos e códigos
+duplicados geram ValueError na compilação, em vez de linhas zeradas.
+
+Funções disponíveis:
+- compilar_estrutura(estrutura)
+- EstruturaCompilada.analiticas
+- EstruturaCompilada.calcular(valores_analiticas)
+"""
+
+import numpy as np
+
+
+TIPOS_CALCULADOS = ("subtotal", "grupo", "resultado", "resultado_final")
+
+# --- ESTRUTURA DO DFC (O ESQUELETO INTELIGENTE) ---
+# Aqui definimos a ordem de apresentação e a lógica de cálculo.
+# 'tipo': 
+#   - 'analitica': Conta que recebe dados do banco (agregados pelo prefixo).
+#   - 'subtotal': Soma as analíticas imediatamente acima (dentro do mesmo grupo).
+#   - 'grupo': Soma grandes blocos (Entradas, Saídas).
+#   - 'resultado': O cálculo final (Entradas - Saídas).
+#   - 'titulo': Apenas texto visual.
+# 'formula' lista os códigos somados pela linha (analíticas ou outras linhas
+# calculadas, em qualquer ordem na lista).
+
+ESTRUTURA_DFC = [
+    # --- BLOCO OPERACIONAL ---
+    {"cod": "", "desc": "RESULTADO OPERACIONAL", "tipo": "titulo"},
+    
+    {"cod": "1.01.01", "desc": "RECEITA OPERACIONAL BRUTA", "tipo": "analitica"},
+    {"cod": "1.01.02", "desc": "(-) IMPOSTOS DIRETOS SOBRE FATURAMENTO", "tipo": "analitica"},
+    {"cod": "ST_ROL",  "desc": "(=) Receita Operacional Líquida", "tipo": "subtotal", "formula": ["1.01.01", "1.01.02"]},
+    
+    {"cod": "1.09.01", "desc": "IMPOSTOS RETIDOS DE CLIENTES", "tipo": "analitica"},
+    {"cod": "1.09.02", "desc": "OUTRAS RETENÇÕES ATIVAS", "tipo": "analitica"},
+    {"cod": "ST_RET",  "desc": "(=) Retenções de Clientes", "tipo": "subtotal", "formula": ["1.09.01", "1.09.02"]},
+    
+    {"cod": "GRP_ENT_OP", "desc": "(=) Total de Entradas Operacionais", "tipo": "grupo", "formula": ["ST_ROL", "ST_RET"]},
+    
+    {"cod": "2.01.01", "desc": "MATERIAIS E INSUMOS APLICADOS NAS OBRAS E PROJETOS", "tipo": "analitica"},
+    {"cod": "2.01.02", "desc": "MÃO DE OBRA PRÓPRIA E ENCARGOS", "tipo": "analitica"},
+    {"cod": "2.01.03", "desc": "OUTROS GASTOS COM MÃO DE OBRA PRÓPRIA", "tipo": "analitica"},
+    {"cod": "2.01.04", "desc": "VEÍCULOS E EQUIPAMENTOS", "tipo": "analitica"},
+    {"cod": "2.01.05", "desc": "VIAGENS E DESLOCAMENTOS", "tipo": "analitica"},
+    {"cod": "2.01.06", "desc": "LOCALIZAÇÃO", "tipo": "analitica"},
+    {"cod": "2.01.07", "desc": "ADMINISTRAÇÃO", "tipo": "analitica"},
+    {"cod": "2.01.08", "desc": "INFORMÁTICA E TELECOMUNICAÇÕES", "tipo": "analitica"},
+    {"cod": "2.01.09", "desc": "SERVIÇOS ESPECIALIZADOS", "tipo": "analitica"},
+    {"cod": "2.01.10", "desc": "COMERCIAIS", "tipo": "analitica"},
+    {"cod": "ST_CUSTOS", "desc": "(=) Custos e Despesas Operacionais", "tipo": "subtotal", "formula": ["2.01.01", "2.01.02", "2.01.03", "2.01.04", "2.01.05", "2.01.06", "2.01.07", "2.01.08", "2.01.09", "2.01.10"]},
+    
+    {"cod": "2.04.01", "desc": "IMPOSTOS DIRETOS A PAGAR", "tipo": "analitica"},
+    {"cod": "2.04.02", "desc": "TRIBUTOS E ENCARGOS DE FOLHA DE PGTO E TERCEIROS", "tipo": "analitica"},
+    {"cod": "2.04.03", "desc": "IMPOSTOS DE TERCEIROS", "tipo": "analitica"},
+    {"cod": "2.04.04", "desc": "IMPOSTOS SOBRE PROPRIEDADES", "tipo": "analitica"},
+    {"cod": "2.04.05", "desc": "PARCELAMENTO DE IMPOSTOS", "tipo": "analitica"},
+    {"cod": "2.04.07", "desc": "AUTUAÇÕES E INFRAÇÕES", "tipo": "analitica"},
+    {"cod": "ST_TRIB", "desc": "(=) Despesas Tributárias", "tipo": "subtotal", "formula": ["2.04.01", "2.04.02", "2.04.03", "2.04.04", "2.04.05", "2.04.07"]},
+    
+    {"cod": "2.09.01", "desc": "IMPOSTOS RETIDOS FOLHA/FORNECEDORES", "tipo": "analitica"},
+    {"cod": "2.09.02", "desc": "OUTRAS RETENÇÕES PASSIVAS", "tipo": "analitica"},
+    {"cod": "ST_RET_FORN", "desc": "(=) Retenções de Fornecedores", "tipo": "subtotal", "formula": ["2.09.01", "2.09.02"]},
+    
+    {"cod": "2.99.01", "desc": "Uso Indevido Imposto no Contas a Receber", "tipo": "analitica"},
+    {"cod": "2.99.02", "desc": "Uso Indevido Imposto no Contas a Pagar", "tipo": "analitica"},
+    {"cod": "ST_USO_IND", "desc": "(=) Uso Indevido de Impostos", "tipo": "subtotal", "formula": ["2.99.01", "2.99.02"]},
+    
+    {"cod": "GRP_SAI_OP", "desc": "(=) Total de Saídas Operacionais", "tipo": "grupo", "formula": ["ST_CUSTOS", "ST_TRIB", "ST_RET_FORN", "ST_USO_IND"]},
+    
+    {"cod": "RES_OP", "desc": "(=) Total do Resultado Operacional", "tipo": "resultado", "formula": ["GRP_ENT_OP", "GRP_SAI_OP"]}, # Entradas + Saídas (assumindo que saídas já vêm negativas do banco ou ajustaremos)
+
+    # --- BLOCO PATRIMONIAL ---
+    {"cod": "", "desc": "RESULTADO PATRIMONIAL (SÓCIOS)", "tipo": "titulo"},
+    
+    {"cod": "1.02.01", "desc": "APORTE DE CAPITAL", "tipo": "analitica"},
+    {"cod": "1.02.04", "desc": "VENDA DE ATIVOS", "tipo": "analitica"},
+    {"cod": "1.04.01", "desc": "DISTRIBUIÇÃO DE LUCROS", "tipo": "analitica"},
+    {"cod": "1.05.09", "desc": "Transferência Mesma Titularidade", "tipo": "analitica"},
+    {"cod": "ST_ENT_PAT", "desc": "(=) Entradas Patrimoniais", "tipo": "subtotal", "formula": ["1.02.01", "1.02.04", "1.04.01", "1.05.09"]},
+    
+    {"cod": "2.02.01", "desc": "RETIRADA DOS SÓCIOS", "tipo": "analitica"},
+    {"cod": "2.02.02", "desc": "APORTE", "tipo": "analitica"},
+    {"cod": "2.02.03", "desc": "DISTRIBUIÇÃO DE LUCROS", "tipo": "analitica"},
+    {"cod": "ST_SAI_PAT", "desc": "(=) Saídas Patrimoniais", "tipo": "subtotal", "formula": ["2.02.01", "2.02.02", "2.02.03"]},
+    
+    {"cod": "RES_PAT", "desc": "(=) Total do Resultado Patrimonial", "tipo": "resultado", "formula": ["ST_ENT_PAT", "ST_SAI_PAT"]},
+
+    # --- BLOCO FINANCEIRO ---
+    {"cod": "", "desc": "RESULTADO FINANCEIRO", "tipo": "titulo"},
+    
+    {"cod": "1.02.02", "desc": "EMPRÉSTIMOS E FINANCIAMENTOS", "tipo": "analitica"},
+    {"cod": "1.02.03", "desc": "REPASSES", "tipo": "analitica"},
+    {"cod": "1.03.01", "desc": "RECEITAS FINANCEIRAS", "tipo": "analitica"},
+    {"cod": "1.03.02", "desc": "INVERSÕES", "tipo": "analitica"},
+    {"cod": "1.03.03", "desc": "VARIAÇÕES FINANCEIRAS", "tipo": "analitica"},
+    {"cod": "ST_ENT_FIN", "desc": "(=) Entradas Financeiras", "tipo": "subtotal", "formula": ["1.02.02", "1.02.03", "1.03.01", "1.03.02", "1.03.03"]},
+    
+    {"cod": "2.03.01", "desc": "DESPESAS FINANCEIRAS E BANCÁRIAS", "tipo": "analitica"},
+    {"cod": "2.03.02", "desc": "INVERSÕES", "tipo": "analitica"},
+    {"cod": "2.03.03", "desc": "VARIAÇÕES FINANCEIRAS", "tipo": "analitica"},
+    {"cod": "2.04.06", "desc": "OPERAÇÕES FINANCEIRAS", "tipo": "analitica"},
+    {"cod": "2.03.04", "desc": "PAGAMENTO DE EMPRÉSTIMOS E FINANCIAMENTOS", "tipo": "analitica"},
+    {"cod": "2.03.05", "desc": "CONTENCIOSO", "tipo": "analitica"},
+    {"cod": "ST_SAI_FIN", "desc": "(=) Saídas Financeiras", "tipo": "subtotal", "formula": ["2.03.01", "2.03.02", "2.03.03", "2.04.06", "2.03.04", "2.03.05"]},
+    
+    {"cod": "RES_FIN", "desc": "(=) Total do Resultado Financeiro", "tipo": "resultado", "formula": ["ST_ENT_FIN", "ST_SAI_FIN"]},
+    
+    # --- RESULTADO FINAL ---
+    {"cod": "RES_FINAL", "desc": "(=) Superávit/Déficit do Período", "tipo": "resultado_final", "formula": ["RES_OP", "RES_PAT", "RES_FIN"]},
+]
+
+
+class EstruturaCompilada:
+    def __init__(self, analiticas: list, matriz: np.ndarray):
+        # Códigos das linhas analíticas, na ordem das colunas da matriz
+        self.analiticas = analiticas
+        # Uma linha por item da estrutura (títulos = zeros)
+        self.matriz = matriz
+
+    def calcular(self, valores_analiticas) -> np.ndarray:
+        """
+        Valores de todas as linhas da estrutura.
+
+        Args:
+            valores_analiticas: matriz (analíticas x anos), na ordem de self.analiticas
+
+        Returns:
+            matriz (linhas da estrutura x anos)
+        """
+        return self.matriz @ np.asarray(valores_analiticas, dtype="float64")
+
+
+def compilar_estrutura(estrutura) -> EstruturaCompilada:
+    """
+    Compila as fórmulas da estrutura em uma matriz linhas x analíticas.
+
+    Raises:
+        ValueError: código duplicado, linha calculada sem fórmula, referência
+        inexistente ou ciclo entre fórmulas
+    """
+    analiticas = [linha["cod"] for linha in estrutura if linha["tipo"] == "analitica"]
+    coluna = {cod: j for j, cod in enumerate(analiticas)}
+
+    codigos = [linha["cod"] for linha in estrutura
+               if linha["tipo"] == "analitica" or linha["tipo"] in TIPOS_CALCULADOS]
+    repetidos = sorted({cod for cod in codigos if codigos.count(cod) > 1})
+    if repetidos:
+        raise ValueError(f"Estrutura do DFC: código duplicado ({', '.join(repetidos)}).")
+
+    formulas = {}
+    for linha in estrutura:
+        if linha["tipo"] in TIPOS_CALCULADOS:
+            if not linha.get("formula"):
+                raise ValueError(f"Estrutura do DFC: linha '{linha['cod']}' sem fórmula.")
+            formulas[linha["cod"]] = list(linha["formula"])
+
+    for cod, componentes in formulas.items():
+        for componente in componentes:
+            if componente not in coluna and componente not in formulas:
+                raise ValueError(
+                    f"Estrutura do DFC: '{cod}' referencia '{componente}', que não existe.")
+
+    # Coeficientes de cada linha calculada, em ordem topológica (componentes primeiro)
+    identidade = np.eye(len(analiticas))
+    coeficientes = {cod: identidade[j] for cod, j in coluna.items()}
+    em_andamento = []
+
+    def resolver(cod):
+        if cod in coeficientes:
+            return coeficientes[cod]
+        if cod in em_andamento:
+            ciclo = em_andamento[em_andamento.index(cod):] + [cod]
+            raise ValueError(f"Estrutura do DFC: ciclo nas fórmulas ({' -> '.join(ciclo)}).")
+        em_andamento.append(cod)
+        vetor = np.zeros(len(analiticas))
+        for componente in formulas[cod]:
+            vetor += resolver(componente)
+        em_andamento.pop()
+        coeficientes[cod] = vetor
+        return vetor
+
+    for cod in formulas:
+        resolver(cod)
+
+    matriz = np.zeros((len(estrutura), len(analiticas)))
+    for i, linha in enumerate(estrutura):
+        if linha["tipo"] == "analitica" or linha["tipo"] in TIPOS_CALCULADOS:
+            matriz[i] = coeficientes[linha["cod"]]
+    return EstruturaCompilada(analiticas, matriz)
+
+
+# Compilada uma vez por processo (erros na estrutura aparecem na importação)
+ESTRUTURA_COMPILADA = compilar_estrutura(ESTRUTURA_DFC)
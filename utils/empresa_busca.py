@@ -0,0 +1,161 @@
+"""
+empresa_busca.py - Busca aproximada de empresas em memória (search-as-you-type)
+
+Índice invertido de trigramas sobre o catálogo de empresas em cache
+(utils.empresa_db.obter_catalogo_empresas). A normalização remove acentos e
+caixa, e a pontuação segue a similaridade do pg_trgm:
+    |trigramas em comum| / |união dos trigramas|
+Correspondências por substring vêm sempre primeiro.
+
+Funções disponíveis:
+- buscar_empresas_memoria(termo, tipo_busca="razao_social", limite=50)
+- caixa_busca_empresas(key)
+"""
+
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import streamlit as st
+
+from utils.empresa_db import obter_catalogo_empresas, buscar_empresas
+
+try:
+    from st_keyup import st_keyup  # caixa de texto que dispara a cada tecla
+    _KEYUP_DISPONIVEL = True
+except ImportError:
+    _KEYUP_DISPONIVEL = False
+
+
+SIMILARIDADE_MINIMA = 0.3  # mesmo padrão do pg_trgm
+DEBOUNCE_MS = 300
+
+_INDICE = {}
+_LOCK_INDICE = threading.Lock()
+
+
+def normalizar_texto(texto) -> str:
+    """Minúsculas, sem acento e apenas letras/números separados por espaço."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = texto.encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", " ", texto).strip()
+
+
+def trigramas(texto: str) -> set:
+    """Trigramas no estilo pg_trgm: cada palavra com 2 espaços antes e 1 depois."""
+    resultado = set()
+    for palavra in texto.split():
+        p = f"  {palavra} "
+        resultado.update(p[i:i + 3] for i in range(len(p) - 2))
+    return resultado
+
+
+class _IndiceTrigramas:
+    __slots__ = ("textos", "qtd_trigramas", "postings")
+
+    def __init__(self, textos):
+        self.textos = textos
+        self.qtd_trigramas = np.zeros(len(textos), dtype=np.int32)
+        postings = {}
+        for i, texto in enumerate(textos):
+            tgs = trigramas(texto)
+            self.qtd_trigramas[i] = len(tgs)
+            for tg in tgs:
+                postings.setdefault(tg, []).append(i)
+        self.postings = {tg: np.asarray(ids, dtype=np.int32)
+                         for tg, ids in postings.items()}
+
+    def pontuar(self, consulta: str) -> np.ndarray:
+        """Pontuação (0..1, 2 = substring) de cada documento para a consulta."""
+        n = len(self.textos)
+        tgs_consulta = trigramas(consulta)
+        if not tgs_consulta or n == 0:
+            return np.zeros(n)
+
+        listas = [self.postings[tg] for tg in tgs_consulta if tg in self.postings]
+        comuns = np.bincount(np.concatenate(listas), minlength=n) if listas \
+            else np.zeros(n, dtype=np.int64)
+        uniao = self.qtd_trigramas + len(tgs_consulta) - comuns
+        pontos = np.divide(comuns, uniao, out=np.zeros(n), where=uniao > 0)
+
+        substring = np.fromiter((consulta in t for t in self.textos), dtype=bool, count=n)
+        pontos[substring] = 2.0
+        return pontos
+
+
+def _obter_indices(catalogo: dict) -> dict:
+    """Índices do catálogo atual (reconstruídos quando o catálogo é invalidado)."""
+    if _INDICE.get("catalogo") is catalogo:
+        return _INDICE["indices"]
+
+    with _LOCK_INDICE:
+        if _INDICE.get("catalogo") is not catalogo:
+            df = catalogo["df"]
+            nomes = [normalizar_texto(n) for n in df["Empresa"]]
+            cnpjs = ["".join(filter(str.isdigit, str(c or ""))) for c in df["CNPJ"]]
+            _INDICE["indices"] = {
+                "nome": _IndiceTrigramas(nomes),
+                "cnpj": cnpjs,
+            }
+            _INDICE["catalogo"] = catalogo
+        return _INDICE["indices"]
+
+
+def buscar_empresas_memoria(termo, tipo_busca="razao_social", limite=50):
+    """
+    Busca empresas no catálogo em memória (milissegundos, sem ida ao banco).
+
+    Args:
+        termo: termo de busca (nome com ou sem acento / erros de digitação, ou CNPJ)
+        tipo_busca: 'razao_social', 'cnpj', 'abreviacao'
+        limite: quantidade máxima de resultados
+
+    Returns:
+        DataFrame com resultados (mesmas colunas de listar_empresas)
+    """
+    try:
+        catalogo = obter_catalogo_empresas()
+        indices = _obter_indices(catalogo)
+        df = catalogo["df_formatado"]
+
+        if tipo_busca == "cnpj":
+            digitos = "".join(filter(str.isdigit, str(termo)))
+            if not digitos:
+                return df.iloc[0:0].copy()
+            mascara = np.fromiter(
+                (digitos in c for c in indices["cnpj"]), dtype=bool, count=len(df))
+            return df[mascara].head(limite).copy()
+
+        consulta = normalizar_texto(termo)
+        if not consulta:
+            return df.iloc[0:0].copy()
+
+        pontos = indices["nome"].pontuar(consulta)
+        candidatos = np.flatnonzero(pontos >= SIMILARIDADE_MINIMA)
+        # maiores pontuações primeiro; empate desfeito pela ordem do catálogo
+        ordem = candidatos[np.argsort(-pontos[candidatos], kind="stable")][:limite]
+        return df.iloc[ordem].copy()
+
+    except Exception as e:
+        print(f"❌ Erro na busca em memória, usando o banco: {e}")
+        return buscar_empresas(termo, tipo_busca, limite)
+
+
+def caixa_busca_empresas(key: str, placeholder: str = "") -> str:
+    """
+    Caixa de texto da busca. Com streamlit-keyup instalado, a página é
+    reexecutada enquanto o usuário digita (com debounce); sem ele, ao sair do campo.
+    """
+    if _KEYUP_DISPONIVEL:
+        return st_keyup(
+            "Digite o termo de busca:",
+            placeholder=placeholder,
+            debounce=DEBOUNCE_MS,
+            key=key
+        ) or ""
+    return st.text_input(
+        "Digite o termo de busca:",
+        placeholder=placeholder,
+        key=key
+    )
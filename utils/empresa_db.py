@@ -2,27 +2,40 @@
 empresa_db.py - Funções de banco de dados para gestão de empresas
 """
 
+import numpy as np
 import pandas as pd
 from database import conectar, desconectar
+from utils import cache
 
 
-def listar_empresas(filtro_status=None):
-    """
-    Lista todas as empresas cadastradas
+COLUNAS_EMPRESA = [
+    "cod_empresa", "Empresa", "CNPJ", "Ativa",
+    "Controladora", "Controlada", "Sede", "Consórcio", "SCP"
+]
+COLUNAS_BOOL_EMPRESA = ["Ativa", "Controladora",
+                        "Controlada", "Sede", "Consórcio", "SCP"]
 
-    Args:
-        filtro_status: 'ativa', 'inativa' ou None (todas)
 
-    Returns:
-        DataFrame com as empresas
-    """
+def _formatar_bool_empresas(df):
+    """Formata os campos booleanos como '✅ Sim' / '❌ Não'."""
+    df = df.copy()
+    for col in COLUNAS_BOOL_EMPRESA:
+        df[col] = np.where(df[col].fillna(False).astype(bool), "✅ Sim", "❌ Não")
+    return df
+
+
+# ----------------------------------------------------------------------
+# Catálogo de empresas em cache (compartilhado entre sessões do processo)
+# ----------------------------------------------------------------------
+_CATALOGO = cache.namespace("catalogo_empresas", ("catalogo",))
+
+
+def _carregar_catalogo():
     conn = None
     try:
         conn = conectar()
         cursor = conn.cursor()
-
-        # Query base
-        query = """
+        cursor.execute("""
             SELECT 
                 cod_empresa,
                 nome_empresa,
@@ -34,41 +47,79 @@ def listar_empresas(filtro_status=None):
                 fl_csr,
                 fl_scp
             FROM public.ebisa_empresa_sienge
-        """
+            ORDER BY cod_empresa
+        """)
+        df = pd.DataFrame(cursor.fetchall(), columns=COLUNAS_EMPRESA)
+    finally:
+        if conn:
+            desconectar(conn)
 
-        # Aplicar filtro de status
-        if filtro_status == "ativa":
-            query += " WHERE fl_ativo = true"
-        elif filtro_status == "inativa":
-            query += " WHERE fl_ativo = false"
+    for col in COLUNAS_BOOL_EMPRESA:
+        df[col] = df[col].fillna(False).astype(bool)
 
-        query += " ORDER BY cod_empresa"
+    labels = sorted(
+        (df["cod_empresa"].astype(str) + " - " + df["Empresa"].astype(str)).tolist())
 
-        cursor.execute(query)
-        resultados = cursor.fetchall()
+    return {
+        "df": df,                                   # tipado (booleanos reais)
+        "df_formatado": _formatar_bool_empresas(df),  # pronto para exibição
+        "labels": labels,                           # "cod - nome", ordenado
+    }
 
-        # Criar DataFrame
-        colunas = [
-            "cod_empresa", "Empresa", "CNPJ", "Ativa",
-            "Controladora", "Controlada", "Sede", "Consórcio", "SCP"
-        ]
 
-        df = pd.DataFrame(resultados, columns=colunas)
+def obter_catalogo_empresas() -> dict:
+    """
+    Retorna o catálogo de empresas (carregado uma vez e mantido em memória).
+    Chaves: 'df' (tipado), 'df_formatado' (✅/❌) e 'labels' ('cod - nome').
+    Os DataFrames são compartilhados: não alterar sem .copy().
+    """
+    return _CATALOGO.obter(("catalogo",), _carregar_catalogo)
+
+
+def invalidar_catalogo_empresas():
+    """Descarta o catálogo em cache (chamado após gravar empresas)."""
+    _CATALOGO.invalidar()
+
+
+def listar_labels_empresas():
+    """
+    Lista de rótulos 'cod_empresa - nome_empresa' (ordenada) para filtros.
+
+    Returns:
+        list de str (vazia em caso de erro)
+    """
+    try:
+        return list(obter_catalogo_empresas()["labels"])
+    except Exception as e:
+        print(f"❌ Erro ao listar empresas: {e}")
+        return []
+
+
+def listar_empresas(filtro_status=None):
+    """
+    Lista todas as empresas cadastradas
 
-        # Formatar campos booleanos
-        bool_cols = ["Ativa", "Controladora",
-                     "Controlada", "Sede", "Consórcio", "SCP"]
-        for col in bool_cols:
-            df[col] = df[col].apply(lambda x: "✅ Sim" if x else "❌ Não")
+    Args:
+        filtro_status: 'ativa', 'inativa' ou None (todas)
 
-        return df
+    Returns:
+        DataFrame com as empresas
+    """
+    try:
+        catalogo = obter_catalogo_empresas()
+        df = catalogo["df_formatado"]
+
+        # Aplicar filtro de status
+        if filtro_status == "ativa":
+            df = df[catalogo["df"]["Ativa"]]
+        elif filtro_status == "inativa":
+            df = df[~catalogo["df"]["Ativa"]]
+
+        return df.copy()
 
     except Exception as e:
         print(f"❌ Erro ao listar empresas: {e}")
         return pd.DataFrame()
-    finally:
-        if conn:
-            desconectar(conn)
 
 
 def buscar_empresa_por_cnpj(cnpj):
@@ -130,13 +181,18 @@ def buscar_empresa_por_cnpj(cnpj):
             desconectar(conn)
 
 
-def buscar_empresas(termo, tipo_busca="nome_empresa"):
+def buscar_empresas(termo, tipo_busca="nome_empresa", limite=50):
     """
-    Busca empresas por termo
+    Busca empresas por termo no banco (índices trigram/GIN - sql/002)
+
+    - Nome: ILIKE sem acento ou similaridade trigram (tolera erros de digitação),
+      ordenado pela similaridade
+    - CNPJ: dígitos contidos no CNPJ (apenas números)
 
     Args:
         termo: termo de busca
-        tipo_busca: 'razao_social', 'cnpj', 'abreviacao'
+        tipo_busca: 'razao_social' / 'nome_empresa', 'cnpj', 'abreviacao'
+        limite: quantidade máxima de resultados
 
     Returns:
         DataFrame com resultados
@@ -161,36 +217,28 @@ def buscar_empresas(termo, tipo_busca="nome_empresa"):
             WHERE
         """
 
-        if tipo_busca == "nome_empresa":
-            query += " nome_empresa ILIKE %s"
-            parametro = f"%{termo}%"
-        elif tipo_busca == "cnpj":
+        if tipo_busca == "cnpj":
             cnpj_limpo = ''.join(filter(str.isdigit, termo))
-            query += " cnpj_empresa LIKE %s"
-            parametro = f"%{cnpj_limpo}%"
-        # elif tipo_busca == "abreviacao":
-        #    query += " abreviacao ILIKE %s"
-        #    parametro = f"%{termo}%"
-
-        query += " ORDER BY nome_empresa"
-
-        cursor.execute(query, (parametro,))
+            query += """ public.f_somente_digitos(cnpj_empresa) LIKE %s
+                ORDER BY nome_empresa
+                LIMIT %s"""
+            params = (f"%{cnpj_limpo}%", limite)
+        else:
+            # razao_social / nome_empresa / abreviacao -> nome da empresa
+            query += """ (public.f_unaccent_lower(nome_empresa) LIKE public.f_unaccent_lower(%s)
+                   OR public.f_unaccent_lower(nome_empresa) %% public.f_unaccent_lower(%s))
+                ORDER BY similarity(public.f_unaccent_lower(nome_empresa),
+                                    public.f_unaccent_lower(%s)) DESC,
+                         nome_empresa
+                LIMIT %s"""
+            params = (f"%{termo}%", termo, termo, limite)
+
+        cursor.execute(query, params)
         resultados = cursor.fetchall()
 
-        colunas = [
-            "cod_empresa", "Empresa", "CNPJ", "Ativa",
-            "Controladora", "Controlada", "Sede", "Consórcio", "SCP"
-        ]
-
-        df = pd.DataFrame(resultados, columns=colunas)
-
-        # Formatar campos booleanos
-        bool_cols = ["Ativa", "Controladora",
-                     "Controlada", "Sede", "Consórcio", "SCP"]
-        for col in bool_cols:
-            df[col] = df[col].apply(lambda x: "✅ Sim" if x else "❌ Não")
+        df = pd.DataFrame(resultados, columns=COLUNAS_EMPRESA)
 
-        return df
+        return _formatar_bool_empresas(df)
 
     except Exception as e:
         print(f"❌ Erro ao buscar empresas: {e}")
@@ -254,6 +302,7 @@ def cadastrar_empresa(dados):
         id_empresa = cursor.fetchone()[0]
 
         conn.commit()
+        invalidar_catalogo_empresas()
 
         return (True, "✅ Empresa cadastrada com sucesso!", id_empresa)
 
@@ -311,6 +360,7 @@ def atualizar_empresa(id_empresa, dados):
 
         cursor.execute(query, valores)
         conn.commit()
+        invalidar_catalogo_empresas()
 
         if cursor.rowcount > 0:
             return (True, "✅ Empresa atualizada com sucesso!")
@@ -350,6 +400,7 @@ def deletar_empresa(id_empresa):
 
         cursor.execute(query, (id_empresa,))
         conn.commit()
+        invalidar_catalogo_empresas()
 
         if cursor.rowcount > 0:
             return (True, "✅ Empresa inativada com sucesso!")
@@ -0,0 +1,278 @@
+"""
+empresa_importacao.py - Importação em lote de empresas a partir da exportação do Sienge
+
+1) Lê a planilha/CSV exportada do Sienge e normaliza os cabeçalhos (MAP_COLS_EMPRESA)
+2) Normaliza e valida os CNPJs de forma vetorizada (dígitos verificadores em NumPy)
+3) Grava todas as linhas válidas em ebisa_empresa_sienge com um único
+   INSERT ... ON CONFLICT no CNPJ (índice único de sql/003)
+
+Funções disponíveis:
+- validar_cnpjs(serie)
+- preparar_df_empresas(uploaded_file)
+- importar_empresas_lote(uploaded_file)
+"""
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from database import conectar, desconectar
+from utils.empresa_db import invalidar_catalogo_empresas
+from utils.plano_contas_db import (
+    _coerce_bool,
+    _tentar_ler_csv,
+    normalizar_cabecalhos
+)
+
+
+# Nome interno (coluna de ebisa_empresa_sienge) -> alternativas na exportação
+MAP_COLS_EMPRESA = {
+    "cod_empresa": ["cod_empresa", "Código", "Código da Empresa", "Cód. Empresa", "Empresa Código"],
+    "nome_empresa": ["nome_empresa", "Nome", "Razão Social", "Nome da Empresa", "Empresa"],
+    "cnpj_empresa": ["cnpj_empresa", "CNPJ", "CNPJ da Empresa"],
+    "fl_ativo": ["fl_ativo", "Ativa", "Ativo", "Situação"],
+    "fl_controladora": ["fl_controladora", "Controladora"],
+    "fl_controlada": ["fl_controlada", "Controlada"],
+    "fl_sede": ["fl_sede", "Sede"],
+    "fl_csr": ["fl_csr", "Consórcio", "CSR"],
+    "fl_scp": ["fl_scp", "SCP"],
+}
+COLUNAS_FLAGS = ["fl_ativo", "fl_controladora", "fl_controlada", "fl_sede", "fl_csr", "fl_scp"]
+
+# Situação da empresa (texto do Sienge ou booleano) -> fl_ativo; fora da tabela = linha rejeitada
+SITUACAO_ATIVO = {
+    "ativa": True, "ativo": True, "inativa": False, "inativo": False,
+    "true": True, "t": True, "1": True, "s": True, "sim": True, "y": True, "yes": True,
+    "false": False, "f": False, "0": False, "n": False, "nao": False, "não": False, "no": False,
+}
+
+_PESOS_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_PESOS_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def _digito_verificador(digitos: np.ndarray, pesos: np.ndarray) -> np.ndarray:
+    resto = (digitos[:, :len(pesos)] @ pesos) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def validar_cnpjs(serie: pd.Series) -> pd.DataFrame:
+    """
+    Normaliza e valida uma série de CNPJs (com ou sem máscara) sem laço em Python.
+
+    Returns:
+        DataFrame alinhado com a série: 'cnpj' (14 dígitos), 'cnpj_form'
+        (00.000.000/0000-00) e 'valido' (bool)
+    """
+    digitos = serie.astype("string").str.replace(r"\D", "", regex=True).fillna("")
+    # Excel costuma perder os zeros à esquerda de CNPJs numéricos
+    digitos = digitos.where(digitos.str.len().between(1, 14), "").str.zfill(14)
+    tamanho_ok = digitos.str.len().eq(14).to_numpy()
+
+    matriz = np.zeros((len(digitos), 14), dtype=np.int64)
+    if tamanho_ok.any():
+        validos = digitos[tamanho_ok].to_numpy(dtype=str)
+        matriz[tamanho_ok] = (
+            np.frombuffer("".join(validos).encode("ascii"), dtype=np.uint8)
+            .reshape(-1, 14) - ord("0")
+        )
+
+    dv1 = _digito_verificador(matriz, _PESOS_DV1)
+    dv2 = _digito_verificador(matriz, _PESOS_DV2)
+    todos_iguais = (matriz == matriz[:, :1]).all(axis=1)
+
+    valido = tamanho_ok & ~todos_iguais & (matriz[:, 12] == dv1) & (matriz[:, 13] == dv2)
+
+    cnpj = digitos.where(valido, None)
+    cnpj_form = (cnpj.str[:2] + "." + cnpj.str[2:5] + "." + cnpj.str[5:8]
+                 + "/" + cnpj.str[8:12] + "-" + cnpj.str[12:14])
+
+    return pd.DataFrame({"cnpj": cnpj, "cnpj_form": cnpj_form, "valido": valido},
+                        index=serie.index)
+
+
+def preparar_df_empresas(uploaded_file):
+    """
+    Lê e normaliza a exportação de empresas do Sienge.
+
+    Returns:
+        tuple (df: DataFrame ou None, rejeitadas: DataFrame, erro: str ou None)
+        As linhas rejeitadas trazem a coluna 'motivo'.
+    """
+    if uploaded_file is None:
+        return None, pd.DataFrame(), "Arquivo não informado."
+
+    if uploaded_file.name.lower().endswith(".csv"):
+        df = _tentar_ler_csv(uploaded_file)
+        if df is None:
+            return None, pd.DataFrame(), "Erro ao ler CSV (codificações/sep testados sem sucesso)."
+    else:
+        uploaded_file.seek(0)
+        df = pd.read_excel(uploaded_file, sheet_name=0, dtype=str)
+
+    df.columns = [str(c).strip() for c in df.columns]
+    df = normalizar_cabecalhos(df, MAP_COLS_EMPRESA)
+
+    faltantes = [c for c in ("cod_empresa", "nome_empresa", "cnpj_empresa")
+                 if c not in df.columns]
+    if faltantes:
+        return None, pd.DataFrame(), (
+            "Arquivo inválido. Faltam colunas obrigatórias após normalização.\n"
+            f"Faltando: {', '.join(faltantes)}\n"
+            f"Colunas finais do DF: {', '.join(df.columns)}"
+        )
+
+    df = df.dropna(how="all").reset_index(drop=True)
+    df["linha"] = df.index + 2  # linha na planilha (cabeçalho = 1)
+
+    df["nome_empresa"] = df["nome_empresa"].astype("string").str.strip()
+    df["cod_empresa"] = pd.to_numeric(df["cod_empresa"], errors="coerce").astype("Int64")
+
+    cnpjs = validar_cnpjs(df["cnpj_empresa"])
+    df["cnpj_empresa"] = cnpjs["cnpj_form"]
+
+    # Células vazias ficam NULL (não sobrescrevem a flag já cadastrada)
+    situacao_invalida = pd.Series(False, index=df.index)
+    for col in COLUNAS_FLAGS:
+        if col not in df.columns:
+            continue
+        texto = df[col].astype("string").str.strip()
+        vazio = texto.isna() | texto.eq("")
+        if col == "fl_ativo":
+            valores = texto.str.lower().map(SITUACAO_ATIVO)
+            situacao_invalida = ~vazio & valores.isna()
+        else:
+            valores = texto.map(_coerce_bool, na_action="ignore")
+        df[col] = valores.astype(object).where(~vazio & valores.notna(), None)
+
+    motivo = pd.Series(None, index=df.index, dtype=object)
+    motivo = motivo.mask(df["cod_empresa"].isna(), "Código da empresa inválido")
+    motivo = motivo.mask(motivo.isna() & df["nome_empresa"].fillna("").eq(""), "Nome vazio")
+    motivo = motivo.mask(motivo.isna() & ~cnpjs["valido"], "CNPJ inválido")
+    motivo = motivo.mask(motivo.isna() & situacao_invalida,
+                         "Situação inválida (use Ativa/Inativa)")
+    # ON CONFLICT não aceita a mesma chave duas vezes no mesmo comando
+    motivo = motivo.mask(motivo.isna() & cnpjs["cnpj"].duplicated(keep="last"),
+                         "CNPJ repetido no arquivo (mantida a última linha)")
+    motivo = motivo.mask(motivo.isna() & df["cod_empresa"].duplicated(keep="last"),
+                         "Código repetido no arquivo (mantida a última linha)")
+
+    rejeitadas = df[motivo.notna()].assign(motivo=motivo[motivo.notna()])
+    return df[motivo.isna()].copy(), rejeitadas, None
+
+
+def importar_empresas_lote(uploaded_file) -> dict:
+    """
+    Insere/atualiza em lote as empresas da exportação do Sienge.
+
+    - Empresa nova (CNPJ inexistente): inserida com o código do arquivo;
+      flags vazias no arquivo entram como FALSE.
+    - CNPJ já cadastrado: atualiza nome e as flags preenchidas no arquivo
+      (células vazias e o cod_empresa existente são mantidos).
+    - Código já usado por outra empresa (outro CNPJ): linha rejeitada.
+
+    Returns:
+        dict com 'success', 'message', 'inseridas', 'atualizadas' e 'rejeitadas' (DataFrame)
+    """
+    conn = None
+    try:
+        df, rejeitadas, erro = preparar_df_empresas(uploaded_file)
+        if erro:
+            return {"success": False, "message": erro}
+
+        conn = conectar()
+        cur = conn.cursor()
+
+        # Códigos já usados por outro CNPJ (uma única consulta)
+        if not df.empty:
+            cur.execute(
+                """
+                SELECT cod_empresa, public.f_somente_digitos(cnpj_empresa)
+                FROM public.ebisa_empresa_sienge
+                WHERE cod_empresa = ANY(%s)
+                """,
+                (df["cod_empresa"].astype(int).tolist(),)
+            )
+            existentes = pd.DataFrame(cur.fetchall(), columns=["cod_empresa", "cnpj_banco"])
+            cnpj_banco = df["cod_empresa"].map(
+                existentes.set_index("cod_empresa")["cnpj_banco"])
+            conflito = (
+                cnpj_banco.notna()
+                & cnpj_banco.ne(df["cnpj_empresa"].str.replace(r"\D", "", regex=True))
+            ).fillna(False).astype(bool)
+            if conflito.any():
+                rejeitadas = pd.concat([
+                    rejeitadas,
+                    df[conflito].assign(motivo="Código já usado por outra empresa (outro CNPJ)")
+                ], ignore_index=True)
+                df = df[~conflito]
+
+        inseridas = atualizadas = 0
+        if not df.empty:
+            flags = [c for c in COLUNAS_FLAGS if c in df.columns]
+
+            # Empresa nova não tem valor a manter: flag vazia vira FALSE.
+            # NULL só segue para os CNPJs já cadastrados (COALESCE do UPDATE)
+            digitos = df["cnpj_empresa"].str.replace(r"\D", "", regex=True)
+            cur.execute(
+                """
+                SELECT public.f_somente_digitos(cnpj_empresa)
+                FROM public.ebisa_empresa_sienge
+                WHERE public.f_somente_digitos(cnpj_empresa) = ANY(%s)
+                """,
+                (digitos.tolist(),)
+            )
+            nova = ~digitos.isin({cnpj for (cnpj,) in cur.fetchall()})
+            for c in flags:
+                df[c] = df[c].mask(nova & df[c].isna(), False)
+            colunas = ["cod_empresa", "nome_empresa", "cnpj_empresa"] + flags
+
+            df_rows = df.assign(cod_empresa=df["cod_empresa"].astype(int))[colunas].astype(object)
+            rows = list(df_rows.where(df_rows.notna(), None).itertuples(index=False, name=None))
+
+            # Flag vazia no arquivo (NULL, só em empresa já cadastrada) mantém o valor atual
+            atualizar = ", ".join(
+                [f"{c} = EXCLUDED.{c}" for c in ["nome_empresa", "cnpj_empresa"]]
+                + [f"{c} = COALESCE(EXCLUDED.{c}, ebisa_empresa_sienge.{c})" for c in flags])
+
+            # xmax = 0 identifica as linhas inseridas (as atualizadas têm xmax preenchido)
+            resultado = execute_values(
+                cur,
+                f"""
+                INSERT INTO public.ebisa_empresa_sienge ({", ".join(colunas)})
+                VALUES %s
+                ON CONFLICT (public.f_somente_digitos(cnpj_empresa))
+                DO UPDATE SET {atualizar}
+                RETURNING (xmax = 0)
+                """,
+                rows,
+                page_size=len(df),
+                fetch=True
+            )
+            inseridas = sum(1 for (nova,) in resultado if nova)
+            atualizadas = len(resultado) - inseridas
+
+        conn.commit()
+        invalidar_catalogo_empresas()
+
+        return {
+            "success": True,
+            "message": (
+                f"✅ {inseridas} empresa(s) inserida(s), {atualizadas} atualizada(s), "
+                f"{len(rejeitadas)} rejeitada(s)."
+            ),
+            "inseridas": inseridas,
+            "atualizadas": atualizadas,
+            "rejeitadas": rejeitadas,
+        }
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro em importar_empresas_lote: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"success": False, "message": str(e)}
+
+    finally:
+        if conn:
+            desconectar(conn)
@@ -0,0 +1,326 @@
+"""
+folha_agregacao.py - Agregações da folha calculadas no Postgres
+
+Os painéis de folha recebem apenas resultados agregados (algumas dezenas ou
+centenas de linhas) em vez das linhas de cada funcionário. O painel anual e
+a tendência plurianual leem só daqui; o painel mensal usa o cubo do mês
+(utils.folha_cubo) para o que precisa das linhas do mês (histograma, maiores
+líquidos, troca instantânea de centro de custo), e o detalhamento é
+paginado no banco (utils.folha_db).
+
+Por padrão (usar_resumo=True) as consultas leem o resumo mensal mantido em
+ebisa_tab_folha_resumo (sql/005, utils.folha_resumo); com usar_resumo=False
+agregam direto a ebisa_tab_folha. Histograma e maiores líquidos precisam das
+linhas individuais e sempre leem a tabela bruta.
+
+Filtros comuns: ano (obrigatório), mes (None = ano inteiro) e
+centro_custo (None/"Todos" = todos).
+
+CACHE_FOLHA é o namespace de cache dos painéis de folha, com chaves
+(consulta, ano, mes, centro_custo); o refresh do resumo invalida os meses
+recalculados (utils.folha_resumo). Os cubos de mês guardam as linhas do mês
+e ficam limitados a CUBOS_EM_MEMORIA por processo (saem os usados há mais
+tempo), mesmo sem ttl enquanto o listener de notificações está conectado.
+
+Funções disponíveis:
+- listar_centros_custo(ano, mes=None, usar_resumo=True)
+- kpis_folha(ano, mes=None, centro_custo=None, usar_resumo=True)
+- evolucao_mensal(ano, centro_custo=None, usar_resumo=True)
+- evolucao_mensal_anos(anos, centro_custo=None)
+- top_centros_custo(ano, mes=None, centro_custo=None, limite=10, usar_resumo=True)
+- top_cargos(ano, mes=None, centro_custo=None, limite=5, usar_resumo=True)
+- distribuicao_vinculo(ano, mes=None, centro_custo=None, usar_resumo=True)
+- faixas_salariais(ano, mes, centro_custo=None, qtd_faixas=20)
+- maiores_liquidos(ano, mes, centro_custo=None, limite=5)
+"""
+
+import pandas as pd
+from database import conectar, desconectar
+from utils import cache
+
+
+CUBOS_EM_MEMORIA = 6
+
+CACHE_FOLHA = cache.namespace("folha", ("consulta", "ano", "mes", "centro_custo"), ttl=600,
+                              limites={"cubo": CUBOS_EM_MEMORIA})
+
+
+_COLUNAS_TEXTO = {"nome_centro_custo_rh", "nome_cargo", "vinculo", "nome_funcionario"}
+
+
+def _filtros(ano, mes=None, centro_custo=None):
+    """Cláusula WHERE e parâmetros dos filtros comuns."""
+    condicoes = ["ano = %s"]
+    params = [int(ano)]
+    if mes is not None:
+        condicoes.append("mes = %s")
+        params.append(int(mes))
+    if centro_custo and centro_custo != "Todos":
+        condicoes.append("nome_centro_custo_rh = %s")
+        params.append(centro_custo)
+    return " AND ".join(condicoes), params
+
+
+def _filtros_resumo(ano, mes=None, centro_custo=None, nivel=None):
+    """
+    Filtros sobre o resumo. Sem nível informado: nível 1 (centro de custo)
+    quando há filtro de centro de custo, senão nível 0 (mês inteiro).
+    """
+    where, params = _filtros(ano, mes, centro_custo)
+    if nivel is None:
+        nivel = 1 if centro_custo and centro_custo != "Todos" else 0
+    return f"{where} AND nivel = {int(nivel)}", params
+
+
+def _origem(ano, mes, centro_custo, usar_resumo, nivel):
+    """Tabela e filtros: resumo no nível informado ou a folha bruta."""
+    if usar_resumo:
+        return ("public.ebisa_tab_folha_resumo",
+                *_filtros_resumo(ano, mes, centro_custo, nivel))
+    return ("public.ebisa_tab_folha", *_filtros(ano, mes, centro_custo))
+
+
+def _consultar(query: str, params, colunas: list) -> pd.DataFrame:
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        df = pd.DataFrame(cursor.fetchall(), columns=colunas)
+    finally:
+        if conn:
+            desconectar(conn)
+
+    # numeric -> Decimal: converter para float64 para os gráficos
+    for col in df.columns:
+        if col not in _COLUNAS_TEXTO:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def listar_centros_custo(ano, mes=None, usar_resumo=True) -> list:
+    """Centros de custo com folha no período (para o filtro)."""
+    if usar_resumo:
+        tabela = "public.ebisa_tab_folha_resumo"
+        where, params = _filtros_resumo(ano, mes, nivel=1)
+    else:
+        tabela = "public.ebisa_tab_folha"
+        where, params = _filtros(ano, mes)
+    df = _consultar(
+        f"""
+        SELECT DISTINCT nome_centro_custo_rh
+        FROM {tabela}
+        WHERE {where} AND nome_centro_custo_rh IS NOT NULL
+        ORDER BY nome_centro_custo_rh
+        """,
+        params, ["nome_centro_custo_rh"]
+    )
+    return df["nome_centro_custo_rh"].tolist()
+
+
+def kpis_folha(ano, mes=None, centro_custo=None, usar_resumo=True) -> dict:
+    """
+    Totais do período e headcount.
+    Para o ano inteiro, o headcount é a média mensal de funcionários distintos.
+
+    Returns:
+        dict com proventos_total, liquido, valor_fgts, descontos_total e headcount
+    """
+    if usar_resumo:
+        # Uma linha por mês no nível escolhido: headcount já é distinto no mês
+        where, params = _filtros_resumo(ano, mes, centro_custo)
+        por_mes = f"""
+            SELECT mes, proventos_total, liquido, valor_fgts, descontos_total, headcount
+            FROM public.ebisa_tab_folha_resumo
+            WHERE {where}
+        """
+    else:
+        where, params = _filtros(ano, mes, centro_custo)
+        por_mes = f"""
+            SELECT mes,
+                   SUM(proventos_total)            AS proventos_total,
+                   SUM(liquido)                    AS liquido,
+                   SUM(valor_fgts)                 AS valor_fgts,
+                   SUM(descontos_total)            AS descontos_total,
+                   COUNT(DISTINCT cod_funcionario) AS headcount
+            FROM public.ebisa_tab_folha
+            WHERE {where}
+            GROUP BY mes
+        """
+
+    df = _consultar(
+        f"""
+        WITH por_mes AS ({por_mes})
+        SELECT COALESCE(SUM(proventos_total), 0),
+               COALESCE(SUM(liquido), 0),
+               COALESCE(SUM(valor_fgts), 0),
+               COALESCE(SUM(descontos_total), 0),
+               COALESCE(AVG(headcount), 0)
+        FROM por_mes
+        """,
+        params, ["proventos_total", "liquido", "valor_fgts", "descontos_total", "headcount"]
+    )
+    kpis = {k: float(v) for k, v in df.iloc[0].items()}
+    kpis["headcount"] = int(round(kpis["headcount"]))
+    return kpis
+
+
+def evolucao_mensal(ano, centro_custo=None, usar_resumo=True) -> pd.DataFrame:
+    """Totais e headcount por mês do ano (até 12 linhas)."""
+    colunas = ["mes", "proventos_total", "liquido", "valor_fgts",
+               "descontos_total", "qtd_funcionarios"]
+    if usar_resumo:
+        where, params = _filtros_resumo(ano, None, centro_custo)
+        return _consultar(
+            f"""
+            SELECT mes, proventos_total, liquido, valor_fgts, descontos_total, headcount
+            FROM public.ebisa_tab_folha_resumo
+            WHERE {where}
+            ORDER BY mes
+            """,
+            params, colunas
+        )
+
+    where, params = _filtros(ano, None, centro_custo)
+    return _consultar(
+        f"""
+        SELECT mes,
+               SUM(proventos_total)            AS proventos_total,
+               SUM(liquido)                    AS liquido,
+               SUM(valor_fgts)                 AS valor_fgts,
+               SUM(descontos_total)            AS descontos_total,
+               COUNT(DISTINCT cod_funcionario) AS qtd_funcionarios
+        FROM public.ebisa_tab_folha
+        WHERE {where}
+        GROUP BY mes
+        ORDER BY mes
+        """,
+        params, colunas
+    )
+
+
+def evolucao_mensal_anos(anos, centro_custo=None) -> pd.DataFrame:
+    """
+    Totais e headcount por (ano, mes) de vários anos, em uma consulta ao resumo.
+    Mesmas colunas de evolucao_mensal, mais 'ano'.
+    """
+    anos = [int(a) for a in anos]
+    condicoes = ["ano = ANY(%s)"]
+    params = [anos]
+    if centro_custo and centro_custo != "Todos":
+        condicoes.append("nivel = 1 AND nome_centro_custo_rh = %s")
+        params.append(centro_custo)
+    else:
+        condicoes.append("nivel = 0")
+    return _consultar(
+        f"""
+        SELECT ano, mes, proventos_total, liquido, valor_fgts, descontos_total, headcount
+        FROM public.ebisa_tab_folha_resumo
+        WHERE {" AND ".join(condicoes)}
+        ORDER BY ano, mes
+        """,
+        params, ["ano", "mes", "proventos_total", "liquido", "valor_fgts",
+                 "descontos_total", "qtd_funcionarios"]
+    )
+
+
+def top_centros_custo(ano, mes=None, centro_custo=None, limite=10,
+                      usar_resumo=True) -> pd.DataFrame:
+    """Centros de custo com maior valor bruto (ordem crescente, para barra horizontal)."""
+    tabela, where, params = _origem(ano, mes, centro_custo, usar_resumo, nivel=1)
+    df = _consultar(
+        f"""
+        SELECT nome_centro_custo_rh, SUM(proventos_total) AS proventos_total
+        FROM {tabela}
+        WHERE {where}
+        GROUP BY nome_centro_custo_rh
+        ORDER BY proventos_total DESC NULLS LAST
+        LIMIT %s
+        """,
+        params + [int(limite)], ["nome_centro_custo_rh", "proventos_total"]
+    )
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def top_cargos(ano, mes=None, centro_custo=None, limite=5, usar_resumo=True) -> pd.DataFrame:
+    """Cargos com maior custo no período (ordem crescente, para barra horizontal)."""
+    tabela, where, params = _origem(ano, mes, centro_custo, usar_resumo, nivel=2)
+    df = _consultar(
+        f"""
+        SELECT nome_cargo, SUM(proventos_total) AS proventos_total
+        FROM {tabela}
+        WHERE {where}
+        GROUP BY nome_cargo
+        ORDER BY proventos_total DESC NULLS LAST
+        LIMIT %s
+        """,
+        params + [int(limite)], ["nome_cargo", "proventos_total"]
+    )
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def distribuicao_vinculo(ano, mes=None, centro_custo=None, usar_resumo=True) -> pd.DataFrame:
+    """Quantidade de linhas de folha por vínculo."""
+    tabela, where, params = _origem(ano, mes, centro_custo, usar_resumo, nivel=2)
+    contagem = "SUM(qtd_linhas)" if usar_resumo else "COUNT(*)"
+    return _consultar(
+        f"""
+        SELECT vinculo, {contagem} AS count
+        FROM {tabela}
+        WHERE {where}
+        GROUP BY vinculo
+        ORDER BY count DESC
+        """,
+        params, ["vinculo", "count"]
+    )
+
+
+def faixas_salariais(ano, mes, centro_custo=None, qtd_faixas=20) -> pd.DataFrame:
+    """
+    Histograma do salário base calculado no banco (width_bucket).
+
+    Returns:
+        DataFrame com inicio, fim e qtd de cada faixa não vazia
+    """
+    where, params = _filtros(ano, mes, centro_custo)
+    return _consultar(
+        f"""
+        WITH base AS (
+            SELECT salario
+            FROM public.ebisa_tab_folha
+            WHERE {where} AND salario IS NOT NULL
+        ),
+        limites AS (
+            SELECT MIN(salario) AS minimo,
+                   GREATEST(MAX(salario), MIN(salario) + 0.01) AS maximo
+            FROM base
+        )
+        SELECT l.minimo + (f.faixa - 1) * (l.maximo - l.minimo) / %s AS inicio,
+               l.minimo + f.faixa * (l.maximo - l.minimo) / %s       AS fim,
+               f.qtd
+        FROM (
+            SELECT LEAST(width_bucket(b.salario, l.minimo, l.maximo, %s), %s) AS faixa,
+                   COUNT(*) AS qtd
+            FROM base b CROSS JOIN limites l
+            GROUP BY 1
+        ) f
+        CROSS JOIN limites l
+        ORDER BY f.faixa
+        """,
+        params + [qtd_faixas] * 4, ["inicio", "fim", "qtd"]
+    )
+
+
+def maiores_liquidos(ano, mes, centro_custo=None, limite=5) -> pd.DataFrame:
+    """Maiores salários líquidos do período."""
+    where, params = _filtros(ano, mes, centro_custo)
+    return _consultar(
+        f"""
+        SELECT nome_funcionario, nome_cargo, liquido
+        FROM public.ebisa_tab_folha
+        WHERE {where}
+        ORDER BY liquido DESC NULLS LAST
+        LIMIT %s
+        """,
+        params + [int(limite)], ["nome_funcionario", "nome_cargo", "liquido"]
+    )
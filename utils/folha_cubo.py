@@ -0,0 +1,188 @@
+"""
+folha_cubo.py - Cubo em memória da folha de um mês (dimensões codificadas + medidas NumPy)
+
+Caminho das linhas da folha para o painel mensal: extrato do mês em disco
+(utils.folha_extrato) -> cubo -> KPIs e gráficos. Um cubo por mês, só onde
+as linhas são necessárias (headcount distinto por centro de custo,
+histograma, maiores líquidos); o painel anual lê o resumo mensal
+(utils.folha_agregacao) e não monta cubo. As linhas ficam só como vetores:
+- dimensões (funcionario, centro_custo, cargo, vinculo, mes) -> códigos
+  inteiros de dicionário (-1 = vazio); os dicionários guardam os valores
+  ordenados, e o de funcionários também o nome
+- medidas (COLUNAS_VALORES) -> float64
+- célula = (mes, centro de custo): linhas ordenadas por célula (recorte
+  contíguo por célula), somas das medidas por célula e um bitset de
+  funcionários por célula. Totais de qualquer combinação de meses e centro
+  de custo somam linhas da matriz de células; o headcount distinto é o OR
+  dos bitsets + contagem de bits, sem nunique sobre textos.
+
+O cubo fica no cache "folha" com a chave ("cubo", ano, mes, None), é
+descartado quando o mês é invalidado e entra no limite CUBOS_EM_MEMORIA do
+cache (saem os usados há mais tempo).
+
+Funções disponíveis:
+- CuboFolha(df)
+- CuboFolha.meses
+- CuboFolha.centros_custo(meses=None)
+- CuboFolha.posicoes(meses=None, centro_custo=None)
+- CuboFolha.totais(meses=None, centro_custo=None)
+- CuboFolha.headcount(meses=None, centro_custo=None)
+- CuboFolha.por_dimensao(dimensao, coluna=None, meses=None, centro_custo=None)
+- CuboFolha.totais_por_centro(coluna="proventos_total", meses=None)
+- obter_cubo_folha(ano, mes)
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.folha_db import COLUNAS_VALORES
+from utils.folha_extrato import carregar_folha_extrato
+from utils.folha_agregacao import CACHE_FOLHA
+
+
+# Dimensão do cubo -> coluna de ebisa_tab_folha
+DIMENSOES = {
+    "funcionario": "cod_funcionario",
+    "centro_custo": "nome_centro_custo_rh",
+    "cargo": "nome_cargo",
+    "vinculo": "vinculo",
+    "mes": "mes",
+}
+COLUNAS_CUBO = list(DIMENSOES.values()) + ["nome_funcionario"] + COLUNAS_VALORES
+
+
+def _todos(centro_custo) -> bool:
+    return not centro_custo or centro_custo == "Todos"
+
+
+def _codificar(serie: pd.Series):
+    """Códigos de dicionário (ordenado); vazio -> -1."""
+    codigos, valores = pd.factorize(serie, sort=True, use_na_sentinel=True)
+    return codigos.astype(np.int32), np.asarray(valores, dtype=object)
+
+
+class CuboFolha:
+    def __init__(self, df: pd.DataFrame):
+        self.codigos, self.dicionarios = {}, {}
+        for dimensao, coluna in DIMENSOES.items():
+            self.codigos[dimensao], self.dicionarios[dimensao] = _codificar(df[coluna])
+        self.medidas = {col: df[col].to_numpy(dtype="float64", na_value=np.nan)
+                        for col in COLUNAS_VALORES}
+
+        # Nome de cada funcionário do dicionário (primeira linha em que aparece)
+        func = self.codigos["funcionario"]
+        _, primeiras = np.unique(func, return_index=True)
+        primeiras = primeiras[func[primeiras] >= 0]
+        self.nomes_funcionarios = df["nome_funcionario"].to_numpy(dtype=object)[primeiras]
+
+        self.meses = [int(m) for m in self.dicionarios["mes"]]
+        self._mes = {m: i for i, m in enumerate(self.meses)}
+        self._cc = {c: i + 1 for i, c in enumerate(self.dicionarios["centro_custo"])}
+
+        # Célula = mes * qtd_grupos_cc + grupo de centro de custo (0 = sem centro)
+        self._qtd_cc = len(self._cc) + 1
+        qtd_celulas = len(self.meses) * self._qtd_cc
+        celula = (self.codigos["mes"].astype(np.int64) * self._qtd_cc
+                  + self.codigos["centro_custo"] + 1)
+
+        linhas_por_celula = np.bincount(celula, minlength=qtd_celulas)
+        self._ordem = np.argsort(celula, kind="stable")
+        self._limites = np.concatenate([[0], np.cumsum(linhas_por_celula)])
+        self._linhas = linhas_por_celula.reshape(len(self.meses), self._qtd_cc)
+
+        self._somas = np.column_stack([
+            np.bincount(celula, weights=np.nan_to_num(self.medidas[col]), minlength=qtd_celulas)
+            for col in COLUNAS_VALORES
+        ]).reshape(len(self.meses), self._qtd_cc, len(COLUNAS_VALORES))
+
+        # Bitset de funcionários por célula (qtd_celulas x ceil(funcionarios / 8))
+        largura = (len(self.dicionarios["funcionario"]) + 7) // 8
+        bits = np.zeros((qtd_celulas, largura), dtype=np.uint8)
+        validos = func >= 0
+        np.bitwise_or.at(bits, (celula[validos], func[validos] >> 3),
+                         (128 >> (func[validos] & 7)).astype(np.uint8))
+        self._bits = bits.reshape(len(self.meses), self._qtd_cc, largura)
+
+    # --- seleção de células ---
+    def _indices_meses(self, meses) -> list:
+        if meses is None:
+            return list(range(len(self.meses)))
+        return [self._mes[int(m)] for m in meses if int(m) in self._mes]
+
+    def _grupos_cc(self, centro_custo):
+        """slice de todos os grupos, [grupo] do centro ou None (centro inexistente)."""
+        if _todos(centro_custo):
+            return slice(None)
+        grupo = self._cc.get(centro_custo)
+        return None if grupo is None else [grupo]
+
+    def centros_custo(self, meses=None) -> list:
+        """Centros de custo com linhas nos meses (todos os meses do ano por padrão)."""
+        linhas = self._linhas[self._indices_meses(meses)].sum(axis=0)
+        return [c for c, g in self._cc.items() if linhas[g]]
+
+    def posicoes(self, meses=None, centro_custo=None) -> np.ndarray:
+        """Posições das linhas dos meses / centro de custo (recortes contíguos por célula)."""
+        grupos = self._grupos_cc(centro_custo)
+        if grupos is None:
+            return np.empty(0, dtype=np.int64)
+        grupos = range(self._qtd_cc) if isinstance(grupos, slice) else grupos
+        celulas = [m * self._qtd_cc + g for m in self._indices_meses(meses) for g in grupos]
+        return np.concatenate(
+            [self._ordem[self._limites[c]:self._limites[c + 1]] for c in celulas]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+    # --- medidas ---
+    def headcount(self, meses=None, centro_custo=None) -> int:
+        """Funcionários distintos nos meses / centro de custo (OR dos bitsets)."""
+        grupos = self._grupos_cc(centro_custo)
+        indices = self._indices_meses(meses)
+        if grupos is None or not indices:
+            return 0
+        bits = self._bits[indices][:, grupos].reshape(-1, self._bits.shape[2])
+        return int(np.bitwise_count(np.bitwise_or.reduce(bits, axis=0)).sum())
+
+    def totais(self, meses=None, centro_custo=None) -> dict:
+        """Soma das medidas (COLUNAS_VALORES) e headcount distinto."""
+        grupos = self._grupos_cc(centro_custo)
+        indices = self._indices_meses(meses)
+        if grupos is None or not indices:
+            somas = np.zeros(len(COLUNAS_VALORES))
+        else:
+            somas = self._somas[indices][:, grupos].sum(axis=(0, 1))
+        totais = {col: float(v) for col, v in zip(COLUNAS_VALORES, somas)}
+        totais["headcount"] = self.headcount(meses, centro_custo)
+        return totais
+
+    def por_dimensao(self, dimensao, coluna=None, meses=None, centro_custo=None) -> pd.Series:
+        """
+        Soma da medida (ou quantidade de linhas, se coluna=None) por valor da
+        dimensão, na fatia dos meses / centro de custo. Só valores presentes.
+        """
+        posicoes = self.posicoes(meses, centro_custo)
+        codigos = self.codigos[dimensao][posicoes]
+        validos = codigos >= 0
+        pesos = None if coluna is None else np.nan_to_num(self.medidas[coluna][posicoes][validos])
+        qtd = len(self.dicionarios[dimensao])
+        valores = np.bincount(codigos[validos], weights=pesos, minlength=qtd)
+        presentes = np.bincount(codigos[validos], minlength=qtd) > 0
+        return pd.Series(valores[presentes], index=self.dicionarios[dimensao][presentes],
+                         name=coluna or "count")
+
+    def totais_por_centro(self, coluna: str = "proventos_total", meses=None) -> pd.Series:
+        """Soma da medida por centro de custo, direto da matriz de células."""
+        indices = self._indices_meses(meses)
+        somas = self._somas[indices][:, :, COLUNAS_VALORES.index(coluna)].sum(axis=0)
+        linhas = self._linhas[indices].sum(axis=0)
+        return pd.Series({c: float(somas[g]) for c, g in self._cc.items() if linhas[g]},
+                         name=coluna, dtype="float64")
+
+
+def obter_cubo_folha(ano: int, mes: int) -> CuboFolha:
+    """Cubo de um mês (só o extrato daquele mês), construído uma vez por versão do cache."""
+    ano, mes = int(ano), int(mes)
+    return CACHE_FOLHA.obter(
+        ("cubo", ano, mes, None),
+        lambda: CuboFolha(carregar_folha_extrato(ano, mes, COLUNAS_CUBO))
+    )
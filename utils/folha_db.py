@@ -0,0 +1,221 @@
+"""
+folha_db.py - Consultas diretas à folha de pagamento (ebisa_tab_folha)
+
+Os painéis leem as linhas de um mês pelo extrato em disco
+(utils.folha_extrato), que grava o resultado de COLUNAS_FOLHA com os tipos
+compactos daqui e usa carregar_folha_periodo como alternativa quando o
+extrato não está disponível. Também ficam aqui os períodos para os filtros e
+o detalhamento paginado no banco.
+
+As consultas projetam só as colunas pedidas e o DataFrame volta com tipos
+compactos:
+- textos repetitivos (centro de custo, vínculo, cargo, departamento) -> category
+- inteiros (ano, mes) -> menor tipo inteiro que comporta os valores
+- código do funcionário -> string (identificador, não número: lido como
+  cod_funcionario::text, então códigos com letras ou zeros à esquerda não
+  se perdem nem saem do headcount)
+- valores monetários (numeric -> Decimal) -> float64
+
+Funções disponíveis:
+- listar_periodos_folha()
+- listar_anos_folha()
+- carregar_folha_periodo(ano, mes, colunas, centro_custo=None)
+- pagina_folha(ano, mes, centro_custo=None, busca=None, ordenar_por="nome_funcionario",
+               decrescente=False, apos=None, tamanho=50, colunas=COLUNAS_DETALHE)
+- contar_folha(ano, mes, centro_custo=None, busca=None)
+- compactar_tipos_folha(df)
+"""
+
+import pandas as pd
+from database import conectar, desconectar
+
+
+COLUNAS_CATEGORICAS = ["nome_centro_custo_rh", "vinculo", "nome_cargo", "departamento"]
+COLUNAS_INTEIRAS = ["ano", "mes"]
+COLUNAS_CODIGOS = ["cod_funcionario"]
+COLUNAS_VALORES = ["salario", "proventos_total", "descontos_total", "liquido", "valor_fgts"]
+COLUNAS_TEXTO = ["nome_funcionario"]
+
+# Colunas que os painéis podem solicitar (a lista também protege o SELECT dinâmico)
+COLUNAS_FOLHA = (COLUNAS_INTEIRAS + COLUNAS_CODIGOS + COLUNAS_CATEGORICAS
+                 + COLUNAS_TEXTO + COLUNAS_VALORES)
+
+# Projeção do detalhamento (linhas brutas, carregadas sob demanda).
+# KPIs e gráficos vêm do resumo (utils.folha_agregacao) e do cubo do mês
+# (utils.folha_cubo).
+COLUNAS_DETALHE = [
+    "cod_funcionario", "nome_funcionario", "nome_cargo", "departamento",
+    "nome_centro_custo_rh", "salario", "proventos_total",
+    "descontos_total", "liquido",
+]
+
+
+def compactar_tipos_folha(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as colunas conhecidas para tipos compactos (category / int downcast / float64)."""
+    for col in df.columns:
+        if col in COLUNAS_CATEGORICAS:
+            df[col] = df[col].astype("category")
+        elif col in COLUNAS_CODIGOS:
+            df[col] = df[col].astype("string")
+        elif col in COLUNAS_INTEIRAS:
+            valores = pd.to_numeric(df[col], errors="coerce")
+            df[col] = (pd.to_numeric(valores, downcast="integer")
+                       if valores.notna().all() else valores.astype("Int64"))
+        elif col in COLUNAS_VALORES:
+            # float64 e não float32: totais monetários precisam dos centavos exatos
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+def _select_colunas(colunas) -> str:
+    invalidas = [c for c in colunas if c not in COLUNAS_FOLHA]
+    if invalidas:
+        raise ValueError(f"Colunas de folha desconhecidas: {', '.join(invalidas)}")
+    # Códigos sempre como texto, qualquer que seja o tipo da coluna no banco
+    return ", ".join(f"{c}::text AS {c}" if c in COLUNAS_CODIGOS else c for c in colunas)
+
+
+def _consultar(query: str, params: tuple, colunas) -> pd.DataFrame:
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        df = pd.DataFrame(cursor.fetchall(), columns=list(colunas))
+        return compactar_tipos_folha(df)
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def listar_periodos_folha() -> pd.DataFrame:
+    """Anos e meses distintos com folha (mais recentes primeiro)."""
+    return _consultar(
+        """
+        SELECT DISTINCT ano, mes
+        FROM public.ebisa_tab_folha
+        ORDER BY ano DESC, mes DESC
+        """,
+        (), ["ano", "mes"]
+    )
+
+
+def listar_anos_folha() -> list:
+    """Anos distintos com folha (mais recentes primeiro)."""
+    df = _consultar(
+        "SELECT DISTINCT ano FROM public.ebisa_tab_folha ORDER BY ano DESC",
+        (), ["ano"]
+    )
+    return df["ano"].tolist()
+
+
+def carregar_folha_periodo(ano: int, mes: int, colunas=COLUNAS_DETALHE,
+                           centro_custo: str | None = None) -> pd.DataFrame:
+    """Linhas da folha de um mês, apenas com as colunas informadas."""
+    query = f"""
+        SELECT {_select_colunas(colunas)}
+        FROM public.ebisa_tab_folha
+        WHERE ano = %s AND mes = %s
+    """
+    params = [int(ano), int(mes)]
+    if centro_custo and centro_custo != "Todos":
+        query += " AND nome_centro_custo_rh = %s"
+        params.append(centro_custo)
+    return _consultar(query, params, colunas)
+
+
+# ----------------------------------------------------------------------
+# Detalhamento paginado por chave (keyset, sql/008)
+# ----------------------------------------------------------------------
+def _filtros_detalhe(ano, mes, centro_custo=None, busca=None):
+    condicoes = ["ano = %s", "mes = %s"]
+    params = [int(ano), int(mes)]
+    if centro_custo and centro_custo != "Todos":
+        condicoes.append("nome_centro_custo_rh = %s")
+        params.append(centro_custo)
+    busca = (busca or "").strip()
+    if busca:
+        # Código exato do funcionário ou trecho de nome, cargo ou departamento (sem acento)
+        condicoes.append("""(
+            cod_funcionario::text = %s
+            OR public.f_unaccent_lower(nome_funcionario) LIKE '%%' || public.f_unaccent_lower(%s) || '%%'
+            OR public.f_unaccent_lower(nome_cargo) LIKE '%%' || public.f_unaccent_lower(%s) || '%%'
+            OR public.f_unaccent_lower(departamento) LIKE '%%' || public.f_unaccent_lower(%s) || '%%'
+        )""")
+        literal = busca.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.extend([busca] + [literal] * 3)
+    return " AND ".join(condicoes), params
+
+
+def _chave_ordem(coluna: str) -> str:
+    # Sem NULL na chave: a comparação de tuplas do cursor exige valores definidos
+    if coluna in COLUNAS_VALORES or coluna in COLUNAS_INTEIRAS:
+        return f"COALESCE({coluna}, 0)"
+    if coluna in COLUNAS_CODIGOS:
+        return f"COALESCE({coluna}::text, '')"
+    return f"COALESCE({coluna}, '')"
+
+
+def pagina_folha(ano: int, mes: int, centro_custo: str | None = None, busca: str | None = None,
+                 ordenar_por: str = "nome_funcionario", decrescente: bool = False,
+                 apos: tuple | None = None, tamanho: int = 50,
+                 colunas=COLUNAS_DETALHE) -> dict:
+    """
+    Uma página do detalhamento, com filtro, busca e ordenação no banco.
+
+    Args:
+        apos: cursor (valor da ordenação, id) da última linha da página anterior;
+              None = primeira página
+        tamanho: linhas por página
+
+    Returns:
+        dict com 'linhas' (DataFrame com as colunas pedidas) e 'proximo'
+        (cursor da página seguinte ou None na última página)
+    """
+    colunas = list(colunas)
+    _select_colunas(colunas + [ordenar_por])
+    chave = _chave_ordem(ordenar_por)
+    direcao, comparacao = ("DESC", "<") if decrescente else ("ASC", ">")
+
+    where, params = _filtros_detalhe(ano, mes, centro_custo, busca)
+    if apos is not None:
+        where += f" AND ({chave}, id) {comparacao} (%s, %s)"
+        params.extend(apos)
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT {_select_colunas(colunas)}, {chave}, id
+            FROM public.ebisa_tab_folha
+            WHERE {where}
+            ORDER BY {chave} {direcao}, id {direcao}
+            LIMIT %s
+            """,
+            params + [int(tamanho) + 1]
+        )
+        rows = cursor.fetchall()
+    finally:
+        if conn:
+            desconectar(conn)
+
+    proximo = None
+    if len(rows) > tamanho:
+        rows = rows[:tamanho]
+        proximo = (rows[-1][-2], rows[-1][-1])
+
+    df = pd.DataFrame([r[:-2] for r in rows], columns=list(colunas))
+    return {"linhas": compactar_tipos_folha(df), "proximo": proximo}
+
+
+def contar_folha(ano: int, mes: int, centro_custo: str | None = None,
+                 busca: str | None = None) -> int:
+    """Quantidade de linhas do detalhamento com os mesmos filtros de pagina_folha."""
+    where, params = _filtros_detalhe(ano, mes, centro_custo, busca)
+    df = _consultar(
+        f"SELECT COUNT(*) FROM public.ebisa_tab_folha WHERE {where}",
+        params, ["qtd"]
+    )
+    return int(df["qtd"].iloc[0])
@@ -0,0 +1,208 @@
+"""
+folha_extrato.py - Extratos da folha em disco (Arrow IPC), um arquivo por (ano, mes)
+
+A primeira leitura de um mês grava todas as colunas de COLUNAS_FOLHA, já com
+os tipos compactos de folha_db, em um arquivo Arrow sem compressão:
+
+    <EBISA_CACHE_DIR>/folha/folha_<ano>_<mes>_v<versao>_f<formato>.arrow
+
+As leituras seguintes abrem o arquivo com memory map (sem nova consulta das
+linhas) e projetam só as colunas pedidas. Como o arquivo fica em disco, o
+page cache do sistema é compartilhado por todos os workers/processos.
+
+Validade: a versão vem de ebisa_tab_folha_versao (sql/006), incrementada
+pelos triggers da folha a cada INSERT/UPDATE/DELETE/TRUNCATE. Versão nova =
+nome de arquivo novo; os arquivos de versões anteriores são removidos.
+_FORMATO muda quando os tipos gravados mudam (ex.: cod_funcionario passou
+a texto), para que extratos antigos não sejam lidos com o tipo anterior.
+A versão e as linhas são lidas na mesma transação REPEATABLE READ, portanto
+o arquivo nunca mistura dados de versões diferentes.
+
+Em qualquer falha (sem sql/006, sem permissão de escrita etc.) a carga cai
+para a consulta direta de folha_db.carregar_folha_periodo.
+
+Funções disponíveis:
+- versao_periodo_folha(ano, mes)
+- carregar_folha_extrato(ano, mes, colunas=COLUNAS_DETALHE, centro_custo=None)
+- limpar_extratos_folha(ano=None, mes=None)
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+
+from database import conectar, desconectar
+from utils.folha_db import (
+    COLUNAS_FOLHA,
+    COLUNAS_DETALHE,
+    compactar_tipos_folha,
+    carregar_folha_periodo,
+    _select_colunas,
+)
+
+
+DIR_EXTRATOS = Path(
+    os.environ.get("EBISA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "audit_ebisa_cache"))
+) / "folha"
+
+
+_FORMATO = 2
+
+
+def _arquivo(ano: int, mes: int, versao: int) -> Path:
+    return DIR_EXTRATOS / f"folha_{int(ano)}_{int(mes):02d}_v{int(versao)}_f{_FORMATO}.arrow"
+
+
+def _arquivos_periodo(ano: int, mes: int) -> list:
+    return list(DIR_EXTRATOS.glob(f"folha_{int(ano)}_{int(mes):02d}_v*.arrow"))
+
+
+def versao_periodo_folha(ano: int, mes: int) -> int | None:
+    """Versão atual do (ano, mes) na folha; None se o mês não tem versão registrada."""
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT versao FROM public.ebisa_tab_folha_versao WHERE ano = %s AND mes = %s",
+            (int(ano), int(mes))
+        )
+        row = cursor.fetchone()
+        return int(row[0]) if row else None
+    except Exception as e:
+        print(f"❌ Erro ao consultar versão da folha: {e}")
+        return None
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def _gravar_extrato(ano: int, mes: int) -> Path | None:
+    """Lê o mês inteiro do banco e grava o extrato Arrow da versão lida."""
+    conn = None
+    try:
+        conn = conectar()
+        conn.set_session(isolation_level=ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+        cursor = conn.cursor()
+
+        # Versão e linhas no mesmo snapshot
+        cursor.execute(
+            "SELECT versao FROM public.ebisa_tab_folha_versao WHERE ano = %s AND mes = %s",
+            (int(ano), int(mes))
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        versao = int(row[0])
+
+        cursor.execute(
+            f"""
+            SELECT {_select_colunas(COLUNAS_FOLHA)}
+            FROM public.ebisa_tab_folha
+            WHERE ano = %s AND mes = %s
+            """,
+            (int(ano), int(mes))
+        )
+        df = compactar_tipos_folha(pd.DataFrame(cursor.fetchall(), columns=COLUNAS_FOLHA))
+        conn.rollback()
+    finally:
+        if conn:
+            desconectar(conn)
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    DIR_EXTRATOS.mkdir(parents=True, exist_ok=True)
+    destino = _arquivo(ano, mes, versao)
+
+    # Grava em arquivo temporário e troca de forma atômica: outro processo
+    # nunca enxerga um extrato pela metade
+    fd, tmp = tempfile.mkstemp(dir=DIR_EXTRATOS, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with ipc.new_file(f, tabela.schema) as writer:
+                writer.write_table(tabela)
+        os.replace(tmp, destino)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    # Remove as versões anteriores do mesmo período
+    for antigo in _arquivos_periodo(ano, mes):
+        if antigo != destino:
+            try:
+                antigo.unlink()
+            except OSError:
+                pass
+
+    return destino
+
+
+def _ler_extrato(caminho: Path, colunas: list) -> pd.DataFrame:
+    with pa.memory_map(str(caminho), "r") as origem:
+        tabela = ipc.open_file(origem).read_all().select(colunas)
+        return tabela.to_pandas()
+
+
+def carregar_folha_extrato(ano: int, mes: int, colunas=COLUNAS_DETALHE,
+                           centro_custo: str | None = None) -> pd.DataFrame:
+    """
+    Linhas da folha de um mês a partir do extrato em disco.
+
+    Mesmo contrato de folha_db.carregar_folha_periodo (colunas e tipos).
+    """
+    colunas = list(colunas)
+    _select_colunas(colunas)  # valida as colunas pedidas
+
+    filtrar = bool(centro_custo and centro_custo != "Todos")
+    leitura = colunas if not filtrar or "nome_centro_custo_rh" in colunas \
+        else colunas + ["nome_centro_custo_rh"]
+
+    try:
+        versao = versao_periodo_folha(ano, mes)
+        if versao is None:
+            return carregar_folha_periodo(ano, mes, colunas, centro_custo)
+
+        caminho = _arquivo(ano, mes, versao)
+        if not caminho.exists():
+            caminho = _gravar_extrato(ano, mes)
+            if caminho is None:
+                return carregar_folha_periodo(ano, mes, colunas, centro_custo)
+
+        df = _ler_extrato(caminho, leitura)
+    except Exception as e:
+        print(f"❌ Erro no extrato da folha {mes:02d}/{ano}, consultando o banco: {e}")
+        return carregar_folha_periodo(ano, mes, colunas, centro_custo)
+
+    if filtrar:
+        df = df[df["nome_centro_custo_rh"] == centro_custo].reset_index(drop=True)
+        # Categorias sem linhas no recorte não devem aparecer nos filtros/gráficos
+        for col in df.select_dtypes("category").columns:
+            df[col] = df[col].cat.remove_unused_categories()
+    return df[colunas]
+
+
+def limpar_extratos_folha(ano: int | None = None, mes: int | None = None) -> int:
+    """Apaga os extratos em disco (todos, de um ano ou de um mês). Retorna a quantidade."""
+    if not DIR_EXTRATOS.exists():
+        return 0
+    if ano is not None and mes is not None:
+        arquivos = _arquivos_periodo(ano, mes)
+    elif ano is not None:
+        arquivos = list(DIR_EXTRATOS.glob(f"folha_{int(ano)}_*.arrow"))
+    else:
+        arquivos = list(DIR_EXTRATOS.glob("folha_*.arrow"))
+
+    removidos = 0
+    for arquivo in arquivos:
+        try:
+            arquivo.unlink()
+            removidos += 1
+        except OSError:
+            pass
+    return removidos
@@ -0,0 +1,108 @@
+"""
+folha_graficos.py - Dados prontos para os gráficos do painel mensal da folha
+
+Os gráficos recebem só a série resumida (faixas do histograma, contagem por
+vínculo, ranking de centros de custo, top N líquidos), calculada com NumPy
+sobre a fatia do centro de custo no cubo do mês (utils.folha_cubo). O
+tamanho do que vai para o Plotly não cresce com o número de funcionários.
+
+payload_graficos() monta todos os gráficos de um (mês, centro de custo) e é
+guardado no cache "folha" junto com o cubo do mês.
+
+Funções disponíveis:
+- faixas_salariais(cubo, mes, centro_custo, qtd_faixas=20)
+- distribuicao_vinculo(cubo, mes, centro_custo)
+- top_centros_custo(cubo, mes, centro_custo, limite=10)
+- maiores_liquidos(cubo, mes, centro_custo, limite=5)
+- payload_graficos(ano, mes, centro_custo)
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.folha_agregacao import CACHE_FOLHA
+from utils.folha_cubo import obter_cubo_folha
+
+
+def faixas_salariais(cubo, mes, centro_custo, qtd_faixas: int = 20) -> pd.DataFrame:
+    """
+    Histograma do salário base em qtd_faixas faixas de mesma largura.
+
+    Returns:
+        DataFrame com inicio, fim e qtd de cada faixa não vazia
+    """
+    salarios = cubo.medidas["salario"][cubo.posicoes([mes], centro_custo)]
+    salarios = salarios[~np.isnan(salarios)]
+    if salarios.size == 0:
+        return pd.DataFrame(columns=["inicio", "fim", "qtd"])
+
+    minimo = float(salarios.min())
+    maximo = max(float(salarios.max()), minimo + 0.01)
+    qtd, limites = np.histogram(salarios, bins=int(qtd_faixas), range=(minimo, maximo))
+
+    nao_vazias = qtd > 0
+    return pd.DataFrame({
+        "inicio": limites[:-1][nao_vazias],
+        "fim": limites[1:][nao_vazias],
+        "qtd": qtd[nao_vazias],
+    })
+
+
+def distribuicao_vinculo(cubo, mes, centro_custo) -> pd.DataFrame:
+    """Quantidade de linhas de folha por vínculo (maior primeiro)."""
+    contagem = cubo.por_dimensao("vinculo", None, [mes], centro_custo)
+    contagem = contagem.sort_values(ascending=False, kind="stable")
+    return pd.DataFrame({"vinculo": contagem.index.tolist(),
+                         "count": contagem.to_numpy(dtype="int64")})
+
+
+def top_centros_custo(cubo, mes, centro_custo, limite: int = 10) -> pd.DataFrame:
+    """Centros de custo com maior valor bruto (ordem crescente, para barra horizontal)."""
+    totais = cubo.totais_por_centro("proventos_total", [mes])
+    if centro_custo and centro_custo != "Todos":
+        totais = totais[totais.index == centro_custo]
+    totais = totais.nlargest(int(limite)).iloc[::-1]
+    return pd.DataFrame({
+        "nome_centro_custo_rh": totais.index.tolist(),
+        "proventos_total": totais.to_numpy(),
+    })
+
+
+def maiores_liquidos(cubo, mes, centro_custo, limite: int = 5) -> pd.DataFrame:
+    """Maiores salários líquidos da fatia (sem ordenar as demais linhas)."""
+    posicoes = cubo.posicoes([mes], centro_custo)
+    liquidos = cubo.medidas["liquido"][posicoes]
+    liquidos = np.where(np.isnan(liquidos), -np.inf, liquidos)
+
+    k = min(int(limite), liquidos.size)
+    if k == 0:
+        return pd.DataFrame(columns=["nome_funcionario", "nome_cargo", "liquido"])
+
+    maiores = np.argpartition(-liquidos, k - 1)[:k]
+    maiores = posicoes[maiores[np.argsort(-liquidos[maiores], kind="stable")]]
+
+    # Código -1 (vazio) cai no None acrescentado ao fim do dicionário
+    def decodificar(dimensao, dicionario):
+        return np.append(dicionario, None)[cubo.codigos[dimensao][maiores]]
+
+    return pd.DataFrame({
+        "nome_funcionario": decodificar("funcionario", cubo.nomes_funcionarios),
+        "nome_cargo": decodificar("cargo", cubo.dicionarios["cargo"]),
+        "liquido": cubo.medidas["liquido"][maiores],
+    })
+
+
+def payload_graficos(ano: int, mes: int, centro_custo) -> dict:
+    """Todos os dados de gráfico do painel mensal (cacheados com o mês)."""
+    ano, mes = int(ano), int(mes)
+
+    def calcular():
+        cubo = obter_cubo_folha(ano, mes)
+        return {
+            "top_cc": top_centros_custo(cubo, mes, centro_custo, limite=10),
+            "vinculo": distribuicao_vinculo(cubo, mes, centro_custo),
+            "faixas": faixas_salariais(cubo, mes, centro_custo),
+            "top_liquidos": maiores_liquidos(cubo, mes, centro_custo, limite=5),
+        }
+
+    return CACHE_FOLHA.obter(("graficos", ano, mes, centro_custo), calcular)
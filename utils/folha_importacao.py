@@ -0,0 +1,205 @@
+"""
+folha_importacao.py - Carga da folha de pagamento (ebisa_tab_folha) a partir da exportação do RH
+
+1) Lê a planilha/CSV da folha e normaliza os cabeçalhos (MAP_COLS_FOLHA)
+2) Converte valores de forma vetorizada (formato brasileiro
+   "1.234,56" ou numérico do Excel) e separa as linhas rejeitadas
+3) Substitui o mês inteiro em uma única transação:
+   DELETE do (ano, mes) + COPY ... FROM STDIN das linhas novas.
+   Quem lê a folha durante a carga continua vendo o mês antigo até o COMMIT.
+4) Após o COMMIT, atualiza o resumo mensal (utils.folha_resumo), que também
+   invalida o cache "folha" do mês. Versão do extrato (sql/006) e
+   notificações (sql/007) são disparadas pelos próprios triggers da tabela.
+
+Uso pela linha de comando: python apoio/importar_folha.py arquivo.xlsx 2025-03
+
+Funções disponíveis:
+- preparar_df_folha(uploaded_file, ano, mes)
+- importar_folha(uploaded_file, ano, mes)
+"""
+
+import io
+
+import pandas as pd
+
+from database import conectar, desconectar
+from utils.folha_db import (
+    COLUNAS_FOLHA,
+    COLUNAS_VALORES,
+    COLUNAS_CATEGORICAS,
+    COLUNAS_TEXTO,
+)
+from utils.folha_resumo import atualizar_resumo_folha
+from utils.plano_contas_db import (
+    _CALAMINE_DISPONIVEL,
+    _tentar_ler_csv,
+    normalizar_cabecalhos
+)
+
+
+# Nome interno (coluna de ebisa_tab_folha) -> alternativas na exportação
+MAP_COLS_FOLHA = {
+    "ano": ["ano", "Ano", "Ano Competência"],
+    "mes": ["mes", "Mês", "Mes", "Mês Competência"],
+    "cod_funcionario": ["cod_funcionario", "Matrícula", "Matricula", "Código do Funcionário",
+                        "Cód. Funcionário", "Código"],
+    "nome_funcionario": ["nome_funcionario", "Nome", "Funcionário", "Nome do Funcionário"],
+    "nome_centro_custo_rh": ["nome_centro_custo_rh", "Centro de Custo", "Centro de Custo RH",
+                             "Nome do Centro de Custo"],
+    "vinculo": ["vinculo", "Vínculo", "Tipo de Vínculo"],
+    "nome_cargo": ["nome_cargo", "Cargo", "Nome do Cargo"],
+    "departamento": ["departamento", "Departamento", "Setor"],
+    "salario": ["salario", "Salário", "Salário Base"],
+    "proventos_total": ["proventos_total", "Proventos", "Total de Proventos", "Total Proventos"],
+    "descontos_total": ["descontos_total", "Descontos", "Total de Descontos", "Total Descontos"],
+    "liquido": ["liquido", "Líquido", "Valor Líquido", "Salário Líquido"],
+    "valor_fgts": ["valor_fgts", "FGTS", "Valor FGTS"],
+}
+COLUNAS_OBRIGATORIAS = ["cod_funcionario", "nome_funcionario", "proventos_total", "liquido"]
+
+
+def _numero(serie: pd.Series) -> pd.Series:
+    """Texto -> float: aceita '1.234,56', 'R$ 1.234,56' e '1234.56'; vazio -> NaN."""
+    texto = serie.astype("string").str.strip().str.replace(r"[R$\s]", "", regex=True)
+    brasileiro = texto.str.contains(",", regex=False, na=False)
+    texto = texto.mask(
+        brasileiro,
+        texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(texto.replace("", pd.NA), errors="coerce")
+
+
+def _ler_arquivo(uploaded_file) -> pd.DataFrame | None:
+    if str(uploaded_file.name).lower().endswith(".csv"):
+        return _tentar_ler_csv(uploaded_file)
+    uploaded_file.seek(0)
+    if _CALAMINE_DISPONIVEL:
+        return pd.read_excel(uploaded_file, sheet_name=0, dtype=str, engine="calamine")
+    return pd.read_excel(uploaded_file, sheet_name=0, dtype=str)
+
+
+def preparar_df_folha(uploaded_file, ano: int, mes: int):
+    """
+    Lê e normaliza a exportação da folha de um mês.
+
+    Returns:
+        tuple (df: DataFrame ou None, rejeitadas: DataFrame, erro: str ou None)
+        df vem com as colunas de COLUNAS_FOLHA presentes no arquivo (mais ano/mes);
+        as linhas rejeitadas trazem a coluna 'motivo'.
+    """
+    if uploaded_file is None:
+        return None, pd.DataFrame(), "Arquivo não informado."
+
+    df = _ler_arquivo(uploaded_file)
+    if df is None:
+        return None, pd.DataFrame(), "Erro ao ler CSV (codificações/sep testados sem sucesso)."
+
+    df.columns = [str(c).strip() for c in df.columns]
+    df = normalizar_cabecalhos(df, MAP_COLS_FOLHA)
+
+    faltantes = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltantes:
+        return None, pd.DataFrame(), (
+            "Arquivo inválido. Faltam colunas obrigatórias após normalização.\n"
+            f"Faltando: {', '.join(faltantes)}\n"
+            f"Colunas finais do DF: {', '.join(df.columns)}"
+        )
+
+    df = df.dropna(how="all").reset_index(drop=True)
+    df["linha"] = df.index + 2  # linha na planilha (cabeçalho = 1)
+    motivo = pd.Series(None, index=df.index, dtype=object)
+
+    # Competência: se o arquivo traz ano/mês, tem de ser o mês escolhido
+    for col, esperado in (("ano", int(ano)), ("mes", int(mes))):
+        if col in df.columns:
+            valores = _numero(df[col])
+            motivo = motivo.mask(motivo.isna() & valores.notna() & valores.ne(esperado),
+                                 f"Competência diferente de {int(mes):02d}/{int(ano)}")
+        df[col] = esperado
+
+    # Código é identificador (texto); só o ".0" de células numéricas do Excel é removido
+    codigos = (df["cod_funcionario"].astype("string").str.strip()
+               .str.replace(r"^(\d+)\.0+$", r"\1", regex=True).replace("", pd.NA))
+    motivo = motivo.mask(motivo.isna() & codigos.isna(), "Código do funcionário vazio")
+    df["cod_funcionario"] = codigos
+
+    for col in COLUNAS_CATEGORICAS + COLUNAS_TEXTO:
+        if col in df.columns:
+            df[col] = df[col].astype("string").str.strip().replace("", pd.NA)
+
+    for col in COLUNAS_VALORES:
+        if col in df.columns:
+            valores = _numero(df[col])
+            preenchido = df[col].astype("string").str.strip().fillna("").ne("")
+            motivo = motivo.mask(motivo.isna() & preenchido & valores.isna(),
+                                 f"Valor inválido em {col}")
+            df[col] = valores.astype("Float64").round(2)
+
+    rejeitadas = df[motivo.notna()].assign(motivo=motivo[motivo.notna()])
+    colunas = [c for c in COLUNAS_FOLHA if c in df.columns]
+    return df.loc[motivo.isna(), colunas].reset_index(drop=True), rejeitadas, None
+
+
+def importar_folha(uploaded_file, ano: int, mes: int) -> dict:
+    """
+    Substitui a folha do (ano, mes) pelas linhas do arquivo.
+
+    Returns:
+        dict com 'success', 'message', 'linhas' (gravadas), 'removidas'
+        (linhas antigas do mês) e 'rejeitadas' (DataFrame)
+    """
+    ano, mes = int(ano), int(mes)
+    conn = None
+    try:
+        df, rejeitadas, erro = preparar_df_folha(uploaded_file, ano, mes)
+        if erro:
+            return {"success": False, "message": erro}
+        if df.empty:
+            return {"success": False,
+                    "message": f"⚠️ Nenhuma linha válida no arquivo ({len(rejeitadas)} rejeitada(s)).",
+                    "rejeitadas": rejeitadas}
+
+        # CSV em memória para o COPY (NULL = campo vazio sem aspas)
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False, na_rep="")
+        buffer.seek(0)
+
+        conn = conectar()
+        cur = conn.cursor()
+
+        # Uma carga por mês de cada vez
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('ebisa_tab_folha_carga'), %s)",
+                    (ano * 100 + mes,))
+        cur.execute("DELETE FROM public.ebisa_tab_folha WHERE ano = %s AND mes = %s", (ano, mes))
+        removidas = cur.rowcount
+
+        cur.copy_expert(
+            f"COPY public.ebisa_tab_folha ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        conn.commit()
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro em importar_folha: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"success": False, "message": f"❌ Erro ao importar folha: {e}"}
+    finally:
+        if conn:
+            desconectar(conn)
+
+    # Resumo e cache do mês (falha aqui não desfaz a carga: o mês segue na
+    # fila de meses alterados para o próximo refresh)
+    resumo = atualizar_resumo_folha([(ano, mes)])
+
+    return {
+        "success": True,
+        "message": (
+            f"✅ Folha {mes:02d}/{ano} importada: {len(df)} linha(s) gravada(s), "
+            f"{removidas} substituída(s), {len(rejeitadas)} rejeitada(s).\n{resumo['message']}"
+        ),
+        "linhas": len(df),
+        "removidas": removidas,
+        "rejeitadas": rejeitadas,
+    }
@@ -0,0 +1,140 @@
+"""
+folha_resumo.py - Manutenção do resumo mensal da folha (sql/005)
+
+Os triggers de ebisa_tab_folha registram em ebisa_tab_folha_meses_alterados
+cada (ano, mes) inserido, alterado ou excluído. O refresh recalcula somente
+esses meses, em uma única transação:
+1) retira os meses da fila (DELETE ... RETURNING)
+2) apaga as linhas do resumo desses meses
+3) reagrega a folha dos meses com GROUPING SETS (níveis 0, 1 e 2)
+Após o commit, o cache "folha" (utils.cache) é invalidado só nesses meses.
+
+Uso pela linha de comando: python apoio/atualizar_resumo_folha.py
+
+Funções disponíveis:
+- atualizar_resumo_folha(reprocessar=None)
+- meses_pendentes_resumo()
+"""
+
+from database import conectar, desconectar
+from utils import cache
+
+
+_SQL_AGREGAR = """
+    INSERT INTO public.ebisa_tab_folha_resumo (
+        ano, mes, nivel, nome_centro_custo_rh, nome_cargo, vinculo,
+        qtd_linhas, headcount, salario, proventos_total,
+        descontos_total, liquido, valor_fgts
+    )
+    SELECT f.ano,
+           f.mes,
+           CASE WHEN GROUPING(f.nome_centro_custo_rh) = 1 THEN 0
+                WHEN GROUPING(f.nome_cargo) = 1 THEN 1
+                ELSE 2 END,
+           f.nome_centro_custo_rh,
+           f.nome_cargo,
+           f.vinculo,
+           COUNT(*),
+           COUNT(DISTINCT f.cod_funcionario),
+           COALESCE(SUM(f.salario), 0),
+           COALESCE(SUM(f.proventos_total), 0),
+           COALESCE(SUM(f.descontos_total), 0),
+           COALESCE(SUM(f.liquido), 0),
+           COALESCE(SUM(f.valor_fgts), 0)
+    FROM public.ebisa_tab_folha f
+    JOIN unnest(%s::int[], %s::int[]) AS m (ano, mes)
+      ON f.ano = m.ano AND f.mes = m.mes
+    GROUP BY GROUPING SETS (
+        (f.ano, f.mes),
+        (f.ano, f.mes, f.nome_centro_custo_rh),
+        (f.ano, f.mes, f.nome_centro_custo_rh, f.nome_cargo, f.vinculo)
+    )
+"""
+
+
+def meses_pendentes_resumo() -> list:
+    """(ano, mes) alterados na folha e ainda não refletidos no resumo."""
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ano, mes
+            FROM public.ebisa_tab_folha_meses_alterados
+            ORDER BY ano, mes
+        """)
+        return [(int(a), int(m)) for a, m in cursor.fetchall()]
+    except Exception as e:
+        print(f"❌ Erro ao listar meses pendentes do resumo: {e}")
+        return []
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def atualizar_resumo_folha(reprocessar: list | None = None) -> dict:
+    """
+    Recalcula o resumo dos meses alterados (e dos meses em 'reprocessar').
+
+    Args:
+        reprocessar: lista opcional de (ano, mes) a recalcular mesmo sem alteração
+
+    Returns:
+        dict com 'success', 'message' e 'meses' (lista de (ano, mes) recalculados)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        # Um refresh por vez (os demais aguardam e encontram a fila vazia)
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('ebisa_tab_folha_resumo'))")
+
+        cursor.execute("""
+            DELETE FROM public.ebisa_tab_folha_meses_alterados
+            RETURNING ano, mes
+        """)
+        meses = {(int(a), int(m)) for a, m in cursor.fetchall()}
+        meses.update((int(a), int(m)) for a, m in (reprocessar or []))
+        meses = sorted(meses)
+
+        if not meses:
+            conn.commit()
+            return {"success": True, "message": "ℹ️ Resumo da folha já está atualizado.", "meses": []}
+
+        anos = [a for a, _ in meses]
+        mess = [m for _, m in meses]
+
+        cursor.execute(
+            """
+            DELETE FROM public.ebisa_tab_folha_resumo r
+            USING unnest(%s::int[], %s::int[]) AS m (ano, mes)
+            WHERE r.ano = m.ano AND r.mes = m.mes
+            """,
+            (anos, mess)
+        )
+        cursor.execute(_SQL_AGREGAR, (anos, mess))
+        linhas = cursor.rowcount
+
+        conn.commit()
+
+        for ano, mes in meses:
+            cache.invalidar("folha", ano=ano, mes=mes)
+
+        return {
+            "success": True,
+            "message": (
+                f"✅ Resumo da folha atualizado: {len(meses)} mês(es), {linhas} linha(s) "
+                f"({', '.join(f'{m:02d}/{a}' for a, m in meses)})."
+            ),
+            "meses": meses,
+        }
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro ao atualizar resumo da folha: {e}")
+        return {"success": False, "message": f"❌ Erro ao atualizar resumo: {e}", "meses": []}
+    finally:
+        if conn:
+            desconectar(conn)
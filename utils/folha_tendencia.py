@@ -0,0 +1,133 @@
+"""
+folha_tendencia.py - Tendência plurianual da folha (crescimento anual, janelas de 12 meses)
+
+A série mensal vem do resumo pré-agregado (ebisa_tab_folha_resumo, até 12
+linhas por ano). Cada ano fica em cache separado no namespace "folha"
+(chave ("serie_mensal", ano, None, centro_custo)); ao acrescentar anos à
+análise, só os anos ainda não carregados são consultados, todos em uma
+única consulta. A atualização de um mês invalida apenas o ano dele.
+
+Indicadores:
+- custo_12m / headcount_12m: soma do custo e média do headcount nos últimos
+  12 meses (vazios se faltar algum mês na janela)
+- var_custo_aa / var_headcount_aa: variação sobre o mesmo mês do ano anterior
+- no resumo anual, a variação compara só os meses presentes nos dois anos
+  (ano corrente parcial x mesmos meses do ano anterior)
+
+Funções disponíveis:
+- carregar_serie_anos(anos, centro_custo="Todos")
+- indicadores_mensais(serie)
+- resumo_anual_tendencia(serie)
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils import folha_agregacao as agg
+
+
+COLUNAS_SERIE = ["ano", "mes", "proventos_total", "liquido", "valor_fgts",
+                 "descontos_total", "qtd_funcionarios"]
+
+
+def carregar_serie_anos(anos, centro_custo: str | None = "Todos") -> pd.DataFrame:
+    """Série mensal (ano, mes, totais, qtd_funcionarios) dos anos informados."""
+    centro_custo = centro_custo or "Todos"
+    chaves = [("serie_mensal", int(a), None, centro_custo) for a in sorted(set(anos))]
+    if not chaves:
+        return pd.DataFrame(columns=COLUNAS_SERIE)
+
+    def calcular(faltantes):
+        df = agg.evolucao_mensal_anos([c[1] for c in faltantes], centro_custo)
+        return {c: df[df["ano"] == c[1]].reset_index(drop=True) for c in faltantes}
+
+    partes = agg.CACHE_FOLHA.obter_varios(chaves, calcular)
+    frames = [partes[c] for c in chaves if partes[c] is not None and not partes[c].empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUNAS_SERIE)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _variacao(atual: pd.Series, anterior: pd.Series) -> pd.Series:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacao = atual / anterior - 1
+    return variacao.replace([np.inf, -np.inf], np.nan)
+
+
+def indicadores_mensais(serie: pd.DataFrame) -> pd.DataFrame:
+    """
+    Série mensal contínua (meses sem folha ficam vazios) com janelas de 12
+    meses e variação sobre o mesmo mês do ano anterior.
+    """
+    colunas = ["periodo", "ano", "mes", "proventos_total", "qtd_funcionarios",
+               "custo_12m", "headcount_12m", "var_custo_aa", "var_headcount_aa"]
+    if serie.empty:
+        return pd.DataFrame(columns=colunas)
+
+    periodos = pd.to_datetime(
+        pd.DataFrame({"year": serie["ano"], "month": serie["mes"], "day": 1})
+    ).dt.to_period("M")
+    df = serie.set_index(periodos).sort_index()
+    indice = pd.period_range(df.index.min(), df.index.max(), freq="M")
+    df = df.reindex(indice)
+
+    custo = df["proventos_total"].astype("float64")
+    headcount = df["qtd_funcionarios"].astype("float64")
+
+    return pd.DataFrame({
+        "periodo": indice.to_timestamp(),
+        "ano": indice.year,
+        "mes": indice.month,
+        "proventos_total": custo.to_numpy(),
+        "qtd_funcionarios": headcount.to_numpy(),
+        "custo_12m": custo.rolling(12, min_periods=12).sum().to_numpy(),
+        "headcount_12m": headcount.rolling(12, min_periods=12).mean().to_numpy(),
+        "var_custo_aa": _variacao(custo, custo.shift(12)).to_numpy(),
+        "var_headcount_aa": _variacao(headcount, headcount.shift(12)).to_numpy(),
+    })
+
+
+def resumo_anual_tendencia(serie: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por ano: meses com folha, custo, líquido, FGTS, headcount médio
+    e variações sobre o ano anterior (somente meses comparáveis).
+    """
+    colunas = ["ano", "meses", "proventos_total", "liquido", "valor_fgts",
+               "headcount_medio", "var_custo_aa", "var_headcount_aa"]
+    if serie.empty:
+        return pd.DataFrame(columns=colunas)
+
+    anual = serie.groupby("ano").agg(
+        meses=("mes", "nunique"),
+        proventos_total=("proventos_total", "sum"),
+        liquido=("liquido", "sum"),
+        valor_fgts=("valor_fgts", "sum"),
+        headcount_medio=("qtd_funcionarios", "mean"),
+    )
+
+    # Matrizes ano x mês para comparar apenas os meses presentes nos dois anos
+    custo = serie.pivot_table(index="ano", columns="mes", values="proventos_total", aggfunc="sum")
+    headcount = serie.pivot_table(index="ano", columns="mes", values="qtd_funcionarios", aggfunc="sum")
+
+    var_custo, var_headcount = [], []
+    for ano in anual.index:
+        if ano - 1 not in custo.index:
+            var_custo.append(np.nan)
+            var_headcount.append(np.nan)
+            continue
+        comuns = custo.loc[ano].notna() & custo.loc[ano - 1].notna()
+        if not comuns.any():
+            var_custo.append(np.nan)
+            var_headcount.append(np.nan)
+            continue
+        meses = comuns[comuns].index
+        var_custo.append(_variacao(
+            pd.Series([custo.loc[ano, meses].sum()]),
+            pd.Series([custo.loc[ano - 1, meses].sum()])).iloc[0])
+        var_headcount.append(_variacao(
+            pd.Series([headcount.loc[ano, meses].mean()]),
+            pd.Series([headcount.loc[ano - 1, meses].mean()])).iloc[0])
+
+    anual["var_custo_aa"] = var_custo
+    anual["var_headcount_aa"] = var_headcount
+    return anual.reset_index()[colunas]
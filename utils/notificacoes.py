@@ -0,0 +1,145 @@
+"""
+notificacoes.py - Invalidação do cache por notificações do banco (LISTEN/NOTIFY)
+
+Os triggers de sql/007 publicam no canal 'ebisa_cache' cada período alterado
+(folha e balancetes) e cada alteração nas origens do DFC. Uma thread em
+segundo plano por processo escuta o canal e converte as notificações em
+invalidações pontuais de utils.cache:
+
+    folha     -> invalida o cache "folha" do período (sem período = namespace
+                 inteiro)
+    balancete -> invalida as consolidações do período
+    dfc       -> invalida o namespace "dfc"
+
+O listener só invalida: o refresh do resumo mensal da folha continua com
+quem altera a folha (importar_folha, botão "Atualizar Dados", apoio/).
+
+Enquanto o listener está conectado, esses namespaces não expiram por ttl
+(cache.definir_invalidacao_externa). Se a conexão cair, o ttl volta a valer
+e, ao reconectar, os namespaces são descartados (notificações enviadas
+durante a queda se perdem).
+
+Observação: LISTEN exige conexão de sessão; atrás de um pooler em modo
+transação (ex.: porta 6543 do Supabase) as notificações não chegam.
+
+Funções disponíveis:
+- iniciar_listener()
+- listener_ativo()
+- processar_notificacoes(payloads)
+"""
+
+import json
+import select
+import threading
+import time
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from database import conectar, desconectar
+from utils import cache
+
+
+CANAL = "ebisa_cache"
+NAMESPACES_COBERTOS = ("folha", "consolidacao", "dfc")
+
+_INTERVALO_PING = 60      # segundos sem notificação até testar a conexão
+_ESPERA_MAXIMA = 60       # teto do intervalo entre tentativas de reconexão
+
+_LISTENER = {"thread": None, "conectado": False}
+_LOCK_LISTENER = threading.Lock()
+
+
+def processar_notificacoes(payloads) -> dict:
+    """
+    Aplica as invalidações de um lote de notificações (payloads JSON).
+
+    Returns:
+        dict origem -> conjunto de (ano, mes) invalidados (None = tudo)
+    """
+    alteracoes = {}
+    for payload in payloads:
+        try:
+            dados = json.loads(payload)
+            origem = dados["origem"]
+            periodo = (int(dados["ano"]), int(dados["mes"])) if dados.get("ano") is not None else None
+        except (ValueError, KeyError, TypeError, AttributeError):
+            print(f"⚠️ Notificação de cache ignorada: {payload!r}")
+            continue
+        alteracoes.setdefault(origem, set()).add(periodo)
+
+    if "folha" in alteracoes:
+        for periodo in alteracoes["folha"]:
+            if periodo is None:
+                cache.invalidar("folha")
+            else:
+                cache.invalidar("folha", ano=periodo[0], mes=periodo[1])
+
+    if "balancete" in alteracoes:
+        for periodo in alteracoes["balancete"]:
+            if periodo is None:
+                cache.invalidar("consolidacao")
+            else:
+                cache.invalidar("consolidacao", ano=periodo[0], mes=periodo[1])
+
+    if "dfc" in alteracoes:
+        cache.invalidar("dfc")
+
+    return alteracoes
+
+
+def _escutar():
+    espera = 1
+    while True:
+        conn = None
+        try:
+            conn = conectar()
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = conn.cursor()
+            cursor.execute(f"LISTEN {CANAL}")
+
+            # Tudo o que mudou antes deste LISTEN não foi notificado
+            for nome in NAMESPACES_COBERTOS:
+                cache.invalidar(nome)
+            cache.definir_invalidacao_externa(NAMESPACES_COBERTOS, True)
+            _LISTENER["conectado"] = True
+            espera = 1
+
+            while True:
+                if select.select([conn], [], [], _INTERVALO_PING) == ([], [], []):
+                    cursor.execute("SELECT 1")  # detecta conexão perdida
+                    continue
+                conn.poll()
+                payloads = [n.payload for n in conn.notifies]
+                conn.notifies.clear()
+                if payloads:
+                    processar_notificacoes(payloads)
+
+        except Exception as e:
+            print(f"❌ Listener de notificações desconectado: {e}")
+        finally:
+            _LISTENER["conectado"] = False
+            cache.definir_invalidacao_externa(NAMESPACES_COBERTOS, False)
+            if conn:
+                desconectar(conn)
+
+        time.sleep(espera)
+        espera = min(espera * 2, _ESPERA_MAXIMA)
+
+
+def iniciar_listener() -> bool:
+    """
+    Inicia (uma vez por processo) a thread que escuta o canal de notificações.
+    Pode ser chamada a cada execução da página. Retorna True se já conectado.
+    """
+    with _LOCK_LISTENER:
+        thread = _LISTENER["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_escutar, name="ebisa-cache-listener", daemon=True)
+            _LISTENER["thread"] = thread
+            thread.start()
+    return _LISTENER["conectado"]
+
+
+def listener_ativo() -> bool:
+    """True enquanto o listener estiver conectado ao canal."""
+    return _LISTENER["conectado"]
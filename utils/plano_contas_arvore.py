@@ -0,0 +1,288 @@
+"""
+plano_contas_arvore.py - Índice em memória da hierarquia do plano de contas
+
+Os códigos contábeis são pontilhados (ex: '1.1.10.20.016'): cada segmento
+desce um nível na árvore. O índice mantém os códigos ordenados, de modo que
+toda subárvore é um intervalo contíguo e pode ser localizada por busca binária.
+
+Funções disponíveis:
+- construir_arvore(df)
+- comparar_tabelas_planos(tab_anterior, tab_novo)
+- obter_arvore_plano(plano_contas_id)
+- invalidar_arvore_plano(plano_contas_id=None)
+"""
+
+from bisect import bisect_left
+
+import pandas as pd
+from database import conectar, desconectar
+from utils import cache
+
+
+SEPARADOR = "."
+# Primeiro caractere após o "." na tabela ASCII: "1.1." <= descendentes < "1.1/"
+_FIM_SUBARVORE = chr(ord(SEPARADOR) + 1)
+
+
+def _pai_direto(cod_conta: str) -> str | None:
+    if SEPARADOR not in cod_conta:
+        return None
+    return cod_conta.rsplit(SEPARADOR, 1)[0]
+
+
+class ArvoreContas:
+    """
+    Índice compacto de um plano de contas.
+
+    - codigos: lista ordenada dos cod_conta
+    - posicao: cod_conta -> índice na lista
+    - nomes / reduzidos / grupos / ativas: atributos alinhados com 'codigos'
+    """
+
+    __slots__ = ("plano_contas_id", "codigos", "posicao",
+                 "nomes", "reduzidos", "grupos", "ativas", "_tabela")
+
+    def __init__(self, plano_contas_id, codigos, nomes, reduzidos, grupos, ativas):
+        self.plano_contas_id = plano_contas_id
+        self.codigos = codigos
+        self.posicao = {cod: i for i, cod in enumerate(codigos)}
+        self.nomes = nomes
+        self.reduzidos = reduzidos
+        self.grupos = grupos
+        self.ativas = ativas
+        self._tabela = None
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __contains__(self, cod_conta):
+        return cod_conta in self.posicao
+
+    # ------------------------------------------------------------------
+    # Navegação
+    # ------------------------------------------------------------------
+    def pai(self, cod_conta: str) -> str | None:
+        """Conta pai existente no plano — O(profundidade)."""
+        atual = _pai_direto(str(cod_conta).strip())
+        while atual is not None:
+            if atual in self.posicao:
+                return atual
+            atual = _pai_direto(atual)
+        return None
+
+    def ancestrais(self, cod_conta: str) -> list:
+        """Ancestrais existentes no plano, do mais próximo até a raiz."""
+        resultado = []
+        atual = self.pai(cod_conta)
+        while atual is not None:
+            resultado.append(atual)
+            atual = self.pai(atual)
+        return resultado
+
+    def intervalo_subarvore(self, cod_conta: str, incluir_raiz: bool = True) -> tuple:
+        """
+        Intervalo [ini, fim) em 'codigos' ocupado pela subárvore da conta.
+        A conta não precisa existir no plano (ex: prefixo sintético '1.1').
+        """
+        cod = str(cod_conta).strip()
+        ini = bisect_left(self.codigos, cod + SEPARADOR)
+        fim = bisect_left(self.codigos, cod + _FIM_SUBARVORE, lo=ini)
+        if incluir_raiz and cod in self.posicao:
+            # a própria conta fica imediatamente antes dos descendentes
+            ini = self.posicao[cod]
+        return ini, fim
+
+    def subarvore(self, cod_conta: str, incluir_raiz: bool = True) -> list:
+        ini, fim = self.intervalo_subarvore(cod_conta, incluir_raiz)
+        return self.codigos[ini:fim]
+
+    def filhos(self, cod_conta: str) -> list:
+        """Filhos diretos (para drill-down)."""
+        cod = str(cod_conta).strip()
+        return [c for c in self.subarvore(cod, incluir_raiz=False) if self.pai(c) == cod]
+
+    def buscar_prefixo(self, prefixo: str) -> list:
+        """Todas as contas cujo código começa com o texto informado."""
+        prefixo = str(prefixo).strip()
+        ini = bisect_left(self.codigos, prefixo)
+        fim = bisect_left(self.codigos, prefixo + "\uffff", lo=ini)
+        return self.codigos[ini:fim]
+
+    # ------------------------------------------------------------------
+    # Atributos
+    # ------------------------------------------------------------------
+    def grupo_contas(self, cod_conta: str):
+        """
+        grupo_contas da conta; se a conta não existir no plano,
+        usa o do ancestral mais próximo.
+        """
+        cod = str(cod_conta).strip()
+        if cod in self.posicao:
+            return self.grupos[self.posicao[cod]]
+        pai = self.pai(cod)
+        return self.grupos[self.posicao[pai]] if pai is not None else None
+
+    def conta(self, cod_conta: str) -> dict | None:
+        i = self.posicao.get(str(cod_conta).strip())
+        if i is None:
+            return None
+        return {
+            "cod_conta": self.codigos[i],
+            "nome_conta": self.nomes[i],
+            "cod_reduzido": self.reduzidos[i],
+            "grupo_contas": self.grupos[i],
+            "fl_ativa": self.ativas[i],
+        }
+
+    # ------------------------------------------------------------------
+    # Roll-up
+    # ------------------------------------------------------------------
+    def totalizar(self, valores: dict) -> dict:
+        """
+        Soma valores lançados em contas (normalmente analíticas) em todos
+        os seus ancestrais. Retorna {cod_conta: total} para todo nó atingido.
+        """
+        totais = {}
+        for cod, valor in valores.items():
+            cod = str(cod).strip()
+            totais[cod] = totais.get(cod, 0.0) + valor
+            for anc in self.ancestrais(cod):
+                totais[anc] = totais.get(anc, 0.0) + valor
+        return totais
+
+    @property
+    def tabela(self) -> pd.DataFrame:
+        """DataFrame das contas indexado por cod_conta (montado uma vez, somente leitura)."""
+        if self._tabela is None:
+            self._tabela = self.to_dataframe().set_index("cod_conta")
+        return self._tabela
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "cod_conta": self.codigos,
+            "nome_conta": self.nomes,
+            "cod_reduzido": self.reduzidos,
+            "grupo_contas": self.grupos,
+            "fl_ativa": self.ativas,
+        })
+
+
+def construir_arvore(df: pd.DataFrame, plano_contas_id=None) -> ArvoreContas:
+    """
+    Constrói o índice a partir de um DataFrame com as colunas
+    cod_conta, nome_conta, cod_reduzido, grupo_contas e fl_ativa.
+    """
+    df = df.copy()
+    df["cod_conta"] = df["cod_conta"].astype(str).str.strip()
+    df = df[df["cod_conta"].ne("")].drop_duplicates("cod_conta", keep="last")
+    df = df.sort_values("cod_conta", kind="stable")
+
+    def _coluna(nome, padrao=None):
+        if nome in df.columns:
+            return df[nome].tolist()
+        return [padrao] * len(df)
+
+    return ArvoreContas(
+        plano_contas_id=plano_contas_id,
+        codigos=df["cod_conta"].tolist(),
+        nomes=_coluna("nome_conta"),
+        reduzidos=_coluna("cod_reduzido"),
+        grupos=_coluna("grupo_contas"),
+        ativas=_coluna("fl_ativa", True),
+    )
+
+
+def comparar_tabelas_planos(tab_anterior: pd.DataFrame, tab_novo: pd.DataFrame) -> dict:
+    """
+    Compara dois planos (tabelas indexadas por cod_conta) em um único hash join.
+
+    Returns:
+        dict com DataFrames 'adicionadas', 'removidas', 'renomeadas' e 'reagrupadas'
+    """
+    def _preparar(tab):
+        tab = tab[["nome_conta", "grupo_contas"]].copy()
+        tab["grupo_contas"] = pd.to_numeric(
+            tab["grupo_contas"], errors="coerce").astype("Int64")
+        return tab
+
+    juntos = pd.merge(
+        _preparar(tab_anterior), _preparar(tab_novo),
+        left_index=True, right_index=True, how="outer",
+        suffixes=("_anterior", "_novo"), indicator=True,
+    )
+    juntos.index.name = "cod_conta"
+    juntos = juntos.reset_index()
+
+    origem = juntos.pop("_merge")
+    em_ambos = origem.eq("both")
+
+    nome_anterior = juntos["nome_conta_anterior"].astype("string").str.strip()
+    nome_novo = juntos["nome_conta_novo"].astype("string").str.strip()
+    grupo_anterior = juntos["grupo_contas_anterior"]
+    grupo_novo = juntos["grupo_contas_novo"]
+
+    renomeadas = em_ambos & nome_anterior.ne(nome_novo).fillna(False)
+    reagrupadas = em_ambos & (
+        grupo_anterior.ne(grupo_novo).fillna(False)
+        | grupo_anterior.isna().ne(grupo_novo.isna())
+    )
+
+    return {
+        "adicionadas": juntos.loc[origem.eq("right_only"),
+                                  ["cod_conta", "nome_conta_novo", "grupo_contas_novo"]],
+        "removidas": juntos.loc[origem.eq("left_only"),
+                                ["cod_conta", "nome_conta_anterior", "grupo_contas_anterior"]],
+        "renomeadas": juntos.loc[renomeadas,
+                                 ["cod_conta", "nome_conta_anterior", "nome_conta_novo"]],
+        "reagrupadas": juntos.loc[reagrupadas,
+                                  ["cod_conta", "nome_conta_novo",
+                                   "grupo_contas_anterior", "grupo_contas_novo"]],
+    }
+
+
+# ----------------------------------------------------------------------
+# Cache por plano_contas_id (compartilhado entre sessões do processo)
+# ----------------------------------------------------------------------
+_CACHE_ARVORES = cache.namespace("plano_contas_arvore", ("plano_contas_id",))
+
+
+def carregar_itens_plano(plano_contas_id: int) -> pd.DataFrame:
+    """Busca os itens de um plano de contas no banco."""
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT cod_conta, nome_conta, cod_reduzido, grupo_contas, fl_ativa
+            FROM public.ebisa_cont_plano_contas_itens
+            WHERE plano_contas_id = %s
+            """,
+            (plano_contas_id,)
+        )
+        return pd.DataFrame(cursor.fetchall(), columns=[
+            "cod_conta", "nome_conta", "cod_reduzido", "grupo_contas", "fl_ativa"
+        ])
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def obter_arvore_plano(plano_contas_id: int) -> ArvoreContas | None:
+    """
+    Retorna o índice do plano (construído uma única vez por plano_contas_id).
+    Retorna None em caso de erro de banco.
+    """
+    try:
+        return _CACHE_ARVORES.obter(
+            (plano_contas_id,),
+            lambda: construir_arvore(carregar_itens_plano(plano_contas_id), plano_contas_id)
+        )
+    except Exception as e:
+        print(f"❌ Erro ao carregar plano de contas {plano_contas_id}: {e}")
+        return None
+
+
+def invalidar_arvore_plano(plano_contas_id: int | None = None):
+    """Descarta o índice de um plano (ou de todos, se None)."""
+    _CACHE_ARVORES.invalidar(plano_contas_id=plano_contas_id)
@@ -5,6 +5,35 @@ plano_contas_db.py - Operações de banco de dados para planos de contas
 from database import conectar, desconectar
 import pandas as pd
 from psycopg2.extras import execute_values
+from utils.plano_contas_arvore import (
+    invalidar_arvore_plano,
+    obter_arvore_plano,
+    comparar_tabelas_planos
+)
+from utils.vigencia_resolver import resolver_vigencia, invalidar_vigencias
+
+try:
+    import python_calamine  # noqa: F401 - engine "calamine" do pandas (Rust)
+    _CALAMINE_DISPONIVEL = True
+except ImportError:
+    _CALAMINE_DISPONIVEL = False
+
+
+# Mapeamento inteligente dos nomes das colunas (nome interno -> alternativas)
+MAP_COLS = {
+    "cod_conta": ["Código Contábil", "cod_conta", "Código da Conta", "Conta", "CodConta", "Código"],
+    "nome_conta": ["Descrição", "nome_conta", "Nome da Conta", "Descricao", "Conta Nome"],
+    "cod_reduzido": ["cod_reduzido", "Código Reduzido", "Reduzido", "CodReduzido"],
+    "grupo_contas": ["Grupo de conta", "grupo_contas", "Grupo", "Grupo Contábil", "GrupoConta"],
+    "tipo_conta": ["Tipo de Conta"],
+    "usar_no_balanco": ["Usar no balanço patrimonial"],
+    "permite_rateio": ["Permite Rateio"],
+    "redutora": ["Redutora"],
+    "data_cadastramento": ["Data Cadastramento"],
+    "conta_referencial": ["Conta referencial"],
+    "codigo_evento": ["Código do evento"],
+    "fl_ativa": ["fl_ativa", "Ativa", "Ativo", "Status", "Conta Ativa"],
+}
 
 
 def listar_planos_empresa(empresa="Todas"):
@@ -81,64 +110,33 @@ def listar_planos_empresa(empresa="Todas"):
 def verificar_vigencia_empresa_ano(empresa_nome: str, ano_vigencia: int) -> dict:
     """
     Verifica se existe uma vigência ATIVA para a empresa e ano informados.
-    Retorna: {"existe": bool, "vigencia_id": int|None, "plano_contas_id": int|None, "empresa_id": int|None}
+    Retorna: {"existe": bool, "vigencia_id": int|None, "plano_contas_id": int|None, "empresa_id": int|None,
+              "erro": str|None}  (erro preenchido = consulta falhou)
     """
-    conn = None
-    try:
-        conn = conectar()
-        cur = conn.cursor()
-
-        # Obter empresa_id a partir da view já utilizada no projeto
-        print(
-            f"[verificar_vigencia_empresa_ano] - empresa_nome: {empresa_nome}, ano_vigencia: {ano_vigencia}\n")
-        cur.execute(
-            """
-            SELECT DISTINCT empresa_id
-            FROM public.vw_cont_empresas_planocontas
-            WHERE nome_empresa = %s
-            LIMIT 1
-            """,
-            (empresa_nome,)
-        )
-        row_emp = cur.fetchone()
-        empresa_id = row_emp[0] if row_emp else None
+    return resolver_vigencia(ano_vigencia, empresa_nome=empresa_nome)
 
-        if not empresa_id:
-            return {"existe": False, "vigencia_id": None, "plano_contas_id": None, "empresa_id": None}
 
-        # Verificar vigência ativa para o ano informado
-        cur.execute(
-            """
-            SELECT id, plano_contas_id
-            FROM public.ebisa_cont_plano_contas_vigencia
-            WHERE empresa_id = %s
-              AND ano_vigencia = %s
-              AND fl_ativo = TRUE
-            LIMIT 1
-            """,
-            (empresa_id, ano_vigencia)
-        )
-        print(
-            f"[CONSULTA-TABELA-VIGENCIA] - empresa_id: {empresa_id}, ano_vigencia: {ano_vigencia}\n")
-        row_vig = cur.fetchone()
-        print(f"[RESULTADO-DA-CONSULTA] - row_vig: {row_vig}\n")
+def comparar_planos(plano_anterior_id: int, plano_novo_id: int) -> dict:
+    """
+    Compara dois planos de contas (ex: vigência anterior x nova).
 
-        if row_vig:
-            return {
-                "existe": True,
-                "vigencia_id": row_vig[0],
-                "plano_contas_id": row_vig[1],
-                "empresa_id": empresa_id
-            }
+    Returns:
+        dict com 'success', 'message' e os DataFrames
+        'adicionadas', 'removidas', 'renomeadas' e 'reagrupadas'
+    """
+    arvore_anterior = obter_arvore_plano(plano_anterior_id)
+    arvore_novo = obter_arvore_plano(plano_novo_id)
 
-        return {"existe": False, "vigencia_id": None, "plano_contas_id": None, "empresa_id": empresa_id}
+    if arvore_anterior is None or arvore_novo is None:
+        return {"success": False, "message": "❌ Erro ao carregar os planos de contas."}
 
-    except Exception as e:
-        print(f"❌ Erro em verificar_vigencia_empresa_ano: {e}")
-        return {"existe": False, "vigencia_id": None, "plano_contas_id": None, "empresa_id": None}
-    finally:
-        if conn:
-            desconectar(conn)
+    resultado = comparar_tabelas_planos(arvore_anterior.tabela, arvore_novo.tabela)
+    resultado["success"] = True
+    resultado["message"] = (
+        f"Plano {plano_anterior_id} ({len(arvore_anterior)} contas) x "
+        f"Plano {plano_novo_id} ({len(arvore_novo)} contas)"
+    )
+    return resultado
 
 
 def _coerce_bool(val):
@@ -179,14 +177,172 @@ def _tentar_ler_csv(file_obj):
     return None
 
 
+def preparar_df_plano(uploaded_file, df_plano: pd.DataFrame | None = None):
+    """
+    Lê (se necessário) e normaliza o arquivo do plano de contas.
+
+    Returns:
+        tuple (df: DataFrame ou None, erro: str ou None)
+    """
+    # ------------------------------------------------------------------
+    # 0) Ler arquivo para DF
+    # ------------------------------------------------------------------
+    if df_plano is not None:
+        df = df_plano.copy()
+    elif uploaded_file is None:
+        return None, "Arquivo não informado."
+    # CSV com tentativas múltiplas
+    elif uploaded_file.name.lower().endswith(".csv"):
+        df = _tentar_ler_csv(uploaded_file)
+        if df is None:
+            return None, "Erro ao ler CSV (codificações/sep testados sem sucesso)."
+    else:
+        df = ler_excel_plano(uploaded_file)
+
+    df.columns = [str(c).strip() for c in df.columns]
+
+    # ------------------------------------------------------------------
+    # 1) Mapeamento inteligente dos nomes das colunas
+    # ------------------------------------------------------------------
+    # 1) Normalizar cabeçalhos via rotina externa
+    df = normalizar_cabecalhos(df, MAP_COLS)
+
+    # Garantir que campos essenciais existam
+    obrigatorias = ["cod_conta", "nome_conta",
+                    "cod_reduzido", "grupo_contas", "fl_ativa"]
+    faltantes = [c for c in obrigatorias if c not in df.columns]
+
+    if faltantes:
+        return None, (
+            "Arquivo inválido. Faltam colunas obrigatórias após normalização.\n"
+            f"Faltando: {', '.join(faltantes)}\n"
+            f"Colunas finais do DF: {', '.join(df.columns)}"
+        )
+
+    # ------------------------------------------------------------------
+    # 2) Normalizações internas
+    # ------------------------------------------------------------------
+    df["cod_conta"] = df["cod_conta"].astype(str).str.strip()
+    df["nome_conta"] = df["nome_conta"].astype(str).str.strip()
+
+    def _to_int_or_none(x):
+        if x is None or (isinstance(x, str) and x.strip() == ""):
+            return None
+        try:
+            return int(str(x).split(".")[0])
+        except Exception:
+            return None
+
+    df["cod_reduzido"] = df["cod_reduzido"].apply(_to_int_or_none)
+    df["grupo_contas"] = df["grupo_contas"].apply(_to_int_or_none)
+    df["fl_ativa"] = df["fl_ativa"].apply(_coerce_bool)
+
+    # Remover linhas inválidas
+    df = df[
+        df["cod_conta"].ne("") &
+        df["nome_conta"].ne("") &
+        df["cod_reduzido"].notna() &
+        df["grupo_contas"].notna()
+    ].copy()
+
+    if df.empty:
+        return None, "Nenhuma linha válida encontrada após validação."
+
+    # Campos opcionais padronizados
+    opt_cols = [
+        "tipo_conta", "usar_no_balanco", "permite_rateio", "redutora",
+        "conta_referencial", "data_cadastramento", "codigo_evento"
+    ]
+    for oc in opt_cols:
+        if oc not in df.columns:
+            df[oc] = None
+
+    df["data_cadastramento"] = df["data_cadastramento"].apply(_to_date)
+
+    return df, None
+
+
+def _gravar_plano(cur, nome_plano: str, descricao_plano: str, df: pd.DataFrame):
+    """
+    Insere o cabeçalho e os itens do plano (df já normalizado) no cursor informado.
+    Não faz commit.
+
+    Returns:
+        tuple (plano_contas_id, qtd_itens)
+    """
+    # ------------------------------------------------------------------
+    # Cabeçalho
+    # ------------------------------------------------------------------
+    cur.execute(
+        """
+        INSERT INTO public.ebisa_cont_plano_contas (nome, descricao)
+        VALUES (%s, %s)
+        RETURNING id
+        """,
+        (nome_plano, descricao_plano)
+    )
+    plano_contas_id = cur.fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Itens com UPSERT
+    # ------------------------------------------------------------------
+    colunas_itens = [
+        "cod_conta", "nome_conta", "cod_reduzido", "grupo_contas",
+        "tipo_conta", "usar_no_balanco", "permite_rateio", "redutora",
+        "conta_referencial", "fl_ativa", "plano_contas_id",
+        "data_cadastramento", "codigo_evento",
+    ]
+    df_itens = df.assign(
+        cod_reduzido=df["cod_reduzido"].astype(int),
+        grupo_contas=df["grupo_contas"].astype(int),
+        fl_ativa=df["fl_ativa"].astype(bool),
+        plano_contas_id=plano_contas_id,
+    )[colunas_itens].astype(object)
+    df_itens = df_itens.where(df_itens.notna(), None)
+    rows = list(df_itens.itertuples(index=False, name=None))
+
+    insert_sql = """
+        INSERT INTO public.ebisa_cont_plano_contas_itens
+        (cod_conta, nome_conta, cod_reduzido, grupo_contas,
+         tipo_conta, usar_no_balanco, permite_rateio, redutora,
+         conta_referencial, fl_ativa, plano_contas_id,
+         data_cadastramento, codigo_evento)
+        VALUES %s
+        ON CONFLICT (plano_contas_id, cod_conta) DO UPDATE SET
+            nome_conta = EXCLUDED.nome_conta,
+            cod_reduzido = EXCLUDED.cod_reduzido,
+            grupo_contas = EXCLUDED.grupo_contas,
+            tipo_conta = EXCLUDED.tipo_conta,
+            usar_no_balanco = EXCLUDED.usar_no_balanco,
+            permite_rateio = EXCLUDED.permite_rateio,
+            redutora = EXCLUDED.redutora,
+            conta_referencial = EXCLUDED.conta_referencial,
+            fl_ativa = EXCLUDED.fl_ativa,
+            plano_contas_id = EXCLUDED.plano_contas_id,
+            data_cadastramento = EXCLUDED.data_cadastramento,
+            codigo_evento = EXCLUDED.codigo_evento
+    """
+
+    execute_values(cur, insert_sql, rows, page_size=500)
+
+    return plano_contas_id, len(rows)
+
+
 def importar_plano_contas(
     empresa_nome: str,
     ano_vigencia: int,
     vigencia_id_atual: int | None,
     uploaded_file,
     nome_plano: str,
-    descricao_plano: str
+    descricao_plano: str,
+    df_plano: pd.DataFrame | None = None
 ) -> dict:
+    """
+    Importa o plano de contas (cabeçalho + itens) e cria a nova vigência.
+
+    df_plano: DataFrame já lido pelo processor (ler_excel_plano/_tentar_ler_csv).
+    Quando informado, o arquivo não é lido novamente.
+    """
 
     print(f"[DEBUG-IMPORTAR-PLANO] - Entrou")
     print(f"[DEBUG-IMPORTAR-PLANO] - vigencia_id_atual: {vigencia_id_atual}\n")
@@ -195,109 +351,11 @@ def importar_plano_contas(
     conn = None
     try:
         # ------------------------------------------------------------------
-        # 0) Ler arquivo para DF
+        # 0) Ler e normalizar arquivo
         # ------------------------------------------------------------------
-        if uploaded_file is None:
-            return {"success": False, "message": "Arquivo não informado."}
-
-        try:
-            uploaded_file.seek(0)
-        except Exception:
-            pass
-
-        # CSV com tentativas múltiplas
-        df = None
-        if uploaded_file.name.lower().endswith(".csv"):
-            df = _tentar_ler_csv(uploaded_file)
-            if df is None:
-                return {
-                    "success": False,
-                    "message": "Erro ao ler CSV (codificações/sep testados sem sucesso)."
-                }
-        else:
-            uploaded_file.seek(0)
-            df = pd.read_excel(uploaded_file, sheet_name=0, dtype=str)
-
-        df.columns = [str(c).strip() for c in df.columns]
-
-        # ------------------------------------------------------------------
-        # 1) Mapeamento inteligente dos nomes das colunas
-        # ------------------------------------------------------------------
-        MAP_COLS = {
-            "cod_conta": ["Código Contábil", "cod_conta", "Código da Conta", "Conta", "CodConta", "Código"],
-            "nome_conta": ["Descrição", "nome_conta", "Nome da Conta", "Descricao", "Conta Nome"],
-            "cod_reduzido": ["cod_reduzido", "Código Reduzido", "Reduzido", "CodReduzido"],
-            "grupo_contas": ["Grupo de conta", "grupo_contas", "Grupo", "Grupo Contábil", "GrupoConta"],
-            "tipo_conta": ["Tipo de Conta"],
-            "usar_no_balanco": ["Usar no balanço patrimonial"],
-            "permite_rateio": ["Permite Rateio"],
-            "redutora": ["Redutora"],
-            "data_cadastramento": ["Data Cadastramento"],
-            "conta_referencial": ["Conta referencial"],
-            "codigo_evento": ["Código do evento"],
-            "fl_ativa": ["fl_ativa", "Ativa", "Ativo", "Status", "Conta Ativa"],
-        }
-
-        # 1) Normalizar cabeçalhos via rotina externa
-        df = normalizar_cabecalhos(df, MAP_COLS)
-
-        # Garantir que campos essenciais existam
-        obrigatorias = ["cod_conta", "nome_conta",
-                        "cod_reduzido", "grupo_contas", "fl_ativa"]
-        faltantes = [c for c in obrigatorias if c not in df.columns]
-
-        if faltantes:
-            return {
-                "success": False,
-                "message": (
-                    "Arquivo inválido. Faltam colunas obrigatórias após normalização.\n"
-                    f"Faltando: {', '.join(faltantes)}\n"
-                    f"Colunas finais do DF: {', '.join(df.columns)}"
-                )
-            }
-
-        # ------------------------------------------------------------------
-        # 2) Normalizações internas
-        # ------------------------------------------------------------------
-        df["cod_conta"] = df["cod_conta"].astype(str).str.strip()
-        df["nome_conta"] = df["nome_conta"].astype(str).str.strip()
-
-        def _to_int_or_none(x):
-            if x is None or (isinstance(x, str) and x.strip() == ""):
-                return None
-            try:
-                return int(str(x).split(".")[0])
-            except Exception:
-                return None
-
-        df["cod_reduzido"] = df["cod_reduzido"].apply(_to_int_or_none)
-        df["grupo_contas"] = df["grupo_contas"].apply(_to_int_or_none)
-        df["fl_ativa"] = df["fl_ativa"].apply(_coerce_bool)
-
-        # Remover linhas inválidas
-        df = df[
-            df["cod_conta"].ne("") &
-            df["nome_conta"].ne("") &
-            df["cod_reduzido"].notna() &
-            df["grupo_contas"].notna()
-        ].copy()
-
-        if df.empty:
-            return {
-                "success": False,
-                "message": "Nenhuma linha válida encontrada após validação."
-            }
-
-        # Campos opcionais padronizados
-        opt_cols = [
-            "tipo_conta", "usar_no_balanco", "permite_rateio", "redutora",
-            "conta_referencial", "data_cadastramento", "codigo_evento"
-        ]
-        for oc in opt_cols:
-            if oc not in df.columns:
-                df[oc] = None
-
-        df["data_cadastramento"] = df["data_cadastramento"].apply(_to_date)
+        df, erro = preparar_df_plano(uploaded_file, df_plano)
+        if erro:
+            return {"success": False, "message": erro}
 
         # ------------------------------------------------------------------
         # 3) Conectar banco
@@ -322,62 +380,10 @@ def importar_plano_contas(
         empresa_id = row_emp[0]
 
         # ------------------------------------------------------------------
-        # 4) Inserir plano de contas (cabeçalho)
-        # ------------------------------------------------------------------
-        cur.execute(
-            """
-            INSERT INTO public.ebisa_cont_plano_contas (nome, descricao)
-            VALUES (%s, %s)
-            RETURNING id
-            """,
-            (nome_plano, descricao_plano)
-        )
-        plano_contas_id = cur.fetchone()[0]
-
-        # ------------------------------------------------------------------
-        # 5) Inserir itens com UPSERT
+        # 4) e 5) Inserir plano de contas (cabeçalho + itens)
         # ------------------------------------------------------------------
-        rows = []
-        for _, r in df.iterrows():
-            rows.append((
-                r["cod_conta"],
-                r["nome_conta"],
-                int(r["cod_reduzido"]),
-                int(r["grupo_contas"]),
-                r.get("tipo_conta"),
-                r.get("usar_no_balanco"),
-                r.get("permite_rateio"),
-                r.get("redutora"),
-                r.get("conta_referencial"),
-                bool(r["fl_ativa"]),
-                plano_contas_id,
-                r.get("data_cadastramento"),
-                r.get("codigo_evento"),
-            ))
-
-        insert_sql = """
-            INSERT INTO public.ebisa_cont_plano_contas_itens
-            (cod_conta, nome_conta, cod_reduzido, grupo_contas,
-             tipo_conta, usar_no_balanco, permite_rateio, redutora,
-             conta_referencial, fl_ativa, plano_contas_id,
-             data_cadastramento, codigo_evento)
-            VALUES %s
-            ON CONFLICT (plano_contas_id, cod_conta) DO UPDATE SET
-                nome_conta = EXCLUDED.nome_conta,
-                cod_reduzido = EXCLUDED.cod_reduzido,
-                grupo_contas = EXCLUDED.grupo_contas,
-                tipo_conta = EXCLUDED.tipo_conta,
-                usar_no_balanco = EXCLUDED.usar_no_balanco,
-                permite_rateio = EXCLUDED.permite_rateio,
-                redutora = EXCLUDED.redutora,
-                conta_referencial = EXCLUDED.conta_referencial,
-                fl_ativa = EXCLUDED.fl_ativa,
-                plano_contas_id = EXCLUDED.plano_contas_id,
-                data_cadastramento = EXCLUDED.data_cadastramento,
-                codigo_evento = EXCLUDED.codigo_evento
-        """
-
-        execute_values(cur, insert_sql, rows, page_size=500)
+        plano_contas_id, qtd_itens = _gravar_plano(
+            cur, nome_plano, descricao_plano, df)
 
         # ------------------------------------------------------------------
         # 6) Inativar vigência anterior, se houver
@@ -404,10 +410,14 @@ def importar_plano_contas(
 
         conn.commit()
 
+        # Caches em memória deixam de refletir o banco
+        invalidar_arvore_plano(plano_contas_id)
+        invalidar_vigencias()
+
         return {
             "success": True,
             "message": "Plano importado e vigência atualizada com sucesso.",
-            "rows": len(rows),
+            "rows": qtd_itens,
             "plano_contas_id": plano_contas_id,
             "vigencia_id": nova_vigencia_id
         }
@@ -425,6 +435,208 @@ def importar_plano_contas(
             desconectar(conn)
 
 
+def importar_plano_contas_lote(
+    alvos: list,
+    uploaded_file,
+    nome_plano: str,
+    descricao_plano: str,
+    df_plano: pd.DataFrame | None = None
+) -> dict:
+    """
+    Aplica um mesmo plano de contas a várias empresas e anos.
+
+    O arquivo é lido uma única vez e o plano (cabeçalho + itens) é gravado uma
+    única vez; todas as vigências são criadas na mesma transação, inativando
+    em bloco as vigências ativas anteriores dos mesmos (empresa, ano).
+
+    Args:
+        alvos: lista de tuplas (empresa_id, ano_vigencia)
+
+    Returns:
+        dict com 'success', 'message', 'rows', 'plano_contas_id' e 'vigencias'
+    """
+    alvos = sorted({(int(emp), int(ano)) for emp, ano in alvos})
+    if not alvos:
+        return {"success": False, "message": "Nenhuma empresa/ano selecionado."}
+
+    conn = None
+    try:
+        df, erro = preparar_df_plano(uploaded_file, df_plano)
+        if erro:
+            return {"success": False, "message": erro}
+
+        conn = conectar()
+        cur = conn.cursor()
+
+        # Validar empresas em uma única consulta
+        empresas_ids = sorted({emp for emp, _ in alvos})
+        cur.execute(
+            """
+            SELECT cod_empresa
+            FROM public.ebisa_empresa_sienge
+            WHERE cod_empresa = ANY(%s)
+            """,
+            (empresas_ids,)
+        )
+        encontradas = {row[0] for row in cur.fetchall()}
+        faltantes = [e for e in empresas_ids if e not in encontradas]
+        if faltantes:
+            return {
+                "success": False,
+                "message": f"Empresa(s) não encontrada(s): {', '.join(map(str, faltantes))}"
+            }
+
+        plano_contas_id, qtd_itens = _gravar_plano(
+            cur, nome_plano, descricao_plano, df)
+
+        # Inativar em bloco as vigências ativas dos alvos
+        execute_values(
+            cur,
+            """
+            UPDATE public.ebisa_cont_plano_contas_vigencia AS v
+            SET fl_ativo = FALSE
+            FROM (VALUES %s) AS alvo (empresa_id, ano_vigencia)
+            WHERE v.empresa_id = alvo.empresa_id
+              AND v.ano_vigencia = alvo.ano_vigencia
+              AND v.fl_ativo = TRUE
+            """,
+            alvos,
+            page_size=len(alvos)
+        )
+        vigencias_inativadas = cur.rowcount
+
+        # Criar todas as novas vigências
+        vigencias = execute_values(
+            cur,
+            """
+            INSERT INTO public.ebisa_cont_plano_contas_vigencia
+                (empresa_id, ano_vigencia, plano_contas_id, fl_ativo)
+            VALUES %s
+            RETURNING id
+            """,
+            alvos,
+            template=f"(%s, %s, {int(plano_contas_id)}, TRUE)",
+            page_size=len(alvos),
+            fetch=True
+        )
+
+        conn.commit()
+
+        invalidar_arvore_plano(plano_contas_id)
+        invalidar_vigencias()
+
+        return {
+            "success": True,
+            "message": (
+                f"Plano aplicado a {len(alvos)} vigência(s) "
+                f"({vigencias_inativadas} vigência(s) anterior(es) inativada(s))."
+            ),
+            "rows": qtd_itens,
+            "plano_contas_id": plano_contas_id,
+            "vigencias": [v[0] for v in vigencias]
+        }
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro em importar_plano_contas_lote: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"success": False, "message": str(e)}
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def _limpar_nome_coluna(s) -> str:
+    """Normaliza um nome de coluna para comparação (minúsculas, sem acento)."""
+    return (
+        str(s).strip()
+        .lower()
+        .replace(" ", "_")
+        .replace("-", "_")
+        .replace("ç", "c")
+        .replace("ã", "a")
+        .replace("â", "a")
+        .replace("á", "a")
+        .replace("é", "e")
+        .replace("ê", "e")
+        .replace("í", "i")
+        .replace("ó", "o")
+        .replace("ô", "o")
+        .replace("ú", "u")
+    )
+
+
+# Conjunto de nomes (já normalizados) aceitos em qualquer chave do MAP_COLS
+_COLUNAS_CONHECIDAS = {
+    _limpar_nome_coluna(alt) for alternativas in MAP_COLS.values() for alt in alternativas
+}
+
+
+def _coluna_conhecida(nome) -> bool:
+    return _limpar_nome_coluna(nome) in _COLUNAS_CONHECIDAS
+
+
+def ler_excel_plano(file_obj) -> pd.DataFrame:
+    """
+    Leitura rápida do Excel do plano de contas.
+
+    Lê apenas a primeira aba (intervalo utilizado) e apenas as colunas
+    reconhecidas pelo MAP_COLS, tudo como texto.
+    - Usa o engine "calamine" (Rust) quando python-calamine está instalado.
+    - Senão, para .xlsx, faz streaming das linhas com openpyxl em modo read_only.
+    - Para .xls sem calamine, cai no pd.read_excel padrão.
+
+    Returns:
+        DataFrame com os cabeçalhos originais do arquivo (sem normalização)
+    """
+    nome = str(getattr(file_obj, "name", "")).lower()
+
+    if _CALAMINE_DISPONIVEL:
+        try:
+            file_obj.seek(0)
+            return pd.read_excel(file_obj, sheet_name=0, dtype=str,
+                                 engine="calamine", usecols=_coluna_conhecida)
+        except Exception as e:
+            print(f"[ler_excel_plano] calamine falhou, usando fallback: {e}")
+
+    file_obj.seek(0)
+    if nome.endswith(".xls"):
+        return pd.read_excel(file_obj, sheet_name=0, dtype=str, usecols=_coluna_conhecida)
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if not cabecalho:
+            return pd.DataFrame()
+
+        indices = [i for i, c in enumerate(cabecalho)
+                   if c is not None and _coluna_conhecida(c)]
+        colunas = [str(cabecalho[i]).strip() for i in indices]
+
+        dados = []
+        for linha in linhas:
+            valores = [linha[i] if i < len(linha) else None for i in indices]
+            # Ignorar linhas totalmente vazias (fim do intervalo utilizado)
+            if all(v is None or str(v).strip() == "" for v in valores):
+                continue
+            dados.append([
+                None if v is None
+                else str(int(v)) if isinstance(v, float) and v.is_integer()
+                else str(v)
+                for v in valores
+            ])
+    finally:
+        wb.close()
+
+    return pd.DataFrame(dados, columns=colunas, dtype=object)
+
+
 def normalizar_cabecalhos(df: pd.DataFrame, MAP_COLS: dict) -> pd.DataFrame:
     """
     Recebe um DataFrame recém lido e normaliza seus cabeçalhos usando MAP_COLS.
@@ -433,24 +645,7 @@ def normalizar_cabecalhos(df: pd.DataFrame, MAP_COLS: dict) -> pd.DataFrame:
     - Imprime no terminal os nomes das colunas removidas.
     """
 
-    # Normalizador interno
-    def clean(s: str) -> str:
-        return (
-            str(s).strip()
-            .lower()
-            .replace(" ", "_")
-            .replace("-", "_")
-            .replace("ç", "c")
-            .replace("ã", "a")
-            .replace("â", "a")
-            .replace("á", "a")
-            .replace("é", "e")
-            .replace("ê", "e")
-            .replace("í", "i")
-            .replace("ó", "o")
-            .replace("ô", "o")
-            .replace("ú", "u")
-        )
+    clean = _limpar_nome_coluna
 
     # Mapeia as colunas do df já normalizadas -> original
     df_cols_clean = {clean(c): c for c in df.columns}
@@ -1,10 +1,12 @@
 # utils/plano_contas_processor.py
 
+import hashlib
+
 import streamlit as st
 import pandas as pd
 
 # IMPORTS DO SEU DB (ajuste se o nome for diferente)
-from utils.plano_contas_db import importar_plano_contas
+from utils.plano_contas_db import importar_plano_contas, ler_excel_plano
 
 
 def _limpar_estado_pos_import():
@@ -16,6 +18,8 @@ def _limpar_estado_pos_import():
         "plano_nome",
         "plano_descricao",
         "arquivo_plano",
+        "df_plano",
+        "df_plano_origem",
         "vigencia_verif",
         "confirmar_overwrite",
         "forcar_sobrescrita",
@@ -100,21 +104,26 @@ def run_processor():
         st.session_state["arquivo_plano"] = arquivo
 
     # mostrar preview (opcional)
+    # O arquivo é lido uma única vez por conteúdo; o DataFrame fica na sessão
+    # e é reaproveitado pela importação (sem reler o workbook). A chave é o
+    # hash do conteúdo: um arquivo corrigido com o mesmo nome e tamanho é
+    # relido.
     if arquivo is not None:
+        origem = hashlib.sha256(arquivo.getvalue()).hexdigest()
         try:
-            if arquivo.name.lower().endswith(".csv"):
-                df_preview = _tentar_ler_csv(arquivo)
-                if df_preview is None:
-                    st.error(
-                        "Não foi possível ler o CSV automaticamente. Verifique encoding/separador.")
+            if st.session_state.get("df_plano_origem") != origem:
+                if arquivo.name.lower().endswith(".csv"):
+                    df_lido = _tentar_ler_csv(arquivo)
                 else:
-                    df_preview.columns = [str(c).strip()
-                                          for c in df_preview.columns]
-                    st.write(f"Preview do arquivo ({len(df_preview)} linhas):")
-                    st.dataframe(df_preview.head(50))
+                    df_lido = ler_excel_plano(arquivo)
+                st.session_state["df_plano"] = df_lido
+                st.session_state["df_plano_origem"] = origem
+
+            df_preview = st.session_state.get("df_plano")
+            if df_preview is None:
+                st.error(
+                    "Não foi possível ler o CSV automaticamente. Verifique encoding/separador.")
             else:
-                arquivo.seek(0)
-                df_preview = pd.read_excel(arquivo, sheet_name=0, dtype=str)
                 df_preview.columns = [str(c).strip()
                                       for c in df_preview.columns]
                 st.write(f"Preview do arquivo ({len(df_preview)} linhas):")
@@ -168,7 +177,8 @@ def run_processor():
                     vigencia_id_atual=vigencia_id_atual,
                     uploaded_file=uploaded_file,
                     nome_plano=nome,
-                    descricao_plano=descricao
+                    descricao_plano=descricao,
+                    df_plano=st.session_state.get("df_plano")
                     # forcar_sobrescrita=forcar_sobrescrita
                 )
 
@@ -0,0 +1,96 @@
+"""
+vigencia_resolver.py - Resolução de vigência do plano de contas por empresa e ano
+
+Responde (empresa, ano) -> (empresa_id, vigencia_id, plano_contas_id) com uma
+única consulta (empresa LEFT JOIN vigência ativa). Os resultados ficam em cache
+no processo e são descartados quando um plano de contas é importado.
+
+Falha na consulta não é "sem vigência": o resultado traz 'erro' com a
+mensagem (e não entra no cache), para que quem chama bloqueie a operação.
+
+Funções disponíveis:
+- resolver_vigencia(ano, empresa_nome=None, empresa_id=None)
+- invalidar_vigencias()
+"""
+
+from database import conectar, desconectar
+from utils import cache
+
+
+_CACHE_VIGENCIAS = cache.namespace("vigencias", ("tipo", "empresa", "ano"))
+
+
+def _vazio(empresa_id=None, erro=None) -> dict:
+    return {"existe": False, "vigencia_id": None, "plano_contas_id": None,
+            "empresa_id": empresa_id, "erro": erro}
+
+
+def _consultar_vigencia(ano_vigencia: int, empresa_nome=None, empresa_id=None) -> dict:
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        if empresa_id is not None:
+            filtro, param = "e.cod_empresa = %s", empresa_id
+        else:
+            filtro, param = "e.nome_empresa = %s", empresa_nome
+
+        cursor.execute(
+            f"""
+            SELECT e.cod_empresa, v.id, v.plano_contas_id
+            FROM public.ebisa_empresa_sienge e
+            LEFT JOIN public.ebisa_cont_plano_contas_vigencia v
+                   ON v.empresa_id = e.cod_empresa
+                  AND v.ano_vigencia = %s
+                  AND v.fl_ativo = TRUE
+            WHERE {filtro}
+            ORDER BY v.id DESC NULLS LAST
+            LIMIT 1
+            """,
+            (ano_vigencia, param)
+        )
+        row = cursor.fetchone()
+
+        if not row:
+            return _vazio()
+        if row[1] is None:
+            return _vazio(row[0])
+
+        return {
+            "existe": True,
+            "vigencia_id": row[1],
+            "plano_contas_id": row[2],
+            "empresa_id": row[0],
+            "erro": None
+        }
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def resolver_vigencia(ano_vigencia: int, empresa_nome: str | None = None, empresa_id: int | None = None) -> dict:
+    """
+    Resolve a vigência ATIVA da empresa (por nome ou por ID) no ano informado.
+
+    Returns:
+        {"existe": bool, "vigencia_id": int|None, "plano_contas_id": int|None,
+         "empresa_id": int|None, "erro": str|None}
+        'erro' preenchido = a consulta falhou e 'existe' não é conclusivo.
+    """
+    chave = ("id", empresa_id, int(ano_vigencia)) if empresa_id is not None \
+        else ("nome", empresa_nome, int(ano_vigencia))
+
+    try:
+        resultado = _CACHE_VIGENCIAS.obter(
+            chave, lambda: _consultar_vigencia(int(ano_vigencia), empresa_nome, empresa_id))
+    except Exception as e:
+        # Erros de banco não entram no cache
+        print(f"❌ Erro ao resolver vigência: {e}")
+        return _vazio(empresa_id, erro=str(e))
+    return dict(resultado)
+
+
+def invalidar_vigencias():
+    """Descarta todas as vigências em cache (chamado após importar planos)."""
+    _CACHE_VIGENCIAS.invalidar()